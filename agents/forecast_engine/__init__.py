@@ -10,5 +10,8 @@ competitive time-series cross-validation.
 """
 
 from .ensemble import RACEForecaster, ForecastResult
+from .model_store import ModelStore, FittedState
+from .feature_store import FeatureStore
 
-__all__ = ["RACEForecaster", "ForecastResult"]
+__all__ = ["RACEForecaster", "ForecastResult", "ModelStore", "FittedState",
+           "FeatureStore"]
@@ -0,0 +1,415 @@
+"""
+RACE Walk-Forward Backtest
+==========================
+Replays price history through the RACE ensemble: at every cut-off date
+the members see only the rows up to that date, forecast the next
+``max(horizons)`` days recursively, and each forecast is scored against
+the prices that actually followed. Accuracy is available the day a
+history is loaded instead of after ``forecast_logs`` has filled up.
+
+Cost structure
+--------------
+- Features are built once per series (``FeatureFactory.build_features``
+  over the whole history); every retrain slices its training rows out of
+  that one matrix.
+- Members are refitted every ``retrain_every`` days, with the
+  ensemble's own expanding-window CV for the weights; the cut-offs in
+  between reuse the block's fitted members, as a daily pipeline reusing
+  its last full fit would.
+- The recursive forecasts of all cut-offs of a block advance in
+  lockstep: per step, the price-path features of every cut-off are one
+  column-wise ``indicators`` pass over their trailing ``window`` rows
+  plus the forecast so far, and every member scores all cut-offs in
+  one ``predict`` call.
+- Regimes are detected every ``regime_every`` days for all pairs in one
+  ``detect_regimes_batch`` call, continuing the previous detection.
+- Blocks of all pairs run concurrently on a thread pool.
+
+Approximations vs. ``RACEForecaster.forecast``
+----------------------------------------------
+- Whole-series features (STL) of training rows come from the one
+  decomposition of the full history, so they know how later prices
+  split into trend and season (their sum is the row's price either
+  way). On forecast rows the seasonal component continues with its
+  30-day period from the cut-off and the trend takes the rest.
+- EWM features (MACD, RSI) of forecast rows start their memory at the
+  trailing window; with the default 120 rows the initial value's
+  weight is below 1e-4.
+- No weather features.
+
+Usage
+-----
+    backtester = WalkForwardBacktester(retrain_every=30)
+    report = backtester.run({("Onion", "Lasalgaon"): history, ...})
+    report.mape("horizon")                  # MAPE by forecast horizon
+    report.mape("regime")                   # MAPE by regime at the cut-off
+    report.summary()                        # rows of the backtest_results table
+"""
+
+import logging
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, Hashable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .ensemble import RACEForecaster, DEFAULT_MEMBERS, _BaseModel, _TrainingMatrix
+from .feature_factory import FeatureFactory, HARVEST_CALENDAR, FESTIVAL_MONTHS
+from . import indicators
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HORIZONS = (1, 7, 14, 30)
+STL_PERIOD = 30
+
+
+@dataclass
+class BacktestReport:
+    """Scored forecasts of one backtest run."""
+    forecasts: pd.DataFrame      # one row per (pair, cut-off, horizon)
+    retrain_every: int
+    retrains: int
+    seconds: float
+
+    def mape(self, *by: str) -> pd.DataFrame:
+        """MAPE (%) and forecast count grouped by *by* columns (default: horizon)."""
+        by = list(by) or ["horizon"]
+        if self.forecasts.empty:
+            return pd.DataFrame(columns=by + ["n_forecasts", "mape"])
+        return (self.forecasts.groupby(by)["ape"]
+                .agg(n_forecasts="size", mape="mean")
+                .reset_index())
+
+    def summary(self) -> pd.DataFrame:
+        """MAPE per (commodity, mandi, horizon, regime): the ``backtest_results`` rows."""
+        return self.mape("commodity", "mandi", "horizon", "regime")
+
+
+class _Series(NamedTuple):
+    """One pair's history and its once-computed features."""
+    commodity: str
+    mandi: str
+    dates: np.ndarray            # datetime64[ns], sorted
+    price: np.ndarray
+    arrival: Optional[np.ndarray]
+    X: np.ndarray                # float32 (rows, feature_cols)
+    feature_cols: List[str]
+    stl_seasonal: np.ndarray
+    days_since_shock: np.ndarray
+
+
+class _Block(NamedTuple):
+    """Cut-offs served by one full fit (made at ``cutoffs[0]``)."""
+    key: Hashable
+    cutoffs: np.ndarray          # row positions in the series
+
+
+class WalkForwardBacktester:
+    """Walk-forward replay of the RACE ensemble over price histories."""
+
+    def __init__(self, horizons: Sequence[int] = DEFAULT_HORIZONS,
+                 retrain_every: int = 30, cutoff_every: int = 1,
+                 regime_every: int = 7, n_splits: int = 3,
+                 min_train: int = 120, window: int = 120,
+                 members: Sequence[str] = DEFAULT_MEMBERS,
+                 member_params: Optional[Callable[[str], Dict[str, Dict]]] = None,
+                 pruned_features: Optional[Callable[[str], Sequence[str]]] = None,
+                 n_jobs: Optional[int] = None, stl_mode: Optional[str] = None):
+        """
+        Parameters
+        ----------
+        horizons : forecast days scored at every cut-off.
+        retrain_every : days between full refits of the members.
+        cutoff_every : days between cut-offs.
+        regime_every : days between regime detections; a cut-off is
+            labelled (and its weights regime-adjusted) with the latest
+            detection on or before it.
+        n_splits : CV folds behind the inverse-MAPE weights (0: equal
+            weights, no CV fits).
+        min_train : rows of history before the first cut-off.
+        window : trailing rows the forecast-row features are computed
+            from (capped at *min_train*).
+        members, member_params, pruned_features : as in ``RACEForecaster``.
+        n_jobs : blocks run concurrently (see ``RACEForecaster``).
+        stl_mode : FeatureFactory STL mode of the one feature build.
+        """
+        self.horizons = tuple(sorted(set(int(h) for h in horizons)))
+        self.retrain_every = max(1, retrain_every)
+        self.cutoff_every = max(1, cutoff_every)
+        self.regime_every = max(1, regime_every)
+        self.n_splits = n_splits
+        self.min_train = max(min_train, 40)
+        self.window = max(31, min(window, self.min_train))
+        self.stl_mode = stl_mode
+        # Member construction, CV plumbing and weighting of the ensemble itself
+        self._race = RACEForecaster(n_jobs=n_jobs, members=members,
+                                    member_params=member_params,
+                                    pruned_features=pruned_features)
+
+    @property
+    def horizon(self) -> int:
+        return self.horizons[-1]
+
+    # ----- Public API -----
+
+    def run(self, histories: Mapping[Hashable, pd.DataFrame],
+            start: Optional[str] = None, end: Optional[str] = None) -> BacktestReport:
+        """
+        Backtest every history.
+
+        Parameters
+        ----------
+        histories : {(commodity, mandi): DataFrame with ['date', 'price']
+            and optionally 'arrival', 'price_min', 'price_max'}.
+        start, end : first / last cut-off date; by default the year
+            before each pair's last price (cut-offs without any actual
+            price after them are never made).
+
+        Returns
+        -------
+        BacktestReport
+        """
+        t0 = time.perf_counter()
+        race = self._race
+        with ThreadPoolExecutor(max_workers=race.n_jobs) as pool:
+            builds = {key: pool.submit(self._build_series, key, data)
+                      for key, data in histories.items()}
+            series = {}
+            for key, future in builds.items():
+                try:
+                    s = future.result()
+                except Exception as e:
+                    logger.warning(f"Backtest features failed for {key}: {e}")
+                    continue
+                if s is not None:
+                    series[key] = s
+
+            blocks = [block for key, s in series.items()
+                      for block in self._blocks(key, s, start, end)]
+            regimes = self._regimes(series, blocks)
+
+            futures = [pool.submit(self._run_block, series[b.key], b, regimes[b.key])
+                       for b in blocks]
+            frames = []
+            for block, future in zip(blocks, futures):
+                try:
+                    frames.append(future.result())
+                except Exception as e:
+                    logger.warning(f"Backtest block {block.key} failed: {e}")
+
+        frames = [f for f in frames if not f.empty]
+        forecasts = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(
+            columns=["commodity", "mandi", "cutoff", "horizon", "regime",
+                     "forecast", "actual", "ape"])
+        return BacktestReport(forecasts=forecasts, retrain_every=self.retrain_every,
+                              retrains=len(blocks),
+                              seconds=round(time.perf_counter() - t0, 2))
+
+    # ----- Setup -----
+
+    def _build_series(self, key: Hashable, data: pd.DataFrame) -> Optional[_Series]:
+        """Sort, featurise once and keep the arrays the replay needs."""
+        if len(data) <= self.min_train:
+            return None
+        commodity, mandi = key if isinstance(key, tuple) else (str(key), "Unknown")
+        data = RACEForecaster._sorted(data)
+        factory = FeatureFactory(commodity=commodity, stl_mode=self.stl_mode)
+        featured = factory.build_features(data, target_col="price")
+        # The replay reads STL / shock columns even when the members do not
+        cols = self._race._feature_factory(commodity).get_feature_columns(featured)
+        return _Series(
+            commodity=commodity,
+            mandi=mandi,
+            dates=featured["date"].to_numpy(dtype="datetime64[ns]"),
+            price=featured["price"].to_numpy(dtype=np.float64),
+            arrival=featured["arrival"].to_numpy(dtype=np.float64)
+            if "arrival" in featured.columns else None,
+            X=np.ascontiguousarray(featured[cols].values, dtype=np.float32),
+            feature_cols=cols,
+            stl_seasonal=featured["stl_seasonal"].to_numpy(dtype=np.float64),
+            days_since_shock=featured["days_since_shock"].to_numpy(dtype=np.float64),
+        )
+
+    def _blocks(self, key: Hashable, s: _Series, start: Optional[str],
+                end: Optional[str]) -> List[_Block]:
+        """Cut-offs of a series, grouped into retrain blocks."""
+        last = s.dates[-1]
+        first = np.datetime64(pd.Timestamp(start)) if start is not None \
+            else last - np.timedelta64(365, "D")
+        final = np.datetime64(pd.Timestamp(end)) if end is not None else last
+        day = np.timedelta64(1, "D")
+
+        rows = np.flatnonzero((s.dates >= first) & (s.dates <= final)
+                              & (s.dates < last))
+        rows = rows[rows >= self.min_train - 1]
+        if not len(rows):
+            return []
+        # Every cutoff_every-th day from the first cut-off
+        days = (s.dates[rows] - s.dates[rows[0]]) // day
+        rows = rows[days % self.cutoff_every == 0]
+        days = (s.dates[rows] - s.dates[rows[0]]) // day
+
+        blocks, begin = [], 0
+        for i in range(1, len(rows) + 1):
+            if i == len(rows) or days[i] - days[begin] >= self.retrain_every:
+                blocks.append(_Block(key, rows[begin:i]))
+                begin = i
+        return blocks
+
+    def _regimes(self, series: Dict[Hashable, _Series],
+                 blocks: List[_Block]) -> Dict[Hashable, Tuple[np.ndarray, List[str]]]:
+        """
+        ``{key: (detection dates, regimes)}``: every ``regime_every`` days
+        from each pair's first cut-off, all pairs due on a date detected
+        in one batch that continues their previous detections.
+        """
+        day = np.timedelta64(1, "D")
+        due: Dict[np.datetime64, List[Tuple[Hashable, int]]] = {}
+        for key in {b.key for b in blocks}:
+            s = series[key]
+            cutoffs = np.concatenate([b.cutoffs for b in blocks if b.key == key])
+            first = s.dates[cutoffs.min()]
+            rows = np.arange(cutoffs.min(), cutoffs.max() + 1)
+            rows = rows[(s.dates[rows] - first) // day % self.regime_every == 0]
+            for row in rows:
+                due.setdefault(s.dates[row], []).append((key, row))
+
+        detector = self._race.regime_detector
+        previous, out = {}, {key: ([], []) for key in series}
+        for date in sorted(due):
+            prices = {key: pd.Series(series[key].price[:row + 1]) for key, row in due[date]}
+            states = detector.detect_regimes_batch(prices, previous=previous)
+            for key, state in states.items():
+                previous[key] = state
+                out[key][0].append(date)
+                out[key][1].append(state.regime)
+        return {key: (np.array(dates, dtype="datetime64[ns]"), labels)
+                for key, (dates, labels) in out.items()}
+
+    # ----- Replay -----
+
+    def _run_block(self, s: _Series, block: _Block,
+                   regimes: Tuple[np.ndarray, List[str]]) -> pd.DataFrame:
+        """Fit at the block's first cut-off, forecast and score all its cut-offs."""
+        race = self._race
+        cutoffs = block.cutoffs
+        members, _ = race._select_members({}, race._tuned_params(s.commodity))
+        matrix = _TrainingMatrix(s.X[:cutoffs[0] + 1], s.price[:cutoffs[0] + 1])
+
+        # CV for the weights, then the full-data fits
+        scores = {m.name: 5.0 for m in members}
+        if self.n_splits > 0:
+            jobs = race._cv_jobs(matrix, members, self.n_splits)
+            fits = [race._fit_one(m.spawn(), train, valid) if train is not None else None
+                    for m, train, valid, _ in jobs or ()]
+            scores, _ = race._score_cv(matrix, members, jobs, fits)
+        fitted = []
+        for m in members:
+            try:
+                fitted.append(race._fit_one(m, matrix.container(m.library)))
+                m.compile()
+            except Exception as e:
+                logger.warning(f"{s.commodity}/{s.mandi}: {m.name} fit failed: {e}")
+        if not fitted:
+            return pd.DataFrame()
+
+        dates, labels = regimes
+        at = np.searchsorted(dates, s.dates[cutoffs], side="right") - 1
+        cutoff_regimes = [labels[i] if i >= 0 else "STABLE" for i in at]
+        scores = {m.name: scores[m.name] for m in fitted}
+        weights = np.array([[race._compute_weights(scores, regime).get(m.name, 0.0)
+                             for m in fitted] for regime in cutoff_regimes])
+
+        preds = self._forecast_paths(s, cutoffs, fitted, weights)
+        return self._score(s, cutoffs, preds, cutoff_regimes)
+
+    def _forecast_paths(self, s: _Series, cutoffs: np.ndarray,
+                        members: List[_BaseModel], weights: np.ndarray) -> np.ndarray:
+        """
+        Recursive ``horizon``-day forecasts from every cut-off, advanced in
+        lockstep; returns (cut-offs, horizon). *weights* is (cut-offs, members).
+        """
+        preds = np.zeros((len(cutoffs), self.horizon))
+        for i in range(1, self.horizon + 1):
+            x = self._step_features(s, cutoffs, preds[:, :i - 1])
+            step = np.zeros(len(cutoffs))
+            for j, m in enumerate(members):
+                try:
+                    step += weights[:, j] * m.predict(x)
+                except Exception:
+                    continue
+            preds[:, i - 1] = step
+        return preds
+
+    def _step_features(self, s: _Series, cutoffs: np.ndarray,
+                       path: np.ndarray) -> np.ndarray:
+        """
+        Feature rows (cut-offs, feature_cols) of forecast day
+        ``path.shape[1] + 1`` after every cut-off, given the forecasts
+        made so far.
+
+        As in ``RACEForecaster._recursive_forecast_batch``, the new row's
+        price is the last known or forecast price (a placeholder), its
+        arrival the cut-off's and its min/max price unknown.
+        """
+        i = path.shape[1] + 1
+        rows = cutoffs[None, :] + np.arange(1 - self.window, 1)[:, None]
+        last = path[:, -1] if path.shape[1] else s.price[cutoffs]
+        price = np.vstack([s.price[rows], path.T, last[None, :]])
+        arrival = None
+        if s.arrival is not None:
+            arrival = np.vstack([s.arrival[rows],
+                                 np.repeat(s.arrival[cutoffs][None, :], i, axis=0)])
+        spread = None
+        if any(c in s.feature_cols for c in ("price_spread", "spread_pct")):
+            spread = np.full_like(price, np.nan)
+        features = {name: values[-1] for name, values in
+                    FeatureFactory._series_features(price, arrival, spread, spread).items()}
+
+        # Calendar of the forecast date
+        dates = pd.DatetimeIndex(s.dates[cutoffs] + np.timedelta64(i, "D"))
+        month = dates.month.to_numpy()
+        features.update(
+            day_of_week=dates.dayofweek.to_numpy(),
+            month=month,
+            quarter=dates.quarter.to_numpy(),
+            day_of_year=dates.dayofyear.to_numpy(),
+            is_harvest=np.isin(month, HARVEST_CALENDAR.get(s.commodity, [])).astype(int),
+            festival_proximity=np.isin(month, FESTIVAL_MONTHS).astype(int),
+        )
+
+        # Season continues with its period, the trend takes the rest
+        seasonal = s.stl_seasonal[cutoffs + i - STL_PERIOD * math.ceil(i / STL_PERIOD)]
+        features.update(stl_seasonal=seasonal, stl_trend=last - seasonal,
+                        stl_residual=np.zeros(len(cutoffs)))
+
+        # Shock counter: from the window if it holds a shock, else carried on
+        in_window = indicators.days_since_shock(price)[-1]
+        features["days_since_shock"] = np.where(
+            in_window < 1000, in_window, s.days_since_shock[cutoffs] + i)
+
+        zeros = np.zeros(len(cutoffs))
+        x = np.column_stack([np.asarray(features.get(c, zeros), dtype=np.float64)
+                             for c in s.feature_cols])
+        # build_features fills NaN with 0
+        return np.nan_to_num(x, nan=0.0, posinf=np.inf, neginf=-np.inf)
+
+    def _score(self, s: _Series, cutoffs: np.ndarray, preds: np.ndarray,
+               regimes: List[str]) -> pd.DataFrame:
+        """Absolute percentage error of every horizon with a known actual price."""
+        records = []
+        for h in self.horizons:
+            targets = s.dates[cutoffs] + np.timedelta64(h, "D")
+            pos = np.minimum(np.searchsorted(s.dates, targets), len(s.dates) - 1)
+            known = s.dates[pos] == targets
+            for k in np.flatnonzero(known):
+                actual = s.price[pos[k]]
+                forecast = float(preds[k, h - 1])
+                records.append((s.commodity, s.mandi, pd.Timestamp(s.dates[cutoffs[k]]),
+                                h, regimes[k], forecast, float(actual),
+                                abs(actual - forecast) / (abs(actual) + 1e-9) * 100))
+        return pd.DataFrame(records, columns=["commodity", "mandi", "cutoff", "horizon",
+                                              "regime", "forecast", "actual", "ape"])
@@ -0,0 +1,282 @@
+"""
+Compiled Tree Ensembles — NumPy Scoring for Fitted RACE Members
+================================================================
+Exports a fitted XGBoost / LightGBM / CatBoost member into flat arrays
+and scores it with vectorised NumPy, bypassing the per-call overhead of
+the native Python APIs (DMatrix / Pool construction, thread dispatch).
+
+Two layouts:
+    CompiledForest          — binary trees (XGBoost, LightGBM): per-node
+                              feature, threshold, left / right child,
+                              missing direction and leaf value arrays.
+    CompiledObliviousForest — symmetric trees (CatBoost): per-level
+                              feature / border arrays and a leaf table
+                              indexed by the bits of the level decisions.
+
+Every row walks all trees at once, one tree level per NumPy step, so a
+prediction costs ``max_depth`` vectorised gathers regardless of the
+number of trees or rows. Leaf values are then added one tree at a time
+in the library's precision (``_tree_order_sum``), so predictions equal
+the native ones bit for bit.
+
+Usage
+-----
+    compiled = compile_member(member)      # member: fitted _BaseModel
+    preds = compiled.predict(X)
+"""
+
+import json
+import os
+import tempfile
+from typing import List, Optional
+
+import numpy as np
+
+
+class CompiledForest:
+    """
+    Flat array form of a binary-tree ensemble.
+
+    Leaves point to themselves, so walking ``max_depth`` levels from the
+    roots lands every row on its leaf in every tree.
+    """
+
+    def __init__(self, feature, threshold, left, right, default_left, value,
+                 roots, max_depth: int, base_score: float = 0.0,
+                 inclusive: bool = False, dtype=np.float32):
+        self.feature = np.asarray(feature, dtype=np.intp)
+        self.threshold = np.asarray(threshold, dtype=dtype)
+        self.left = np.asarray(left, dtype=np.intp)
+        self.right = np.asarray(right, dtype=np.intp)
+        self.default_left = np.asarray(default_left, dtype=bool)
+        self.value = np.asarray(value, dtype=np.float64)
+        self.roots = np.asarray(roots, dtype=np.intp)
+        self.max_depth = int(max_depth)
+        self.base_score = float(base_score)
+        self.inclusive = inclusive          # True: x <= t goes left, else x < t
+        self.dtype = np.dtype(dtype)
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    def predict(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=self.dtype)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        n_rows, n_features = X.shape
+        flat_x = np.ascontiguousarray(X).ravel()
+        has_nan = np.isnan(flat_x).any()
+        row_offset = (np.arange(n_rows, dtype=np.intp) * n_features)[:, None]
+
+        node = np.broadcast_to(self.roots, (n_rows, self.n_trees))
+        for _ in range(self.max_depth):
+            x = flat_x[row_offset + self.feature[node]]
+            threshold = self.threshold[node]
+            go_left = x <= threshold if self.inclusive else x < threshold
+            if has_nan:
+                # NaN compares False above, i.e. goes right unless defaulted left
+                go_left |= np.isnan(x) & self.default_left[node]
+            node = self._children[2 * node + go_left]
+        return _tree_order_sum(self.base_score, self.value[node], self.dtype)
+
+    @property
+    def _children(self) -> np.ndarray:
+        """Interleaved ``[right, left]`` child of every node."""
+        children = self.__dict__.get("_children_cache")
+        if children is None:
+            children = np.empty(2 * len(self.left), dtype=np.intp)
+            children[0::2] = self.right
+            children[1::2] = self.left
+            self.__dict__["_children_cache"] = children
+        return children
+
+
+class CompiledObliviousForest:
+    """Flat array form of a symmetric (oblivious) tree ensemble."""
+
+    def __init__(self, features, borders, nan_goes_right, leaf_values,
+                 scale: float = 1.0, bias: float = 0.0):
+        self.features = np.asarray(features, dtype=np.intp)          # (trees, depth)
+        self.borders = np.asarray(borders, dtype=np.float32)         # (trees, depth)
+        self.nan_goes_right = np.asarray(nan_goes_right, dtype=bool)  # (trees, depth)
+        self.leaf_values = np.asarray(leaf_values, dtype=np.float64)  # (trees, 2**depth)
+        self.scale = float(scale)
+        self.bias = float(bias)
+        self._bit = 1 << np.arange(self.features.shape[1], dtype=np.intp)
+        self._tree = np.arange(len(self.features))
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.features)
+
+    def predict(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        x = X[:, self.features]                                      # (rows, trees, depth)
+        bits = x > self.borders
+        missing = np.isnan(x)
+        if missing.any():
+            bits = np.where(missing, self.nan_goes_right, bits)
+        leaf = (bits * self._bit).sum(axis=2)                        # (rows, trees)
+        return self.scale * _tree_order_sum(0.0, self.leaf_values[self._tree, leaf]) + self.bias
+
+
+def _tree_order_sum(start: float, leaves: np.ndarray, dtype=np.float64) -> np.ndarray:
+    """
+    *start* plus the (rows, trees) *leaves*, added one tree at a time in
+    *dtype*, as the libraries accumulate (float32 for XGBoost). NumPy's
+    pairwise ``sum`` can differ in the last bits, which is enough to flip
+    a later split of a recursive forecast.
+    """
+    acc = np.empty((leaves.shape[0], leaves.shape[1] + 1), dtype=dtype)
+    acc[:, 0] = start
+    acc[:, 1:] = leaves
+    return np.cumsum(acc, axis=1, dtype=dtype)[:, -1]
+
+
+# ---------------------------------------------------------------------------
+# Exporters
+# ---------------------------------------------------------------------------
+
+class _NodeTable:
+    """Accumulates nodes of many trees into flat arrays."""
+
+    def __init__(self):
+        self.feature: List[int] = []
+        self.threshold: List[float] = []
+        self.left: List[int] = []
+        self.right: List[int] = []
+        self.default_left: List[bool] = []
+        self.value: List[float] = []
+        self.roots: List[int] = []
+        self.max_depth = 0
+
+    def add(self, feature=0, threshold=0.0, default_left=False, value=0.0) -> int:
+        idx = len(self.feature)
+        self.feature.append(feature)
+        self.threshold.append(threshold)
+        self.left.append(idx)
+        self.right.append(idx)
+        self.default_left.append(default_left)
+        self.value.append(value)
+        return idx
+
+    def build(self, **kwargs) -> CompiledForest:
+        return CompiledForest(self.feature, self.threshold, self.left, self.right,
+                              self.default_left, self.value, self.roots,
+                              max_depth=self.max_depth, **kwargs)
+
+
+def compile_xgboost(booster, n_trees: Optional[int] = None) -> CompiledForest:
+    """Export an ``xgboost.Booster`` (regression, one tree per round)."""
+    model = json.loads(booster.save_raw("json"))
+    learner = model["learner"]
+    trees = learner["gradient_booster"]["model"]["trees"]
+    if n_trees is not None:
+        trees = trees[:n_trees]
+
+    table = _NodeTable()
+    for tree in trees:
+        lefts = tree["left_children"]
+        rights = tree["right_children"]
+        offset = len(table.feature)
+        depth = np.zeros(len(lefts), dtype=int)
+        for i, (lc, rc) in enumerate(zip(lefts, rights)):
+            leaf = lc == -1
+            table.add(
+                feature=0 if leaf else tree["split_indices"][i],
+                threshold=0.0 if leaf else tree["split_conditions"][i],
+                default_left=bool(tree["default_left"][i]),
+                value=tree["split_conditions"][i] if leaf else 0.0,
+            )
+            if not leaf:
+                table.left[offset + i] = offset + lc
+                table.right[offset + i] = offset + rc
+                depth[lc] = depth[rc] = depth[i] + 1
+        table.roots.append(offset)
+        table.max_depth = max(table.max_depth, int(depth.max()))
+
+    base_score = learner["learner_model_param"]["base_score"].strip("[]")
+    return table.build(base_score=float(base_score), inclusive=False, dtype=np.float32)
+
+
+def compile_lightgbm(booster, n_trees: Optional[int] = None) -> CompiledForest:
+    """Export a ``lightgbm.Booster`` with numerical splits only."""
+    tree_info = booster.dump_model()["tree_info"]
+    if n_trees is not None:
+        tree_info = tree_info[:n_trees]
+
+    table = _NodeTable()
+
+    def walk(node, depth):
+        if "leaf_value" in node:
+            table.max_depth = max(table.max_depth, depth)
+            return table.add(value=node["leaf_value"])
+        if node["decision_type"] != "<=" or node["missing_type"] not in ("None", "NaN"):
+            raise ValueError(f"Unsupported LightGBM split: {node['decision_type']} / "
+                             f"missing={node['missing_type']}")
+        threshold = node["threshold"]
+        # missing_type None: NaN is scored as 0.0
+        default_left = (node["default_left"] if node["missing_type"] == "NaN"
+                        else 0.0 <= threshold)
+        idx = table.add(feature=node["split_feature"], threshold=threshold,
+                        default_left=default_left)
+        table.left[idx] = walk(node["left_child"], depth + 1)
+        table.right[idx] = walk(node["right_child"], depth + 1)
+        return idx
+
+    for tree in tree_info:
+        table.roots.append(walk(tree["tree_structure"], 0))
+    return table.build(inclusive=True, dtype=np.float64)
+
+
+def compile_catboost(model) -> CompiledObliviousForest:
+    """Export a fitted ``CatBoostRegressor`` with float features only."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "model.json")
+        model.save_model(path, format="json")
+        with open(path) as f:
+            exported = json.load(f)
+
+    float_features = exported["features_info"].get("float_features", [])
+    nan_right = {ff["feature_index"]: ff.get("nan_value_treatment") == "AsTrue"
+                 for ff in float_features}
+    trees = exported["oblivious_trees"]
+    depth = max((len(t["splits"]) for t in trees), default=0)
+
+    features = np.zeros((len(trees), depth), dtype=np.intp)
+    # Padded levels never fire (x > +inf is False) and so add bit 0
+    borders = np.full((len(trees), depth), np.inf, dtype=np.float32)
+    nan_goes_right = np.zeros((len(trees), depth), dtype=bool)
+    leaf_values = np.zeros((len(trees), 2 ** depth))
+    for t, tree in enumerate(trees):
+        for d, split in enumerate(tree["splits"]):
+            if split.get("split_type") != "FloatFeature":
+                raise ValueError(f"Unsupported CatBoost split: {split.get('split_type')}")
+            features[t, d] = split["float_feature_index"]
+            borders[t, d] = split["border"]
+            nan_goes_right[t, d] = nan_right.get(split["float_feature_index"], False)
+        values = tree["leaf_values"]
+        leaf_values[t, :len(values)] = values
+
+    scale, bias = exported.get("scale_and_bias", [1.0, [0.0]])
+    bias = bias[0] if isinstance(bias, list) else bias
+    return CompiledObliviousForest(features, borders, nan_goes_right, leaf_values,
+                                   scale=scale, bias=bias)
+
+
+def compile_member(member):
+    """Compiled predictor for a fitted RACE ensemble member."""
+    if member.model is None:
+        raise ValueError(f"{member.name} is not fitted")
+    n_trees = member.best_iteration + 1 if member.best_iteration is not None else None
+    if member.library == "xgboost":
+        return compile_xgboost(member.model, n_trees)
+    if member.library == "lightgbm":
+        return compile_lightgbm(member.model, n_trees)
+    if member.library == "catboost":
+        # use_best_model already shrinks the fitted model
+        return compile_catboost(member.model)
+    raise ValueError(f"Unknown library: {member.library}")
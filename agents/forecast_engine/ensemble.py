@@ -4,28 +4,57 @@ RACE Forecasting Engine — Regime-Adaptive Competitive Ensemble
 IP-grade multi-model ensemble that dynamically adjusts model weights
 based on the detected market regime (STABLE / VOLATILE / CRISIS).
 
-Models: XGBoost, LightGBM, CatBoost
+Models: XGBoost, LightGBM, CatBoost (built from the ``model_zoo`` member
+        registry); members whose weight for a pair has stayed negligible
+        are left out of its full retrains.
 Weighting: Inverse-MAPE competitive scoring with regime penalty/bonus.
 Regime: Detected via Hidden Markov Model (RegimeDetector).
+Training: CV fold x model fits run concurrently on a shared float32
+          matrix, with optional early stopping on the validation fold.
+          With a ModelStore, daily runs can warm-start yesterday's
+          boosters instead of retraining (``incremental=True``).
+Features: with a FeatureStore, training features are appended to and
+          served from memory-mapped per-pair matrices. Columns pruned
+          for a commodity (``feature_selection``) are never built.
+Scoring: the realtime path scores cached members through NumPy exports
+         of their trees (``compiled_trees``).
+Budget: ``forecast(..., budget=s)`` is an anytime ensemble — a linear
+        baseline is always fitted, boosting members join in order of
+        expected value while the latency budget lasts.
+Threads: fit concurrency and per-library thread counts come from the
+         process-wide core budget in ``resources``.
 
 Public API
 ----------
-    forecaster = RACEForecaster()
+    forecaster = RACEForecaster(n_jobs=4, early_stopping_rounds=20)
     result = forecaster.forecast(data, commodity, mandi, horizon=30)
+    result = forecaster.forecast(data, commodity, mandi, budget=2.0)
     result = forecaster.forecast_realtime(data, commodity, mandi, intraday_df)
+    results = forecaster.forecast_many([(data, commodity, mandi), ...])
 """
 
+import threading
+import time
 import numpy as np
 import pandas as pd
-from dataclasses import dataclass, field
-from typing import Dict, Optional, List
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field, replace
+from typing import Callable, Dict, Iterable, NamedTuple, Optional, List, Sequence, Tuple
 from datetime import timedelta
+import logging
 import warnings
 
 warnings.filterwarnings("ignore")
 
+logger = logging.getLogger(__name__)
+
 from .regime_detector import RegimeDetector, RegimeState
-from .feature_factory import FeatureFactory
+from .feature_factory import FeatureFactory, TailFeatures
+from .model_store import ModelStore, FittedState
+from .feature_store import FeatureStore
+from .compiled_trees import compile_member
+from .model_zoo import create_member, register_member
+from . import resources
 
 
 # ---------------------------------------------------------------------------
@@ -42,6 +71,93 @@ class ForecastResult:
     metadata: Dict = field(default_factory=dict)
 
 
+@dataclass
+class _PreparedPair:
+    """A pair with a fitted ensemble, waiting for its recursive forecast."""
+    commodity: str
+    mandi: str
+    data: pd.DataFrame
+    feature_factory: FeatureFactory
+    feature_cols: List[str]
+    models: list
+    weights: Dict[str, float]
+    model_scores: Dict[str, float]
+    regime_state: RegimeState
+    rmse: float
+    retrain_reason: Optional[str]
+    stored: Optional[FittedState] = None
+    # Members left out because the latency budget ran out (budgeted fits)
+    skipped: Optional[List[str]] = None
+    # Members left out because their weight stayed negligible
+    dropped: List[str] = field(default_factory=list)
+    # The pair's member history before this fit (see FittedState)
+    member_history: Dict[str, Dict] = field(default_factory=dict)
+
+
+class _RecursionJob(NamedTuple):
+    """One series advanced by the lockstep recursive forecaster."""
+    data: pd.DataFrame
+    feature_factory: FeatureFactory
+    feature_cols: List[str]
+    weights: Dict[str, float]
+    models: list
+    incremental: bool = False   # newest-row features only (TailFeatures)
+
+
+# ---------------------------------------------------------------------------
+# Shared training matrix
+# ---------------------------------------------------------------------------
+
+class _TrainingMatrix:
+    """
+    Float32 feature matrix built once per forecast and shared by every
+    CV fold and the final fit.
+
+    Each library's native container (XGBoost ``DMatrix``, LightGBM
+    ``Dataset``, CatBoost ``Pool``) is constructed once over the full
+    matrix and *sliced* per fold, so quantisation / binning work is not
+    repeated for every fit.
+    """
+
+    def __init__(self, X: np.ndarray, y: np.ndarray):
+        self.X = np.ascontiguousarray(X, dtype=np.float32)
+        self.y = np.ascontiguousarray(y, dtype=np.float32)
+        self._containers: Dict[str, object] = {}
+
+    def __len__(self) -> int:
+        return len(self.X)
+
+    def container(self, library: str, rows: Optional[np.ndarray] = None):
+        """Native training container for *rows* (all rows if None)."""
+        base = self._containers.get(library)
+        if base is None:
+            base = self._build(library)
+            self._containers[library] = base
+        if rows is None or len(rows) == len(self.X):
+            return base
+        if library == "numpy":
+            return self.X[rows], self.y[rows]
+        if library == "lightgbm":
+            return base.subset(rows).construct()
+        return base.slice(rows)
+
+    def _build(self, library: str):
+        if library == "numpy":
+            return self.X, self.y
+        if library == "xgboost":
+            import xgboost as xgb
+            return xgb.DMatrix(self.X, label=self.y)
+        if library == "lightgbm":
+            import lightgbm as lgb
+            # No pre-filtering: tuned min_data_in_leaf may be below the default
+            return lgb.Dataset(self.X, label=self.y, free_raw_data=False,
+                               params={"verbose": -1, "feature_pre_filter": False}).construct()
+        if library == "catboost":
+            from catboost import Pool
+            return Pool(self.X, label=self.y)
+        raise ValueError(f"Unknown library: {library}")
+
+
 # ---------------------------------------------------------------------------
 # Model wrappers (thin adapters around each library)
 # ---------------------------------------------------------------------------
@@ -49,89 +165,329 @@ class ForecastResult:
 class _BaseModel:
     """Abstract model wrapper."""
     name: str = "base"
+    library: str = ""
+    # NumPy export of the fitted trees (see ``compile``); batches larger
+    # than COMPILED_MAX_ROWS still go to the native library, which wins
+    # once per-call overhead is amortised.
+    compiled = None
+    COMPILED_MAX_ROWS = 256
+    # Set while fitting under a latency budget (see ``_fit_one``): once the
+    # event fires, boosting stops after the current round.
+    stop: Optional[threading.Event] = None
+    # Cost tracking: wall time of the last fit, cumulative predict time
+    fit_seconds: float = 0.0
+    predict_seconds: float = 0.0
+    predict_calls: int = 0
+    # Library hyperparameters overriding the defaults (e.g. tuned ones)
+    params: Dict = {}
+
+    def __init__(self, n_estimators: int = 120,
+                 early_stopping_rounds: Optional[int] = None,
+                 n_threads: int = 1,
+                 params: Optional[Dict] = None):
+        self.n_estimators = n_estimators
+        self.early_stopping_rounds = early_stopping_rounds
+        self.n_threads = n_threads
+        self.params = dict(params or {})
+        self.best_iteration: Optional[int] = None
+        self.model = None
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    def spawn(self, n_estimators: Optional[int] = None) -> "_BaseModel":
+        """Fresh, unfitted copy with the same configuration."""
+        return type(self)(
+            n_estimators=n_estimators or self.n_estimators,
+            early_stopping_rounds=self.early_stopping_rounds,
+            n_threads=self.n_threads,
+            params=self.params,
+        )
 
-    def fit(self, X, y):
+    def fit(self, train, valid=None):
+        """Fit on a native container; *valid* enables early stopping."""
         raise NotImplementedError
 
+    def update(self, train, n_rounds: int):
+        """Continue boosting the fitted model for *n_rounds* on *train*."""
+        raise NotImplementedError
+
+    def compile(self):
+        """Export the fitted trees for low-latency NumPy scoring."""
+        try:
+            self.compiled = compile_member(self)
+        except Exception as e:
+            logger.debug(f"{self.name} not compiled: {e}")
+            self.compiled = None
+        return self.compiled
+
     def predict(self, X) -> np.ndarray:
+        start = time.perf_counter()
+        try:
+            if self.compiled is not None and len(X) <= self.COMPILED_MAX_ROWS:
+                return self.compiled.predict(X)
+            return self._predict_native(X)
+        finally:
+            self.predict_seconds += time.perf_counter() - start
+            self.predict_calls += 1
+
+    def costs(self) -> Dict[str, float]:
+        """Fit seconds and mean milliseconds per predict call."""
+        return {
+            "fit_seconds": round(self.fit_seconds, 4),
+            "predict_ms": round(1e3 * self.predict_seconds / max(self.predict_calls, 1), 4),
+        }
+
+    def feature_importance(self, n_features: int) -> Optional[np.ndarray]:
+        """
+        Gain importance of each of the *n_features* matrix columns,
+        summing to 1; None if the member has no such measure.
+        """
+        try:
+            raw = self._importance(n_features)
+        except Exception as e:
+            logger.debug(f"{self.name} importance unavailable: {e}")
+            return None
+        if raw is None:
+            return None
+        raw = np.maximum(np.asarray(raw, dtype=np.float64), 0.0)
+        total = raw.sum()
+        return raw / total if total > 0 else None
+
+    def _predict_native(self, X) -> np.ndarray:
         raise NotImplementedError
 
+    def _importance(self, n_features: int) -> Optional[np.ndarray]:
+        return None
+
 
+@register_member
 class _XGBModel(_BaseModel):
     name = "XGBoost"
-
-    def __init__(self):
+    library = "xgboost"
+
+    def _params(self) -> Dict:
+        return {
+            "objective": "reg:squarederror",
+            "max_depth": 5,
+            "learning_rate": 0.08,
+            "subsample": 0.8,
+            "colsample_bytree": 0.8,
+            "verbosity": 0,
+            "seed": 42,
+            **self.params,
+            "nthread": self.n_threads,
+        }
+
+    def fit(self, train, valid=None):
         import xgboost as xgb
-        self.model = xgb.XGBRegressor(
-            objective="reg:squarederror",
-            n_estimators=120,
-            max_depth=5,
-            learning_rate=0.08,
-            subsample=0.8,
-            colsample_bytree=0.8,
-            verbosity=0,
-            random_state=42,
+        use_es = valid is not None and self.early_stopping_rounds
+        self.compiled = None
+        self.model = xgb.train(
+            self._params(), train, num_boost_round=self.n_estimators,
+            evals=[(valid, "valid")] if use_es else (),
+            early_stopping_rounds=self.early_stopping_rounds if use_es else None,
+            verbose_eval=False,
+            callbacks=[_XGBStop(self.stop)] if self.stop is not None else None,
         )
+        self.best_iteration = self.model.best_iteration if use_es else None
 
-    def fit(self, X, y):
-        self.model.fit(X, y)
-
-    def predict(self, X):
-        return self.model.predict(X)
-
-
+    def update(self, train, n_rounds: int):
+        import xgboost as xgb
+        self.model = xgb.train(self._params(), train, num_boost_round=n_rounds,
+                               xgb_model=self.model, verbose_eval=False)
+        self.n_estimators = self.model.num_boosted_rounds()
+        self.best_iteration = None
+        self.compiled = None
+
+    def _predict_native(self, X):
+        kwargs = {}
+        if self.best_iteration is not None:
+            kwargs["iteration_range"] = (0, self.best_iteration + 1)
+        return self.model.inplace_predict(np.asarray(X, dtype=np.float32), **kwargs)
+
+    def _importance(self, n_features: int) -> np.ndarray:
+        # Unnamed DMatrix columns are reported as "f<index>"
+        gains = np.zeros(n_features)
+        for name, gain in self.model.get_score(importance_type="total_gain").items():
+            gains[int(name[1:])] = gain
+        return gains
+
+
+@register_member
 class _LGBModel(_BaseModel):
     name = "LightGBM"
+    library = "lightgbm"
+    # Booster.predict is already faster than the NumPy walk for single rows
+    COMPILED_MAX_ROWS = 0
 
-    def __init__(self):
+    @property
+    def available(self) -> bool:
         try:
-            import lightgbm as lgb
-            self.model = lgb.LGBMRegressor(
-                n_estimators=120,
-                max_depth=5,
-                learning_rate=0.08,
-                subsample=0.8,
-                colsample_bytree=0.8,
-                verbose=-1,
-                random_state=42,
-            )
+            import lightgbm  # noqa: F401
+            return True
         except ImportError:
-            self.model = None
+            return False
+
+    def _params(self) -> Dict:
+        return {
+            "objective": "regression",
+            "max_depth": 5,
+            "learning_rate": 0.08,
+            "subsample": 0.8,
+            "colsample_bytree": 0.8,
+            "verbose": -1,
+            "random_state": 42,
+            **self.params,
+            "num_threads": self.n_threads,
+        }
+
+    def fit(self, train, valid=None):
+        import lightgbm as lgb
+        use_es = valid is not None and self.early_stopping_rounds
+        self.compiled = None
+        callbacks = [lgb.early_stopping(self.early_stopping_rounds, verbose=False)] \
+            if use_es else []
+        if self.stop is not None:
+            callbacks.append(_lgb_stop(self.stop))
+        self.model = lgb.train(
+            self._params(), train, num_boost_round=self.n_estimators,
+            valid_sets=[valid] if use_es else None,
+            callbacks=callbacks or None,
+        )
+        self.best_iteration = self.model.best_iteration - 1 if use_es else None
+
+    def update(self, train, n_rounds: int):
+        import lightgbm as lgb
+        self.model = lgb.train(self._params(), train, num_boost_round=n_rounds,
+                               init_model=self.model)
+        self.n_estimators = self.model.current_iteration()
+        self.best_iteration = None
+        self.compiled = None
 
-    def fit(self, X, y):
-        if self.model is not None:
-            self.model.fit(X, y)
+    def _predict_native(self, X):
+        if self.model is None:
+            return np.zeros(len(X))
+        num_iteration = self.best_iteration + 1 if self.best_iteration is not None else None
+        return self.model.predict(np.asarray(X, dtype=np.float32), num_iteration=num_iteration)
 
-    def predict(self, X):
-        if self.model is not None:
-            return self.model.predict(X)
-        return np.zeros(len(X))
+    def _importance(self, n_features: int) -> np.ndarray:
+        return self.model.feature_importance(importance_type="gain")
 
 
+@register_member
 class _CatModel(_BaseModel):
     name = "CatBoost"
+    library = "catboost"
 
-    def __init__(self):
+    @property
+    def available(self) -> bool:
         try:
-            from catboost import CatBoostRegressor
-            self.model = CatBoostRegressor(
-                iterations=120,
-                depth=5,
-                learning_rate=0.08,
-                verbose=0,
-                random_seed=42,
-            )
+            import catboost  # noqa: F401
+            return True
         except ImportError:
-            self.model = None
+            return False
+
+    def _regressor(self, iterations: int):
+        from catboost import CatBoostRegressor
+        params = {"depth": 5, "learning_rate": 0.08, "verbose": 0, "random_seed": 42,
+                  **self.params}
+        return CatBoostRegressor(
+            iterations=iterations,
+            thread_count=self.n_threads,
+            allow_writing_files=False,
+            **params,
+        )
+
+    def fit(self, train, valid=None):
+        use_es = valid is not None and self.early_stopping_rounds
+        self.compiled = None
+        self.model = self._regressor(self.n_estimators)
+        callbacks = [_CatStop(self.stop)] if self.stop is not None else None
+        if use_es:
+            self.model.fit(train, eval_set=valid,
+                           early_stopping_rounds=self.early_stopping_rounds,
+                           use_best_model=True, callbacks=callbacks)
+            self.best_iteration = self.model.get_best_iteration()
+        else:
+            self.model.fit(train, callbacks=callbacks)
+            self.best_iteration = None
+
+    def update(self, train, n_rounds: int):
+        updated = self._regressor(n_rounds)
+        updated.fit(train, init_model=self.model)
+        self.model = updated
+        self.n_estimators = self.model.tree_count_
+        self.best_iteration = None
+        self.compiled = None
+
+    def _predict_native(self, X):
+        if self.model is None:
+            return np.zeros(len(X))
+        return self.model.predict(np.asarray(X, dtype=np.float32))
+
+    def _importance(self, n_features: int) -> np.ndarray:
+        return self.model.get_feature_importance()
+
+
+def _XGBStop(event: threading.Event):
+    """XGBoost callback ending training once *event* is set."""
+    import xgboost as xgb
+
+    class _Stop(xgb.callback.TrainingCallback):
+        def after_iteration(self, model, epoch, evals_log) -> bool:
+            return event.is_set()
+
+    return _Stop()
+
+
+def _lgb_stop(event: threading.Event):
+    """LightGBM callback ending training once *event* is set."""
+    import lightgbm as lgb
+
+    def _stop(env):
+        if event.is_set():
+            raise lgb.callback.EarlyStopException(env.iteration, env.evaluation_result_list)
+    return _stop
+
 
-    def fit(self, X, y):
-        if self.model is not None:
-            self.model.fit(X, y)
+class _CatStop:
+    """CatBoost callback ending training once *event* is set."""
 
-    def predict(self, X):
-        if self.model is not None:
-            return self.model.predict(X)
-        return np.zeros(len(X))
+    def __init__(self, event: threading.Event):
+        self.event = event
+
+    def after_iteration(self, info) -> bool:
+        return not self.event.is_set()
+
+
+@register_member
+class _LinearModel(_BaseModel):
+    """
+    Ridge baseline (``model_zoo.LinearTrendForecaster``) on the plain
+    float32 matrix. Fits in milliseconds, so budgeted forecasts always
+    have at least this member.
+    """
+    name = "LinearTrend"
+    library = "numpy"
+
+    def fit(self, train, valid=None):
+        from .model_zoo import LinearTrendForecaster
+        X, y = train
+        self.model = LinearTrendForecaster()
+        self.model.train(pd.DataFrame(X), pd.Series(y))
+
+    def update(self, train, n_rounds: int):
+        # Nothing to continue: refitting is cheaper than any boosting round
+        self.fit(train)
+
+    def _predict_native(self, X):
+        return self.model.predict(pd.DataFrame(np.asarray(X, dtype=np.float32)))
+
+
+# Members of a full fit, in default order of expected value
+DEFAULT_MEMBERS = ("XGBoost", "LightGBM", "CatBoost")
 
 
 # ---------------------------------------------------------------------------
@@ -148,7 +504,54 @@ class RACEForecaster:
     4. Generates a weighted ensemble 30-day recursive forecast.
     """
 
-    def __init__(self):
+    def __init__(self, n_jobs: Optional[int] = None,
+                 early_stopping_rounds: Optional[int] = None,
+                 model_store: Optional[ModelStore] = None,
+                 warm_start_rounds: int = 10,
+                 full_retrain_days: int = 7,
+                 drift_tolerance: float = 2.0,
+                 feature_store: Optional[FeatureStore] = None,
+                 stl_mode: Optional[str] = None,
+                 members: Sequence[str] = DEFAULT_MEMBERS,
+                 negligible_weight: float = 0.02,
+                 negligible_runs: int = 3,
+                 member_params: Optional[Callable[[str], Dict[str, Dict]]] = None,
+                 pruned_features: Optional[Callable[[str], Sequence[str]]] = None):
+        """
+        Parameters
+        ----------
+        n_jobs : number of CV-fold x model fits run concurrently
+            (default: ``resources.get_config().fit_jobs()``, i.e.
+            ``min(4, cores per forecast)``). Each fit gets the
+            forecast's cores split ``n_jobs`` ways as library threads,
+            so the box is not oversubscribed.
+        early_stopping_rounds : if set, CV fits stop once the validation
+            fold stops improving, and the final fit uses the median best
+            iteration found across folds.
+        model_store : where fitted state is persisted after every
+            forecast and loaded from for ``incremental=True`` runs.
+        warm_start_rounds : boosting rounds added per member on a warm start.
+        full_retrain_days : data days after which a full retrain is forced.
+        drift_tolerance : a full retrain is forced when the stored ensemble's
+            MAPE on the new rows exceeds this multiple of its CV MAPE.
+        feature_store : if set, training features (without weather) are
+            served from / appended to this store instead of being rebuilt.
+        stl_mode : FeatureFactory STL mode ("robust", "fast", "windowed");
+            default from ``AGRIINTEL_STL_MODE``, else "robust".
+        members : ``model_zoo.MEMBER_REGISTRY`` names of the ensemble
+            members, in default order of expected value.
+        negligible_weight, negligible_runs : a member whose weight for a
+            pair stayed below *negligible_weight* in its last
+            *negligible_runs* full fits is left out of that pair's next
+            *negligible_runs* full retrains, then fitted again as a probe.
+        member_params : ``commodity -> {member name: params}`` read at
+            every full fit, e.g. the offline-tuned ``model_params`` table
+            (see ``tuning``). ``n_estimators`` sets the boosting rounds;
+            other keys override the library defaults.
+        pruned_features : ``commodity -> [feature column, ...]`` left out
+            of that commodity's feature builds and fits, e.g. the
+            ``feature_selection`` table (see ``feature_selection``).
+        """
         self.regime_detector = RegimeDetector()
         self.feature_factory: Optional[FeatureFactory] = None
         self.models: List[_BaseModel] = []
@@ -156,6 +559,27 @@ class RACEForecaster:
         self._cached_weights: Dict[str, float] = {}
         self._cached_feature_cols: List[str] = []
 
+        config = resources.get_config()
+        self.n_jobs = config.fit_jobs(n_jobs)
+        self.n_threads = config.library_threads(self.n_jobs)
+        self.early_stopping_rounds = early_stopping_rounds
+
+        self.model_store = model_store
+        self.warm_start_rounds = warm_start_rounds
+        self.full_retrain_days = full_retrain_days
+        self.drift_tolerance = drift_tolerance
+        self.feature_store = feature_store
+        self.stl_mode = stl_mode
+        self.members = tuple(members)
+        self.negligible_weight = negligible_weight
+        self.negligible_runs = negligible_runs
+        self.member_params = member_params
+        self.pruned_features = pruned_features
+
+        # Fitted state of the last full forecast per (commodity, mandi),
+        # reused by the realtime fast path.
+        self._states: Dict[tuple, FittedState] = {}
+
     # ----- Public API -----
 
     def forecast(
@@ -165,6 +589,9 @@ class RACEForecaster:
         mandi: str,
         horizon: int = 30,
         weather_df: Optional[pd.DataFrame] = None,
+        incremental: bool = False,
+        regime_state: Optional[RegimeState] = None,
+        budget: Optional[float] = None,
     ) -> ForecastResult:
         """
         Full RACE forecast pipeline.
@@ -175,68 +602,301 @@ class RACEForecaster:
         commodity, mandi : identifiers.
         horizon : forecast horizon in days.
         weather_df : optional weather DataFrame.
+        incremental : continue boosting the pair's stored models on the
+            extended data instead of retraining, unless a scheduled
+            retrain is due or drift is detected (needs ``model_store``).
+        regime_state : regime already classified for this history (e.g. the
+            day's ``regime_snapshots`` row); skips regime detection.
+        budget : latency budget in seconds, counted from the call, for
+            a full fit (see ``_fit_members_budgeted``). The linear
+            baseline is always fitted; boosting members that have not
+            finished when the budget runs out are left out and listed in
+            ``metadata["members_skipped"]``. The recursive forecast (one
+            feature rebuild per horizon day, see ``stl_mode``) follows
+            the budget. None fits every member.
 
         Returns
         -------
         ForecastResult
         """
-        data = data.copy()
-        data["date"] = pd.to_datetime(data["date"])
-        data = data.sort_values("date").reset_index(drop=True)
-
+        deadline = time.perf_counter() + budget if budget is not None else None
+        data = self._sorted(data)
         if len(data) < 30:
             return self._fallback_forecast(data, commodity, mandi, horizon)
 
-        # 1. Regime Detection
-        regime_state = self.regime_detector.detect_regime(data["price"])
+        prepared = self._prepare(data, commodity, mandi, weather_df, incremental,
+                                 regime_state=regime_state, deadline=deadline)
 
-        # 2. Feature Engineering
-        self.feature_factory = FeatureFactory(commodity=commodity)
-        featured = self.feature_factory.build_features(
-            data, target_col="price", weather_df=weather_df,
+        # 6. Recursive forecast
+        forecast_df = self._recursive_forecast(
+            data, None, prepared.feature_cols, prepared.weights, horizon
         )
-        feature_cols = self.feature_factory.get_feature_columns(featured)
-        self._cached_feature_cols = feature_cols
+        return self._finalise(prepared, forecast_df, horizon)
 
-        # 3. Prepare training data
-        X = featured[feature_cols].values
-        y = featured["price"].values
+    def forecast_many(
+        self,
+        pairs: Iterable[Tuple[pd.DataFrame, str, str]],
+        horizon: int = 30,
+        incremental: bool = False,
+        regime_states: Optional[Dict[Tuple[str, str], RegimeState]] = None,
+    ) -> Dict[Tuple[str, str], ForecastResult]:
+        """
+        RACE forecasts for many ``(data, commodity, mandi)`` pairs.
 
-        # 4. Train models & competitive scoring
-        self.models = [_XGBModel(), _LGBModel(), _CatModel()]
-        # Filter out models that couldn't import
-        self.models = [m for m in self.models if m.model is not None]
+        Regimes come from *regime_states* (e.g. the pooled daily snapshot)
+        or, for pairs missing there, one unpooled ``detect_regimes`` batch,
+        so results match per-pair ``forecast()`` calls. Each pair is then fitted as in
+        ``forecast()``; the recursive forecasts of all pairs advance one
+        day at a time in lockstep (see ``_recursive_forecast_batch``).
+        Pairs that fail to fit are logged and left out of the result.
 
-        model_scores = self._competitive_cv(X, y, n_splits=3)
-        weights = self._compute_weights(model_scores, regime_state.regime)
-        self._cached_weights = weights
+        Returns
+        -------
+        dict keyed by ``(commodity, mandi)``
+        """
+        results: Dict[Tuple[str, str], ForecastResult] = {}
+        fittable = []
+        for data, commodity, mandi in pairs:
+            data = self._sorted(data)
+            if len(data) < 30:
+                results[(commodity, mandi)] = self._fallback_forecast(
+                    data, commodity, mandi, horizon)
+            else:
+                fittable.append((data, commodity, mandi))
+
+        regime_states = dict(regime_states or {})
+        missing = [pair for pair in fittable if (pair[1], pair[2]) not in regime_states]
+        if missing:
+            regime_states.update(self.detect_regimes(missing, incremental=incremental,
+                                                     pooled=False))
+
+        # The feature store already avoids rebuilding history
+        featured = self._panel_features(fittable) if self.feature_store is None else {}
+        prepared: List[_PreparedPair] = []
+        for data, commodity, mandi in fittable:
+            try:
+                prepared.append(self._prepare(
+                    data, commodity, mandi, None, incremental,
+                    featured=featured.get((commodity, mandi)),
+                    regime_state=regime_states.get((commodity, mandi)),
+                ))
+            except Exception as e:
+                logger.warning(f"RACE fit failed for {commodity}/{mandi}: {e}")
+
+        forecasts = self._recursive_forecast_batch([
+            _RecursionJob(p.data, p.feature_factory, p.feature_cols, p.weights, p.models)
+            for p in prepared
+        ], horizon)
+        for p, forecast_df in zip(prepared, forecasts):
+            results[(p.commodity, p.mandi)] = self._finalise(p, forecast_df, horizon)
+        return results
+
+    def detect_regimes(
+        self,
+        pairs: Iterable[Tuple[pd.DataFrame, str, str]],
+        incremental: bool = False,
+        pooled: bool = True,
+    ) -> Dict[Tuple[str, str], RegimeState]:
+        """
+        Regimes of many ``(data, commodity, mandi)`` pairs in one
+        ``RegimeDetector.detect_regimes_batch`` call, continuing each
+        pair's last HMM fit. With *pooled* the pairs of a commodity share
+        one HMM; otherwise every pair gets its own, as in ``forecast``.
+        """
+        series, previous = {}, {}
+        for data, commodity, mandi in pairs:
+            key = (commodity, mandi)
+            series[key] = self._sorted(data)["price"]
+            state = self._previous_state(commodity, mandi, incremental)
+            if state is not None and state.regime_state is not None:
+                previous[key] = state.regime_state
+        pools = None if pooled else {key: key for key in series}
+        return self.regime_detector.detect_regimes_batch(series, previous=previous,
+                                                         pools=pools)
+
+    def _previous_state(self, commodity: str, mandi: str,
+                        incremental: bool) -> Optional[FittedState]:
+        """The pair's last fitted state; from the model store only when *incremental*."""
+        if incremental and self.model_store is not None:
+            return self._fitted_state(commodity, mandi)
+        return self._states.get((commodity, mandi))
+
+    def _panel_features(self, pairs) -> Dict[Tuple[str, str], pd.DataFrame]:
+        """
+        Training features of many pairs via one ``build_features_panel``
+        pass per input column layout (layouts differ e.g. when only some
+        pairs carry arrivals, and must not be mixed).
+        """
+        layouts: Dict[tuple, list] = {}
+        for data, commodity, mandi in pairs:
+            frame = data.assign(commodity=commodity, mandi=mandi)
+            layouts.setdefault(tuple(frame.columns), []).append(frame)
 
-        # 5. Train on full data
-        for m in self.models:
-            m.fit(X, y)
+        featured = {}
+        for frames in layouts.values():
+            try:
+                panel = FeatureFactory(stl_mode=self.stl_mode).build_features_panel(
+                    pd.concat(frames, ignore_index=True), target_col="price")
+            except Exception as e:
+                logger.warning(f"Panel feature build failed: {e}")
+                continue
+            for key, rows in panel.groupby(["commodity", "mandi"], sort=False):
+                featured[key] = rows.reset_index(drop=True)
+        return featured
+
+    @staticmethod
+    def _sorted(data: pd.DataFrame) -> pd.DataFrame:
+        data = data.copy()
+        data["date"] = pd.to_datetime(data["date"])
+        return data.sort_values("date").reset_index(drop=True)
+
+    def _prepare(self, data: pd.DataFrame, commodity: str, mandi: str,
+                 weather_df: Optional[pd.DataFrame], incremental: bool,
+                 featured: Optional[pd.DataFrame] = None,
+                 regime_state: Optional[RegimeState] = None,
+                 deadline: Optional[float] = None) -> _PreparedPair:
+        """
+        Regime detection, features and (warm or full) ensemble fit for one
+        pair. *featured* skips the feature build when the caller already
+        has the pair's features (e.g. from a panel build); *regime_state*
+        skips regime detection. With a *deadline* (``time.perf_counter``
+        value) a full fit keeps only the members finished by then.
+        """
+        previous = self._previous_state(commodity, mandi, incremental)
+        stored = previous if incremental and self.model_store is not None else None
+        previous_regime = previous.regime_state if previous is not None else None
+
+        # 1. Regime Detection, continuing the pair's last HMM fit
+        if regime_state is None:
+            regime_state = self.regime_detector.detect_regime(
+                data["price"], previous=previous_regime)
+        elif regime_state.hmm is None and previous_regime is not None:
+            # A stored snapshot: keep the HMM for the next detection
+            regime_state = replace(regime_state, hmm=previous_regime.hmm)
+
+        # 2. Feature Engineering
+        self.feature_factory = self._feature_factory(commodity)
+        stored_X = None
+        if featured is None and self.feature_store is not None and weather_df is None:
+            try:
+                featured = self.feature_store.features(
+                    data, commodity, mandi, factory=self.feature_factory)
+                stored_X = self.feature_store.load_matrix(
+                    commodity, mandi, self.feature_factory.get_feature_columns(featured))[1]
+            except Exception as e:
+                logger.warning(f"Feature store unavailable for {commodity}/{mandi}: {e}")
+        if featured is None:
+            featured = self.feature_factory.build_features(
+                data, target_col="price", weather_df=weather_df,
+            )
+        feature_cols = self.feature_factory.get_feature_columns(featured)
+        self._cached_feature_cols = feature_cols
+
+        # 3. Prepare training data (float32, shared by all folds); the
+        # store's memory-mapped matrix is already in this layout
+        matrix = _TrainingMatrix(featured[feature_cols].values if stored_X is None else stored_X,
+                                 featured["price"].values)
+        X, y = matrix.X, featured["price"].values
+
+        # 4. Warm start from the stored ensemble when nothing forces a retrain
+        retrain_reason = "full_requested"
+        if incremental and self.model_store is not None:
+            retrain_reason = self._full_retrain_reason(stored, featured, feature_cols)
+
+        skipped, dropped = None, []
+        member_history = getattr(previous, "member_history", None) or {}
+        if retrain_reason is None:
+            self.models = stored.models
+            for m in self.models:
+                m.update(matrix.container(m.library), self.warm_start_rounds)
+            # Regime shifts only re-weight the stored CV scores
+            model_scores = stored.cv_scores
+            weights = self._compute_weights(model_scores, regime_state.regime)
+        else:
+            # 5. Train models & competitive scoring
+            members, dropped = self._select_members(member_history,
+                                                    self._tuned_params(commodity))
+            if deadline is not None:
+                # Anytime fit: linear baseline first, members while time lasts
+                model_scores, skipped = self._fit_members_budgeted(
+                    matrix, deadline, members,
+                    prior=previous.weights if previous is not None else None,
+                )
+            else:
+                # CV folds and full-data fits, scheduled concurrently
+                self.models = members
+                model_scores = self._fit_members(matrix, n_splits=3)
+            weights = self._compute_weights(model_scores, regime_state.regime)
+        self._cached_weights = weights
         self._fitted = True
 
-        # 6. Recursive forecast
-        forecast_df = self._recursive_forecast(
-            data, featured, feature_cols, weights, horizon
+        return _PreparedPair(
+            commodity=commodity,
+            mandi=mandi,
+            data=data,
+            feature_factory=self.feature_factory,
+            feature_cols=feature_cols,
+            models=self.models,
+            weights=weights,
+            model_scores=model_scores,
+            regime_state=regime_state,
+            rmse=self._estimate_rmse(X, y),
+            retrain_reason=retrain_reason,
+            stored=stored,
+            skipped=skipped,
+            dropped=dropped,
+            member_history=member_history,
         )
 
+    def _finalise(self, prepared: _PreparedPair, forecast_df: pd.DataFrame,
+                  horizon: int) -> ForecastResult:
+        """Confidence bands, state persistence and result assembly for one pair."""
+        p = prepared
+        commodity, mandi = p.commodity, p.mandi
+
         # 7. Confidence interval
-        rmse_val = self._estimate_rmse(X, y)
-        forecast_df = self._add_confidence_bands(forecast_df, rmse_val, horizon)
+        forecast_df = self._add_confidence_bands(forecast_df, p.rmse, horizon)
         forecast_df["commodity"] = commodity
         forecast_df["mandi"] = mandi
 
+        # 8. Keep fitted state for the realtime path and tomorrow's warm start
+        last_date = p.data["date"].max()
+        state = FittedState(
+            models=p.models,
+            weights=p.weights,
+            feature_cols=p.feature_cols,
+            regime=p.regime_state.regime,
+            cv_scores=p.model_scores,
+            trained_until=last_date,
+            last_full_retrain=last_date if p.retrain_reason else p.stored.last_full_retrain,
+            rmse=p.rmse,
+            warm_updates=0 if p.retrain_reason else p.stored.warm_updates + 1,
+            regime_state=p.regime_state,
+            member_history=self._member_history(p),
+        )
+        self._states[(commodity, mandi)] = state
+        if self.model_store is not None:
+            try:
+                self.model_store.save(commodity, mandi, state)
+            except Exception:
+                pass
+
         return ForecastResult(
             forecast_df=forecast_df,
-            regime=regime_state,
-            model_weights=weights,
-            confidence=round(regime_state.confidence, 4),
+            regime=p.regime_state,
+            model_weights=p.weights,
+            confidence=round(p.regime_state.confidence, 4),
             metadata={
                 "horizon": horizon,
-                "training_samples": len(data),
-                "feature_count": len(feature_cols),
-                "rmse": round(rmse_val, 2),
+                "training_samples": len(p.data),
+                "feature_count": len(p.feature_cols),
+                "rmse": round(p.rmse, 2),
+                "training_mode": "warm_start" if p.retrain_reason is None else "full",
+                "retrain_reason": p.retrain_reason,
+                "members": [m.name for m in p.models],
+                "member_costs": {m.name: m.costs() for m in p.models},
+                **({"members_skipped": p.skipped} if p.skipped is not None else {}),
+                **({"members_dropped": p.dropped} if p.dropped else {}),
             },
         )
 
@@ -246,50 +906,370 @@ class RACEForecaster:
         commodity: str,
         mandi: str,
         intraday_df: Optional[pd.DataFrame] = None,
+        horizon: int = 30,
     ) -> ForecastResult:
         """
         Fast-path forecast that incorporates intraday ticks.
 
-        Uses cached models if available; otherwise falls back to
-        full ``forecast()`` call.
-        """
-        if intraday_df is not None and not intraday_df.empty:
-            # Append today's intraday TRADE ticks as synthetic daily rows
-            trades = intraday_df[intraday_df["trade_type"] == "TRADE"].copy()
-            if not trades.empty:
-                trades["timestamp"] = pd.to_datetime(trades["timestamp"])
-                latest_trade = trades.sort_values("timestamp").iloc[-1]
-                today_row = pd.DataFrame([{
-                    "date": pd.Timestamp.now().normalize(),
-                    "price": float(latest_trade["price"]),
-                    "arrival": float(trades["quantity"].sum()),
-                    "commodity": commodity,
-                    "mandi": mandi,
-                }])
-                # Append only if today isn't already in data
-                data = data.copy()
-                data["date"] = pd.to_datetime(data["date"])
-                if pd.Timestamp.now().normalize() not in data["date"].values:
-                    data = pd.concat([data, today_row], ignore_index=True)
-
-        return self.forecast(data, commodity, mandi, horizon=30)
+        Reuses the models, weights and feature layout of the last full
+        forecast for this pair (in memory, or from ``model_store``) when
+        they were trained up to the last daily row of *data*. Today's
+        TRADE ticks become a synthetic daily row and the cached ensemble
+        re-runs the recursive forecast from its compiled NumPy trees — no
+        regime detection, CV or refit. Each step computes only the new
+        row's features (``TailFeatures``), with the values the full
+        rebuild gives it, so without ticks the result equals
+        ``forecast()`` and every STL decomposition is a cache hit. A tick
+        row changes the series; its steps then use windowed STL, which
+        keeps the cached history decomposition and refits only the
+        trailing ``stl_window`` rows.
+
+        Falls back to a full ``forecast()`` on the daily history when no
+        compatible fitted state exists; the tick row is only ever used
+        for prediction, never stored in a fitted state.
+        """
+        daily = self._sorted(data)
+
+        state = self._fitted_state(commodity, mandi)
+        if state is None or len(daily) < 30 or state.trained_until != daily["date"].max():
+            # Refresh the fitted state from the daily history only, so
+            # subsequent intraday refreshes can take the fast path.
+            result = self.forecast(daily, commodity, mandi, horizon=horizon)
+            state = self._states.get((commodity, mandi))
+            if state is None or state.trained_until != daily["date"].max():
+                return result
+
+        live = daily
+        today_row = self._intraday_row(intraday_df, commodity, mandi)
+        if today_row is not None and today_row["date"].iloc[0] not in daily["date"].values:
+            live = pd.concat([daily, today_row], ignore_index=True)
+
+        factory = self._feature_factory(commodity)
+        if self._feature_columns(factory, live) != state.feature_cols:
+            # e.g. the state was trained with weather features: refit on
+            # the daily history only, so no partial day is persisted
+            result = self.forecast(daily, commodity, mandi, horizon=horizon)
+            state = self._states.get((commodity, mandi))
+            if live is daily or state is None or \
+                    self._feature_columns(factory, live) != state.feature_cols:
+                return result
+
+        # Refreshes reuse the same members many times, so the one-off
+        # export to NumPy trees pays for itself on single-row scoring.
+        for m in state.models:
+            if m.compiled is None:
+                m.compile()
+
+        if live is not daily and factory.stl_mode != "windowed":
+            factory = FeatureFactory(commodity=commodity, stl_mode="windowed",
+                                     pruned=factory.pruned)
+
+        forecast_df = self._recursive_forecast(
+            live, None, state.feature_cols, state.weights, horizon,
+            models=state.models, feature_factory=factory, incremental=True,
+        )
+        forecast_df = self._add_confidence_bands(forecast_df, state.rmse, horizon)
+        forecast_df["commodity"] = commodity
+        forecast_df["mandi"] = mandi
+
+        regime_state = state.regime_state or RegimeState(
+            regime=state.regime, confidence=0.5,
+        )
+        return ForecastResult(
+            forecast_df=forecast_df,
+            regime=regime_state,
+            model_weights=state.weights,
+            confidence=round(regime_state.confidence, 4),
+            metadata={
+                "horizon": horizon,
+                "training_samples": len(live),
+                "feature_count": len(state.feature_cols),
+                "rmse": round(state.rmse, 2),
+                "fast_path": True,
+                "trained_until": str(state.trained_until.date()),
+            },
+        )
+
+    @staticmethod
+    def _feature_columns(factory: FeatureFactory, data: pd.DataFrame) -> List[str]:
+        """Feature columns *factory* builds from *data* (from a two-row build)."""
+        return factory.get_feature_columns(factory.build_features(data.tail(2)))
+
+    def _fitted_state(self, commodity: str, mandi: str) -> Optional[FittedState]:
+        """Last fitted state for a pair: in-memory first, then the model store."""
+        state = self._states.get((commodity, mandi))
+        if state is None and self.model_store is not None:
+            state = self.model_store.load(commodity, mandi)
+            if state is not None:
+                self._states[(commodity, mandi)] = state
+        return state
+
+    @staticmethod
+    def _intraday_row(intraday_df: Optional[pd.DataFrame], commodity: str,
+                      mandi: str) -> Optional[pd.DataFrame]:
+        """Today's TRADE ticks collapsed into a synthetic daily row."""
+        if intraday_df is None or intraday_df.empty:
+            return None
+        trades = intraday_df[intraday_df["trade_type"] == "TRADE"].copy()
+        if trades.empty:
+            return None
+        trades["timestamp"] = pd.to_datetime(trades["timestamp"])
+        latest_trade = trades.sort_values("timestamp").iloc[-1]
+        return pd.DataFrame([{
+            "date": pd.Timestamp.now().normalize(),
+            "price": float(latest_trade["price"]),
+            "arrival": float(trades["quantity"].sum()),
+            "commodity": commodity,
+            "mandi": mandi,
+        }])
 
     # ----- Competitive Cross-Validation -----
 
-    def _competitive_cv(self, X: np.ndarray, y: np.ndarray,
-                        n_splits: int = 3) -> Dict[str, float]:
+    def _fit_members(self, matrix: _TrainingMatrix,
+                     n_splits: int = 3) -> Dict[str, float]:
+        """
+        Run competitive CV and the full-data fits on one thread pool.
+
+        Without early stopping the full-data fits do not depend on the CV
+        outcome, so they are submitted alongside the fold fits. With early
+        stopping they wait for CV and reuse the median best iteration.
+        Replaces ``self.models`` with the fitted full-data members and
+        returns ``{model_name: average_mape}``.
+        """
+        with ThreadPoolExecutor(max_workers=self.n_jobs) as pool:
+            full_fits = {}
+            if not self.early_stopping_rounds:
+                full_fits = self._submit_full_fits(pool, matrix)
+            model_scores, best_iters = self._competitive_cv(
+                matrix, n_splits=n_splits, executor=pool,
+            )
+            if not full_fits:
+                full_fits = self._submit_full_fits(pool, matrix, best_iters)
+            self.models = [future.result() for future in full_fits.values()]
+        return model_scores
+
+    def _tuned_params(self, commodity: str) -> Dict[str, Dict]:
+        """``member_params`` of a commodity; {} when unset or unreadable."""
+        if self.member_params is None:
+            return {}
+        try:
+            return self.member_params(commodity) or {}
+        except Exception as e:
+            logger.warning(f"Tuned parameters unavailable for {commodity}: {e}")
+            return {}
+
+    def _pruned(self, commodity: str) -> frozenset:
+        """``pruned_features`` of a commodity; empty when unset or unreadable."""
+        if self.pruned_features is None:
+            return frozenset()
+        try:
+            return frozenset(self.pruned_features(commodity) or ())
+        except Exception as e:
+            logger.warning(f"Pruned feature list unavailable for {commodity}: {e}")
+            return frozenset()
+
+    def _feature_factory(self, commodity: str) -> FeatureFactory:
+        """FeatureFactory of a commodity, without its pruned columns."""
+        return FeatureFactory(commodity=commodity, stl_mode=self.stl_mode,
+                              pruned=self._pruned(commodity))
+
+    def _create_member(self, name: str, params: Optional[Dict] = None) -> _BaseModel:
+        """Registry member with this forecaster's threading / early stopping."""
+        params = dict(params or {})
+        kwargs = {"n_estimators": int(params.pop("n_estimators"))} \
+            if "n_estimators" in params else {}
+        return create_member(name, early_stopping_rounds=self.early_stopping_rounds,
+                             n_threads=self.n_threads, params=params, **kwargs)
+
+    def _select_members(self, history: Dict[str, Dict],
+                        params: Optional[Dict[str, Dict]] = None
+                        ) -> Tuple[List[_BaseModel], List[str]]:
+        """
+        Fresh members for a full fit, built from the registry with
+        *params* ({name: params}, see ``member_params``).
+
+        Returns ``(members, dropped names)``: members whose weight stayed
+        negligible in the pair's recent full fits (*history*, see
+        ``_member_history``) are dropped until they have sat out
+        ``negligible_runs`` fits. At least one available member is kept.
+        """
+        members, dropped = [], []
+        for name in self.members:
+            member = self._create_member(name, (params or {}).get(name))
+            # Filter out models that couldn't import
+            if not member.available:
+                continue
+            record = history.get(name, {})
+            recent = record.get("weights", [])[-self.negligible_runs:]
+            if (len(recent) == self.negligible_runs
+                    and max(recent) < self.negligible_weight
+                    and record.get("sat_out", 0) < self.negligible_runs):
+                dropped.append(name)
+                continue
+            members.append(member)
+        if not members and dropped:
+            name = dropped.pop(0)
+            members = [self._create_member(name, (params or {}).get(name))]
+        return members, dropped
+
+    def _member_history(self, p: _PreparedPair) -> Dict[str, Dict]:
+        """
+        Per-member record carried in the pair's FittedState: the weights
+        of its last ``negligible_runs`` full fits, full fits sat out
+        since, and the latest fit / predict cost.
+        """
+        history = {name: dict(record) for name, record in p.member_history.items()}
+        if p.retrain_reason is None:
+            return history
+        for m in p.models:
+            record = history.setdefault(m.name, {})
+            weights = record.get("weights", []) + [float(p.weights.get(m.name, 0.0))]
+            record.update(weights=weights[-self.negligible_runs:], sat_out=0, **m.costs())
+        for name in p.dropped:
+            record = history.setdefault(name, {})
+            record["sat_out"] = record.get("sat_out", 0) + 1
+        return history
+
+    def _fit_members_budgeted(self, matrix: _TrainingMatrix, deadline: float,
+                              members: List[_BaseModel],
+                              prior: Optional[Dict[str, float]] = None,
+                              n_splits: int = 3) -> Tuple[Dict[str, float], List[str]]:
+        """
+        Anytime variant of ``_fit_members``.
+
+        The linear baseline is cross-validated and fitted first, on the
+        calling thread, so there is always a result. The CV folds and
+        full-data fit of every other member in *members* are then queued
+        on the pool in order of expected value — the member's weight in *prior*
+        (the pair's last ensemble), else the default member order. At
+        *deadline* (``time.perf_counter`` value) members with all their
+        fits done join the ensemble; the rest are dropped, their queued
+        fits cancelled and running ones stopped after the current
+        boosting round, so nothing keeps competing for the CPU.
+        Full-data fits run alongside CV, so early stopping only affects
+        the CV scores here.
+
+        Sets ``self.models`` and returns ``({name: average_mape},
+        [skipped member names])``.
+        """
+        prior = prior or {}
+        baseline = create_member(_LinearModel.name)
+        # Stable sort: unseen members keep the default order
+        boosters = sorted((m for m in members if m.name != baseline.name),
+                          key=lambda m: -prior.get(m.name, 0.0))
+
+        baseline_jobs = self._cv_jobs(matrix, [baseline], n_splits)
+        model_scores, _ = self._score_cv(
+            matrix, [baseline], baseline_jobs,
+            [self._fit_one(m.spawn(), train, valid) if train is not None else None
+             for m, train, valid, _ in baseline_jobs or ()],
+        )
+        fitted = {baseline.name: self._fit_one(baseline.spawn(), matrix.container(baseline.library))}
+
+        stop = threading.Event()
+        pool = ThreadPoolExecutor(max_workers=self.n_jobs)
+        try:
+            queued = []
+            for m in boosters:
+                jobs = self._cv_jobs(matrix, [m], n_splits)
+                cv_futures = [pool.submit(self._fit_one, m.spawn(), train, valid, stop)
+                              if train is not None else None
+                              for _, train, valid, _ in jobs or ()]
+                full = pool.submit(self._fit_one, m.spawn(),
+                                   matrix.container(m.library), None, stop)
+                queued.append((m, jobs, cv_futures, full))
+
+            pending = [f for _, _, cv, full in queued for f in cv + [full] if f is not None]
+            wait(pending, timeout=max(0.0, deadline - time.perf_counter()))
+            finished = [all(f.done() for f in cv + [full] if f is not None)
+                        for _, _, cv, full in queued]
+            stop.set()
+
+            skipped = []
+            for (m, jobs, cv_futures, full), done in zip(queued, finished):
+                if not done:
+                    skipped.append(m.name)
+                    continue
+                try:
+                    fitted[m.name] = full.result()
+                except Exception as e:
+                    logger.warning(f"{m.name} fit failed: {e}")
+                    skipped.append(m.name)
+                    continue
+                scores, _ = self._score_cv(matrix, [m], jobs, cv_futures)
+                model_scores.update(scores)
+        finally:
+            stop.set()
+            pool.shutdown(wait=True, cancel_futures=True)
+
+        self.models = list(fitted.values())
+        return {name: model_scores[name] for name in fitted}, skipped
+
+    def _submit_full_fits(self, pool: ThreadPoolExecutor,
+                          matrix: _TrainingMatrix,
+                          best_iters: Optional[Dict[str, list]] = None) -> Dict:
+        """Submit one full-data fit per member; returns {name: future}."""
+        futures = {}
+        for m in self.models:
+            n_estimators = None
+            if best_iters and best_iters.get(m.name):
+                n_estimators = int(np.median(best_iters[m.name])) + 1
+            train = matrix.container(m.library)
+            futures[m.name] = pool.submit(
+                self._fit_one, m.spawn(n_estimators=n_estimators), train,
+            )
+        return futures
+
+    @staticmethod
+    def _fit_one(member: _BaseModel, train, valid=None,
+                 stop: Optional[threading.Event] = None) -> _BaseModel:
+        member.stop = stop
+        start = time.perf_counter()
+        try:
+            member.fit(train, valid)
+        finally:
+            member.stop = None
+            member.fit_seconds = time.perf_counter() - start
+        return member
+
+    def _competitive_cv(self, matrix: _TrainingMatrix, n_splits: int = 3,
+                        executor: Optional[ThreadPoolExecutor] = None):
         """
         Expanding-window time-series CV.
-        Returns {model_name: average_mape} dict.
+
+        Every (fold, model) fit is independent and runs on *executor*
+        (a private pool sized by ``n_jobs`` if not given). Fold containers
+        are sliced from the shared matrix on the calling thread.
+
+        Returns ``({model_name: average_mape}, {model_name: [best_iteration, ...]})``.
+        """
+        jobs = self._cv_jobs(matrix, self.models, n_splits)
+        own_pool = executor is None
+        pool = executor or ThreadPoolExecutor(max_workers=self.n_jobs)
+        try:
+            futures = [
+                pool.submit(self._fit_one, m.spawn(), train, valid)
+                if train is not None else None
+                for m, train, valid, _ in jobs or ()
+            ]
+            return self._score_cv(matrix, self.models, jobs, futures)
+        finally:
+            if own_pool:
+                pool.shutdown()
+
+    def _cv_jobs(self, matrix: _TrainingMatrix, members: List[_BaseModel],
+                 n_splits: int = 3) -> Optional[list]:
+        """
+        ``(member, train, valid, val_rows)`` per expanding-window fold and
+        member, containers sliced on the calling thread; None when the
+        matrix is too short for CV.
         """
-        n = len(X)
+        n = len(matrix)
         if n < 40:
-            # Not enough for CV — return equal scores
-            return {m.name: 5.0 for m in self.models}
+            return None
 
         fold_size = max(5, n // (n_splits + 1))
-        scores: Dict[str, list] = {m.name: [] for m in self.models}
-
+        jobs = []
         for fold in range(n_splits):
             train_end = n - (n_splits - fold) * fold_size
             val_start = train_end
@@ -298,20 +1278,75 @@ class RACEForecaster:
             if train_end < 30 or val_start >= n:
                 continue
 
-            X_train, y_train = X[:train_end], y[:train_end]
-            X_val, y_val = X[val_start:val_end], y[val_start:val_end]
-
-            for m in self.models:
+            train_rows = np.arange(train_end)
+            val_rows = np.arange(val_start, val_end)
+            for m in members:
                 try:
-                    m.fit(X_train, y_train)
-                    preds = m.predict(X_val)
-                    mape = np.mean(np.abs((y_val - preds) / (y_val + 1e-9))) * 100
-                    scores[m.name].append(mape)
+                    train = matrix.container(m.library, train_rows)
+                    valid = matrix.container(m.library, val_rows) \
+                        if self.early_stopping_rounds else None
                 except Exception:
-                    scores[m.name].append(10.0)  # penalty
+                    train = valid = None
+                jobs.append((m, train, valid, val_rows))
+        return jobs
+
+    @staticmethod
+    def _score_cv(matrix: _TrainingMatrix, members: List[_BaseModel],
+                  jobs: Optional[list], fits: list):
+        """
+        Validation MAPE of each fold fit in *fits* (futures or fitted
+        members, aligned with *jobs*); see ``_competitive_cv``.
+        """
+        if jobs is None:
+            # Not enough for CV — return equal scores
+            return {m.name: 5.0 for m in members}, {}
 
-        return {name: np.mean(vals) if vals else 10.0
-                for name, vals in scores.items()}
+        scores: Dict[str, list] = {m.name: [] for m in members}
+        best_iters: Dict[str, list] = {m.name: [] for m in members}
+        for (m, _, _, val_rows), fit in zip(jobs, fits):
+            try:
+                if fit is None:
+                    raise ValueError(f"no training container for {m.name}")
+                fitted = fit.result() if isinstance(fit, Future) else fit
+                preds = fitted.predict(matrix.X[val_rows])
+                y_val = matrix.y[val_rows].astype(np.float64)
+                mape = np.mean(np.abs((y_val - preds) / (y_val + 1e-9))) * 100
+                scores[m.name].append(mape)
+                if fitted.best_iteration is not None:
+                    best_iters[m.name].append(fitted.best_iteration)
+            except Exception:
+                scores[m.name].append(10.0)  # penalty
+
+        return ({name: np.mean(vals) if vals else 10.0
+                 for name, vals in scores.items()}, best_iters)
+
+    def _full_retrain_reason(self, stored: Optional[FittedState],
+                             featured: pd.DataFrame,
+                             feature_cols: List[str]) -> Optional[str]:
+        """Why the stored ensemble cannot be warm-started (None if it can)."""
+        if stored is None:
+            return "no_stored_state"
+        if stored.feature_cols != feature_cols:
+            return "feature_layout_changed"
+        last_date = featured["date"].max()
+        if last_date < stored.trained_until:
+            return "history_rewound"
+        if (last_date - stored.last_full_retrain).days >= self.full_retrain_days:
+            return "scheduled"
+
+        new_rows = (featured["date"] > stored.trained_until).values
+        if new_rows.any():
+            X_new = featured.loc[new_rows, feature_cols].values
+            y_new = featured.loc[new_rows, "price"].values
+            preds = np.zeros(len(X_new))
+            for m in stored.models:
+                preds += stored.weights.get(m.name, 0) * m.predict(X_new)
+            new_mape = np.mean(np.abs((y_new - preds) / (y_new + 1e-9))) * 100
+            cv_mape = sum(stored.weights.get(k, 0) * v
+                          for k, v in stored.cv_scores.items())
+            if new_mape > self.drift_tolerance * max(cv_mape, 1.0):
+                return "drift"
+        return None
 
     def _compute_weights(self, model_scores: Dict[str, float],
                          regime: str) -> Dict[str, float]:
@@ -322,12 +1357,15 @@ class RACEForecaster:
         inv_scores = {k: 1.0 / (v + 1e-6) for k, v in model_scores.items()}
 
         # Regime bonuses: in VOLATILE/CRISIS, boost CatBoost (better at tail risks)
+        bonus = {}
         if regime == "CRISIS":
-            inv_scores["CatBoost"] = inv_scores.get("CatBoost", 0) * 1.4
-            inv_scores["XGBoost"] = inv_scores.get("XGBoost", 0) * 0.9
+            bonus = {"CatBoost": 1.4, "XGBoost": 0.9}
         elif regime == "VOLATILE":
-            inv_scores["CatBoost"] = inv_scores.get("CatBoost", 0) * 1.2
-            inv_scores["LightGBM"] = inv_scores.get("LightGBM", 0) * 1.1
+            bonus = {"CatBoost": 1.2, "LightGBM": 1.1}
+        # Only members that were fitted (a budgeted fit may lack some)
+        for name, factor in bonus.items():
+            if name in inv_scores:
+                inv_scores[name] *= factor
 
         total = sum(inv_scores.values())
         return {k: round(v / total, 4) for k, v in inv_scores.items()} if total > 0 \
@@ -342,51 +1380,108 @@ class RACEForecaster:
         feature_cols: List[str],
         weights: Dict[str, float],
         horizon: int,
+        models: Optional[List[_BaseModel]] = None,
+        feature_factory: Optional[FeatureFactory] = None,
+        incremental: bool = False,
     ) -> pd.DataFrame:
-        """Generate *horizon*-day forecast using recursive prediction."""
-        current_data = original_data.copy()
-        last_date = current_data["date"].max()
-        future_dates = []
-        forecast_prices = []
+        """
+        Generate *horizon*-day forecast using recursive prediction.
 
-        for i in range(1, horizon + 1):
-            next_date = last_date + timedelta(days=i)
+        *models* / *feature_factory* default to the ones from the last
+        ``forecast()`` call; *incremental* computes only each new row's
+        features (see ``_recursive_forecast_batch``).
+        """
+        job = _RecursionJob(
+            data=original_data,
+            feature_factory=feature_factory or self.feature_factory,
+            feature_cols=feature_cols,
+            weights=weights,
+            models=models if models is not None else self.models,
+            incremental=incremental,
+        )
+        return self._recursive_forecast_batch([job], horizon)[0]
 
-            # Build a temporary row and re-engineer features
-            next_row = pd.DataFrame([{
-                "date": next_date,
-                "price": current_data["price"].iloc[-1],  # placeholder
-                "arrival": current_data["arrival"].iloc[-1] if "arrival" in current_data.columns else 200,
-                "commodity": current_data.get("commodity", pd.Series(["Unknown"])).iloc[-1],
-                "mandi": current_data.get("mandi", pd.Series(["Unknown"])).iloc[-1],
-            }])
+    @staticmethod
+    def _recursive_forecast_batch(jobs: List[_RecursionJob],
+                                  horizon: int) -> List[pd.DataFrame]:
+        """
+        Advance the recursive forecasts of all *jobs* in lockstep.
 
-            temp_df = pd.concat([current_data, next_row], ignore_index=True)
-            temp_features = self.feature_factory.build_features(temp_df, target_col="price")
+        At every step each series gets its placeholder row and feature
+        rebuild; the feature rows are then stacked per ensemble member and
+        each distinct member scores all series it serves in one
+        ``predict`` call, so the number of predict calls per step is the
+        number of distinct members rather than members x series.
 
-            X_pred = temp_features[feature_cols].iloc[[-1]].values
+        An ``incremental`` job computes only its placeholder row's
+        features (``TailFeatures``); the values are the ones the rebuild
+        gives that row.
+        """
+        current = [
+            TailFeatures(job.feature_factory, job.data, capacity=horizon)
+            if job.incremental else job.data.copy()
+            for job in jobs
+        ]
+        last_dates = [job.data["date"].max() for job in jobs]
+        preds = np.zeros((len(jobs), horizon))
 
-            # Weighted ensemble prediction
-            pred_price = 0.0
-            for m in self.models:
-                w = weights.get(m.name, 0)
+        for i in range(1, horizon + 1):
+            next_rows = []
+            # id(member) -> (member, job indices, feature rows)
+            groups: Dict[int, tuple] = {}
+            for j, job in enumerate(jobs):
+                cur = current[j]
+                if job.incremental:
+                    arrival = cur.arrival
+                    cur.append(last_dates[j] + timedelta(days=i), cur.price,
+                               200 if arrival is None else arrival)
+                    next_rows.append(None)
+                    x_pred = cur.row(job.feature_cols)
+                else:
+                    # Build a temporary row and re-engineer features
+                    next_row = pd.DataFrame([{
+                        "date": last_dates[j] + timedelta(days=i),
+                        "price": cur["price"].iloc[-1],  # placeholder
+                        "arrival": cur["arrival"].iloc[-1] if "arrival" in cur.columns else 200,
+                        "commodity": cur.get("commodity", pd.Series(["Unknown"])).iloc[-1],
+                        "mandi": cur.get("mandi", pd.Series(["Unknown"])).iloc[-1],
+                    }])
+                    next_rows.append(next_row)
+
+                    temp_df = pd.concat([cur, next_row], ignore_index=True)
+                    temp_features = job.feature_factory.build_features(temp_df, target_col="price")
+                    x_pred = temp_features[job.feature_cols].values[-1]
+                for m in job.models:
+                    member, idx, rows = groups.setdefault(id(m), (m, [], []))
+                    idx.append(j)
+                    rows.append(x_pred)
+
+            # Weighted ensemble prediction, one call per distinct member
+            step = np.zeros(len(jobs))
+            for member, idx, rows in groups.values():
                 try:
-                    p = m.predict(X_pred)[0]
-                    pred_price += w * p
+                    p = member.predict(np.vstack(rows))
                 except Exception:
-                    pass
-
-            future_dates.append(next_date)
-            forecast_prices.append(round(pred_price, 2))
+                    continue
+                for j, pj in zip(idx, p):
+                    step[j] += jobs[j].weights.get(member.name, 0) * pj
 
             # Update loop data for recursion
-            next_row["price"] = pred_price
-            current_data = pd.concat([current_data, next_row], ignore_index=True)
-
-        return pd.DataFrame({
-            "date": future_dates,
-            "forecast_price": forecast_prices,
-        })
+            for j, next_row in enumerate(next_rows):
+                preds[j, i - 1] = step[j]
+                if next_row is None:
+                    current[j].price = step[j]
+                    continue
+                next_row["price"] = step[j]
+                current[j] = pd.concat([current[j], next_row], ignore_index=True)
+
+        return [
+            pd.DataFrame({
+                "date": [last_dates[j] + timedelta(days=i) for i in range(1, horizon + 1)],
+                "forecast_price": [round(float(p), 2) for p in preds[j]],
+            })
+            for j in range(len(jobs))
+        ]
 
     # ----- Helpers -----
 
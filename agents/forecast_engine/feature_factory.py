@@ -10,16 +10,51 @@ Features:
 - Lag features: 1d, 3d, 7d, 14d, 30d + rolling stats
 - Seasonal decomposition components (STL)
 - Domain-specific: festival_proximity, days_since_last_shock
+
+Indicator arithmetic runs on NumPy arrays through the shared
+``indicators`` kernels. ``build_features_panel`` builds the same features
+for many series of a long (commodity, mandi, date) frame in one pass.
+
+STL decompositions are cached by a hash of the series values. The fit
+itself is selected by ``stl_mode`` (or ``AGRIINTEL_STL_MODE``):
+    robust   — robust STL over the whole series (default)
+    fast     — non-robust STL over the whole series
+    windowed — robust STL over the whole series on first sight; a series
+               that extends a cached one (windowed, or robust: the same
+               first fit) only refits (non-robust) its trailing
+               ``stl_window`` rows and keeps the cached earlier rows
+
+``TailFeatures`` gives the newest row of a series growing one day at a
+time (the recursive forecast) from NumPy arrays, without rebuilding the
+frame.
+
+A factory built with ``pruned`` columns (see ``feature_selection``)
+neither computes nor returns them, where a feature can be skipped on its
+own; ``get_feature_columns`` never lists them.
 """
 
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
 import numpy as np
 import pandas as pd
-from typing import List, Optional
+from typing import Collection, Dict, Iterable, List, Optional, Sequence, Tuple
 import warnings
 
+from . import indicators
+
 warnings.filterwarnings("ignore")
 
 
+# Version of the feature definitions below; bump whenever a feature is
+# added, removed or changed so persisted feature matrices are rebuilt.
+FEATURE_SET_VERSION = "1"
+
+STL_MODES = ("robust", "fast", "windowed")
+DEFAULT_STL_MODE = os.environ.get("AGRIINTEL_STL_MODE", "robust")
+
 # Indian agricultural harvest calendar (approximate months)
 HARVEST_CALENDAR = {
     "Onion": [11, 12, 1, 2, 3],        # Rabi harvest
@@ -37,6 +72,8 @@ HARVEST_CALENDAR = {
 # Indian festivals that affect agri markets (approximate month-day ranges)
 FESTIVAL_MONTHS = [1, 3, 8, 10, 11]  # Makar Sankranti, Holi, Independence, Navratri, Diwali
 
+STL_COLUMNS = ("stl_trend", "stl_seasonal", "stl_residual")
+
 
 class FeatureFactory:
     """
@@ -46,8 +83,25 @@ class FeatureFactory:
     competitive scoring.
     """
 
-    def __init__(self, commodity: str = "General"):
+    def __init__(self, commodity: str = "General", stl_mode: Optional[str] = None,
+                 stl_window: int = 120, pruned: Optional[Iterable[str]] = None):
+        """
+        Parameters
+        ----------
+        commodity : drives the harvest-season flag.
+        stl_mode : "robust", "fast" or "windowed" (see module docstring);
+            defaults to ``AGRIINTEL_STL_MODE`` or "robust".
+        stl_window : trailing rows refitted in "windowed" mode
+            (at least two 30-day periods).
+        pruned : feature columns to leave out, e.g. the per-commodity
+            list stored by ``feature_selection``.
+        """
         self.commodity = commodity
+        self.stl_mode = stl_mode or DEFAULT_STL_MODE
+        if self.stl_mode not in STL_MODES:
+            raise ValueError(f"stl_mode must be one of {STL_MODES}, got {self.stl_mode!r}")
+        self.stl_window = max(stl_window, 60)
+        self.pruned = frozenset(pruned or ())
 
     def build_features(
         self,
@@ -90,39 +144,9 @@ class FeatureFactory:
         # Festival proximity
         out["festival_proximity"] = out["month"].isin(FESTIVAL_MONTHS).astype(int)
 
-        # --- Lag features ---
-        for lag in [1, 3, 7, 14, 30]:
-            out[f"lag_{lag}"] = out[target_col].shift(lag)
-
-        # --- Rolling statistics ---
-        for window in [7, 14, 30]:
-            out[f"roll_mean_{window}"] = out[target_col].rolling(window).mean()
-            out[f"roll_std_{window}"] = out[target_col].rolling(window).std()
-            out[f"roll_skew_{window}"] = out[target_col].rolling(window).skew()
-
-        # --- Technical indicators ---
-        self._add_rsi(out, target_col)
-        self._add_macd(out, target_col)
-        self._add_bollinger(out, target_col)
-        self._add_atr(out, target_col)
-
-        # --- Price velocity ---
-        out["price_velocity_7"] = out[target_col].pct_change(7)
-        out["price_velocity_14"] = out[target_col].pct_change(14)
-
-        # --- Arrival features (if present) ---
-        if "arrival" in out.columns:
-            out["arrival_lag_1"] = out["arrival"].shift(1)
-            out["arrival_roll_7"] = out["arrival"].rolling(7).mean()
-            out["arrival_zscore"] = (
-                (out["arrival"] - out["arrival"].rolling(30).mean())
-                / (out["arrival"].rolling(30).std() + 1e-9)
-            )
-
-        # --- Price spread (if min/max present) ---
-        if "price_min" in out.columns and "price_max" in out.columns:
-            out["price_spread"] = out["price_max"] - out["price_min"]
-            out["spread_pct"] = out["price_spread"] / (out[target_col] + 1e-9)
+        # --- Lag / rolling / technical / velocity / arrival / spread ---
+        out = self._assign(out, self._series_features(*self._series_arrays(out, target_col),
+                                                      skip=self.pruned))
 
         # --- Weather features (if provided) ---
         if weather_df is not None and not weather_df.empty:
@@ -136,91 +160,439 @@ class FeatureFactory:
             out["temp_lag_1"] = out["temperature"].shift(1).fillna(25)
 
         # --- STL seasonal decomposition ---
-        self._add_stl(out, target_col)
+        if not self.pruned.issuperset(STL_COLUMNS):
+            self._add_stl(out, target_col)
 
         # --- Days since last shock ---
-        self._add_shock_distance(out, target_col)
+        if "days_since_shock" not in self.pruned:
+            out["days_since_shock"] = indicators.days_since_shock(
+                out[target_col].to_numpy(dtype=np.float64))
 
         # Fill NaN from lag/rolling operations
+        out = out.drop(columns=[c for c in self.pruned if c in out.columns])
         out = out.bfill().fillna(0)
 
         return out
 
+    def build_features_panel(
+        self,
+        panel: pd.DataFrame,
+        target_col: str = "price",
+        weather_df: Optional[pd.DataFrame] = None,
+        keys: Sequence[str] = ("commodity", "mandi"),
+    ) -> pd.DataFrame:
+        """
+        Build features for a long DataFrame of many series in one pass.
+
+        Every lag / rolling / EWM / RSI / Bollinger / ATR / velocity /
+        arrival / shock-distance feature is computed by the ``indicators``
+        kernels over all series at once, laid out as the columns of one
+        NaN-padded matrix; only STL is still fitted per series. The harvest flag uses each row's ``commodity``.
+
+        Parameters
+        ----------
+        panel : pd.DataFrame
+            Columns of ``build_features`` plus the *keys* identifying
+            each series (e.g. commodity, mandi).
+        target_col, weather_df : as in ``build_features``; the weather
+            frame is shared by all series.
+        keys : columns identifying a series.
+
+        Returns
+        -------
+        pd.DataFrame
+            Sorted by *keys* then date. The rows of each series equal
+            ``FeatureFactory(commodity).build_features(series)``.
+        """
+        keys = list(keys)
+        out = panel.copy()
+        out["date"] = pd.to_datetime(out["date"])
+        out = out.sort_values(keys + ["date"]).reset_index(drop=True)
+        groups = out.groupby(keys, sort=False, dropna=False).ngroup().to_numpy()
+
+        def by_series(series: pd.Series):
+            return series.groupby(groups, sort=False)
+
+        # --- Temporal ---
+        out["day_of_week"] = out["date"].dt.dayofweek
+        out["month"] = out["date"].dt.month
+        out["quarter"] = out["date"].dt.quarter
+        out["day_of_year"] = out["date"].dt.dayofyear
+
+        # Harvest season flag (per row commodity)
+        commodity = out["commodity"] if "commodity" in out.columns else \
+            pd.Series(self.commodity, index=out.index)
+        is_harvest = np.zeros(len(out), dtype=bool)
+        for name, months in HARVEST_CALENDAR.items():
+            is_harvest |= ((commodity == name) & out["month"].isin(months)).to_numpy()
+        out["is_harvest"] = is_harvest.astype(int)
+
+        # Festival proximity
+        out["festival_proximity"] = out["month"].isin(FESTIVAL_MONTHS).astype(int)
+
+        # --- Lag / rolling / technical / velocity / arrival / spread ---
+        # Series become the columns of one NaN-padded matrix
+        position = by_series(out[target_col]).cumcount().to_numpy()
+        arrays = self._series_arrays(out, target_col)
+        padded = [None if a is None else _to_columns(a, groups, position) for a in arrays]
+        features = self._series_features(*padded, skip=self.pruned)
+        out = self._assign(out, {name: values[position, groups]
+                                 for name, values in features.items()})
+
+        # --- Weather features (if provided) ---
+        if weather_df is not None and not weather_df.empty:
+            weather_df = weather_df.copy()
+            weather_df["date"] = pd.to_datetime(weather_df["date"])
+            out["_series"] = groups
+            out = pd.merge(out, weather_df[["date", "temperature", "rainfall"]],
+                           on="date", how="left")
+            groups = out.pop("_series").to_numpy()
+            out["temperature"] = by_series(out["temperature"]).ffill().fillna(25.0)
+            out["rainfall"] = out["rainfall"].fillna(0.0)
+            out["rain_lag_1"] = by_series(out["rainfall"]).shift(1).fillna(0)
+            out["temp_lag_1"] = by_series(out["temperature"]).shift(1).fillna(25)
+
+        # --- STL seasonal decomposition (per series) ---
+        self._add_stl_panel(out, target_col, groups)
+
+        # --- Days since last shock ---
+        position = by_series(out[target_col]).cumcount().to_numpy()
+        price = _to_columns(out[target_col].to_numpy(dtype=np.float64), groups, position)
+        out["days_since_shock"] = indicators.days_since_shock(price)[position, groups]
+
+        # Fill NaN from lag/rolling operations, within each series
+        out = out.drop(columns=[c for c in self.pruned if c in out.columns])
+        out = out.groupby(groups, sort=False).bfill().fillna(0)
+
+        return out
+
     def get_feature_columns(self, df: pd.DataFrame) -> List[str]:
-        """Return list of feature column names (excludes date, target, identifiers)."""
+        """Return list of feature column names (excludes date, target, identifiers, pruned)."""
         exclude = {
             "date", "price", "price_modal", "price_min", "price_max",
             "arrival", "commodity", "mandi", "unit", "id",
             "date_ordinal", "trend", "resid",
             "temperature", "rainfall",  # raw weather kept separately
         }
-        return [c for c in df.columns if c not in exclude and df[c].dtype in [np.float64, np.int64, np.float32, np.int32, float, int]]
+        return [c for c in df.columns if c not in exclude and c not in self.pruned
+                and df[c].dtype in [np.float64, np.int64, np.float32, np.int32, float, int]]
 
     # ------------------------------------------------------------------
     # Private helpers
     # ------------------------------------------------------------------
 
     @staticmethod
-    def _add_rsi(df: pd.DataFrame, col: str, period: int = 14):
-        delta = df[col].diff()
-        gain = delta.where(delta > 0, 0).rolling(period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(period).mean()
-        rs = gain / (loss + 1e-9)
-        df["rsi"] = 100 - (100 / (1 + rs))
+    def _series_arrays(df: pd.DataFrame, col: str):
+        """(price, arrival, price_min, price_max) float arrays; absent columns are None."""
+        def column(name):
+            return df[name].to_numpy(dtype=np.float64) if name in df.columns else None
 
-    @staticmethod
-    def _add_macd(df: pd.DataFrame, col: str):
-        exp12 = df[col].ewm(span=12, adjust=False).mean()
-        exp26 = df[col].ewm(span=26, adjust=False).mean()
-        df["macd"] = exp12 - exp26
-        df["macd_signal"] = df["macd"].ewm(span=9, adjust=False).mean()
-        df["macd_hist"] = df["macd"] - df["macd_signal"]
+        spread = "price_min" in df.columns and "price_max" in df.columns
+        return (column(col), column("arrival"),
+                column("price_min") if spread else None,
+                column("price_max") if spread else None)
 
     @staticmethod
-    def _add_bollinger(df: pd.DataFrame, col: str, period: int = 20):
-        mid = df[col].rolling(period).mean()
-        std = df[col].rolling(period).std()
-        df["bb_upper"] = mid + 2 * std
-        df["bb_lower"] = mid - 2 * std
-        df["bb_width"] = (df["bb_upper"] - df["bb_lower"]) / (mid + 1e-9)
-        df["bb_position"] = (df[col] - df["bb_lower"]) / (df["bb_upper"] - df["bb_lower"] + 1e-9)
+    def _series_features(price: np.ndarray, arrival: Optional[np.ndarray] = None,
+                         price_min: Optional[np.ndarray] = None,
+                         price_max: Optional[np.ndarray] = None,
+                         skip: Collection[str] = ()) -> Dict[str, np.ndarray]:
+        """
+        Lag, rolling, technical, velocity, arrival and spread features of
+        one series (1-D arrays) or many (2-D, one series per column).
+        Features named in *skip* are left out, and not computed unless
+        another feature needs them.
+        """
+        def wanted(*names):
+            return any(name not in skip for name in names)
 
-    @staticmethod
-    def _add_atr(df: pd.DataFrame, col: str, period: int = 14):
-        """Average True Range (proxy — using single-price series)."""
-        high_low = df[col].rolling(2).max() - df[col].rolling(2).min()
-        df["atr"] = high_low.rolling(period).mean()
+        features = {}
+        for lag in [1, 3, 7, 14, 30]:
+            if wanted(f"lag_{lag}"):
+                features[f"lag_{lag}"] = indicators.lag(price, lag)
+
+        for window in [7, 14, 30]:
+            if wanted(f"roll_mean_{window}"):
+                features[f"roll_mean_{window}"] = indicators.rolling_mean(price, window)
+            if wanted(f"roll_std_{window}"):
+                features[f"roll_std_{window}"] = indicators.rolling_std(price, window)
+            if wanted(f"roll_skew_{window}"):
+                features[f"roll_skew_{window}"] = indicators.rolling_skew(price, window)
+
+        if wanted("rsi"):
+            features["rsi"] = indicators.rsi(price, 14)
+        if wanted("macd", "macd_signal", "macd_hist"):
+            features["macd"], features["macd_signal"], features["macd_hist"] = \
+                indicators.macd(price)
+
+        if wanted("bb_upper", "bb_lower", "bb_width", "bb_position"):
+            bands = indicators.bollinger(price, 20)
+            features["bb_upper"] = bands.upper
+            features["bb_lower"] = bands.lower
+            features["bb_width"] = (bands.upper - bands.lower) / (bands.mid + 1e-9)
+            features["bb_position"] = (price - bands.lower) / (bands.upper - bands.lower + 1e-9)
+
+        # Average True Range (proxy — using single-price series)
+        if wanted("atr"):
+            features["atr"] = indicators.atr(price, 14)
+
+        if wanted("price_velocity_7"):
+            features["price_velocity_7"] = indicators.pct_change(price, 7)
+        if wanted("price_velocity_14"):
+            features["price_velocity_14"] = indicators.pct_change(price, 14)
+
+        if arrival is not None:
+            if wanted("arrival_lag_1"):
+                features["arrival_lag_1"] = indicators.lag(arrival, 1)
+            if wanted("arrival_roll_7"):
+                features["arrival_roll_7"] = indicators.rolling_mean(arrival, 7)
+            if wanted("arrival_zscore"):
+                features["arrival_zscore"] = (
+                    (arrival - indicators.rolling_mean(arrival, 30))
+                    / (indicators.rolling_std(arrival, 30) + 1e-9)
+                )
+
+        if price_min is not None and price_max is not None and \
+                wanted("price_spread", "spread_pct"):
+            features["price_spread"] = price_max - price_min
+            features["spread_pct"] = features["price_spread"] / (price + 1e-9)
+        if skip:
+            features = {name: values for name, values in features.items() if name not in skip}
+        return features
 
     @staticmethod
-    def _add_stl(df: pd.DataFrame, col: str):
+    def _assign(df: pd.DataFrame, features: Dict[str, np.ndarray]) -> pd.DataFrame:
+        """Set (or overwrite) many columns in one block."""
+        new = pd.DataFrame(features, index=df.index)
+        return pd.concat([df.drop(columns=[c for c in new.columns if c in df.columns]), new],
+                         axis=1)
+
+    def _add_stl(self, df: pd.DataFrame, col: str):
         """Seasonal-Trend decomposition using LOESS (STL)."""
         try:
-            from statsmodels.tsa.seasonal import STL
             if len(df) >= 60:
-                stl = STL(df[col].values, period=30, robust=True)
-                result = stl.fit()
-                df["stl_trend"] = result.trend
-                df["stl_seasonal"] = result.seasonal
-                df["stl_residual"] = result.resid
+                trend, seasonal, resid = self._stl_components(
+                    df[col].to_numpy(dtype=np.float64))
+                df["stl_trend"] = trend
+                df["stl_seasonal"] = seasonal
+                df["stl_residual"] = resid
                 return
         except Exception:
             pass
         # Fallback
-        df["stl_trend"] = df[col].rolling(30, min_periods=1).mean()
+        df["stl_trend"] = indicators.rolling_mean(df[col].to_numpy(dtype=np.float64),
+                                                  30, min_periods=1)
+        df["stl_seasonal"] = df[col] - df["stl_trend"]
+        df["stl_residual"] = 0.0
+
+    def _stl_components(self, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(trend, seasonal, resid) of *values*, served from the STL cache if possible."""
+        from statsmodels.tsa.seasonal import STL
+
+        key = _STL_CACHE.key(values, self.stl_mode)
+        cached = _STL_CACHE.get(key)
+        if cached is not None:
+            return cached
+
+        start, prefix = 0, None
+        if self.stl_mode == "windowed" and len(values) > self.stl_window:
+            start = len(values) - self.stl_window
+            prefix = (_STL_CACHE.longest_prefix(values, "windowed", min_length=start)
+                      or _STL_CACHE.longest_prefix(values, "robust", min_length=start))
+            if prefix is None:
+                start = 0
+
+        # Window refits are short and frequent, so they skip the robust
+        # re-weighting iterations
+        robust = self.stl_mode == "robust" or (self.stl_mode == "windowed" and prefix is None)
+        result = STL(values[start:], period=30, robust=robust).fit()
+        components = (np.asarray(result.trend), np.asarray(result.seasonal),
+                      np.asarray(result.resid))
+        if prefix is not None:
+            components = tuple(np.concatenate([cached_part[:start], part])
+                               for cached_part, part in zip(prefix, components))
+        _STL_CACHE.put(key, components)
+        return components
+
+    def _add_stl_panel(self, df: pd.DataFrame, col: str, groups: np.ndarray):
+        """``_add_stl`` applied to each series of a sorted panel."""
+        position = df[col].groupby(groups, sort=False).cumcount().to_numpy()
+        price = _to_columns(df[col].to_numpy(dtype=np.float64), groups, position)
+        df["stl_trend"] = indicators.rolling_mean(price, 30, min_periods=1)[position, groups]
         df["stl_seasonal"] = df[col] - df["stl_trend"]
         df["stl_residual"] = 0.0
 
+        stl_cols = list(STL_COLUMNS)
+        for rows in pd.Series(np.arange(len(df))).groupby(groups, sort=False).indices.values():
+            if len(rows) < 60:
+                continue
+            series = df[[col]].iloc[rows].reset_index(drop=True)
+            self._add_stl(series, col)
+            df.iloc[rows, [df.columns.get_loc(c) for c in stl_cols]] = series[stl_cols].values
+
+
+class TailFeatures:
+    """
+    Features of the newest row of a series that grows one day at a time.
+
+    Row values equal those ``FeatureFactory.build_features`` gives the
+    last row of the whole series: the indicator kernels run over the
+    full arrays (their rolling sums depend on where the series starts),
+    STL comes from the cache, and nothing else is rebuilt. Columns the
+    factory does not derive (e.g. raw numeric columns) are 0 there, as
+    an appended row has no value to back-fill from.
+    """
+
+    def __init__(self, factory: FeatureFactory, df: pd.DataFrame,
+                 target_col: str = "price", capacity: int = 0):
+        """
+        Parameters
+        ----------
+        factory : the FeatureFactory whose features are reproduced.
+        df : the series so far, sorted by date.
+        target_col : as in ``build_features``.
+        capacity : rows that will be appended.
+        """
+        self.factory = factory
+        self.n = len(df)
+        size = self.n + capacity
+        self._dates = np.empty(size, dtype="datetime64[ns]")
+        self._dates[:self.n] = pd.to_datetime(df["date"]).to_numpy()
+
+        def column(name):
+            values = np.full(size, np.nan)
+            if name in df.columns:
+                values[:self.n] = df[name].to_numpy(dtype=np.float64)
+            return values
+
+        self._price = column(target_col)
+        self.has_arrival = "arrival" in df.columns
+        self._arrival = column("arrival")
+        spread = "price_min" in df.columns and "price_max" in df.columns
+        self._price_min = column("price_min") if spread else None
+        self._price_max = column("price_max") if spread else None
+
+    @property
+    def price(self) -> float:
+        return float(self._price[self.n - 1])
+
+    @price.setter
+    def price(self, value: float):
+        self._price[self.n - 1] = value
+
+    @property
+    def arrival(self) -> Optional[float]:
+        return float(self._arrival[self.n - 1]) if self.has_arrival else None
+
+    def append(self, date, price: float, arrival: float) -> None:
+        """Add a row (spread columns, if any, are NaN there)."""
+        self._dates[self.n] = np.datetime64(pd.Timestamp(date), "ns")
+        self._price[self.n] = price
+        self._arrival[self.n] = arrival
+        self.has_arrival = True
+        self.n += 1
+
+    def row(self, feature_cols: Sequence[str]) -> np.ndarray:
+        """The newest row's *feature_cols* as a float64 vector."""
+        factory, n = self.factory, self.n
+        price = self._price[:n]
+        date = pd.Timestamp(self._dates[n - 1])
+        values = {
+            "day_of_week": date.dayofweek,
+            "month": date.month,
+            "quarter": date.quarter,
+            "day_of_year": date.dayofyear,
+            "is_harvest": int(date.month in HARVEST_CALENDAR.get(factory.commodity, [])),
+            "festival_proximity": int(date.month in FESTIVAL_MONTHS),
+        }
+        features = factory._series_features(
+            price, self._arrival[:n] if self.has_arrival else None,
+            None if self._price_min is None else self._price_min[:n],
+            None if self._price_max is None else self._price_max[:n],
+            skip=factory.pruned)
+        values.update((name, column[-1]) for name, column in features.items())
+
+        if not factory.pruned.issuperset(STL_COLUMNS):
+            values.update(zip(STL_COLUMNS, self._stl(price)))
+        if "days_since_shock" not in factory.pruned:
+            values["days_since_shock"] = indicators.days_since_shock(price)[-1]
+
+        row = np.array([values.get(c, np.nan) for c in feature_cols], dtype=np.float64)
+        row[np.isnan(row)] = 0.0
+        return row
+
+    def _stl(self, price: np.ndarray) -> Tuple[float, float, float]:
+        """Last (trend, seasonal, resid), as ``FeatureFactory._add_stl``."""
+        try:
+            if len(price) >= 60:
+                return tuple(part[-1] for part in self.factory._stl_components(price))
+        except Exception:
+            pass
+        trend = indicators.rolling_mean(price, 30, min_periods=1)[-1]
+        return trend, price[-1] - trend, 0.0
+
+
+def _to_columns(values: np.ndarray, groups: np.ndarray, position: np.ndarray) -> np.ndarray:
+    """Long panel values -> (max series length, n series) matrix, NaN-padded at the end."""
+    matrix = np.full((position.max() + 1 if len(position) else 0,
+                      groups.max() + 1 if len(groups) else 0), np.nan)
+    matrix[position, groups] = values
+    return matrix
+
+
+# ---------------------------------------------------------------------------
+# STL cache
+# ---------------------------------------------------------------------------
+
+class _STLCache:
+    """
+    Process-wide LRU of STL components keyed by (mode, length, hash of
+    the series values), shared by every FeatureFactory so repeated
+    builds over the same history (recursive steps, dashboard, API,
+    swarm) fit each distinct series once.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
     @staticmethod
-    def _add_shock_distance(df: pd.DataFrame, col: str, threshold: float = 0.05):
-        """Days since last price shock (|daily return| > threshold)."""
-        returns = df[col].pct_change().abs()
-        shock_mask = returns > threshold
-        days_since = []
-        counter = 999  # large default
-        for is_shock in shock_mask:
-            if is_shock:
-                counter = 0
-            else:
-                counter += 1
-            days_since.append(counter)
-        df["days_since_shock"] = days_since
+    def key(values: np.ndarray, mode: str) -> tuple:
+        digest = hashlib.blake2b(np.ascontiguousarray(values).tobytes(), digest_size=16)
+        return mode, len(values), digest.hexdigest()
+
+    def get(self, key: tuple):
+        with self._lock:
+            components = self._entries.get(key)
+            if components is not None:
+                self._entries.move_to_end(key)
+            return components
+
+    def put(self, key: tuple, components: tuple) -> None:
+        for part in components:
+            part.flags.writeable = False
+        with self._lock:
+            self._entries[key] = components
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def longest_prefix(self, values: np.ndarray, mode: str, min_length: int):
+        """Cached components of the longest cached prefix of *values* (>= min_length rows)."""
+        with self._lock:
+            lengths = sorted({k[1] for k in self._entries
+                              if k[0] == mode and min_length <= k[1] < len(values)},
+                             reverse=True)
+        for length in lengths:
+            components = self.get(self.key(values[:length], mode))
+            if components is not None:
+                return components
+        return None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_STL_CACHE = _STLCache()
@@ -0,0 +1,286 @@
+"""
+RACE Feature Selection — Importance-Driven Pruning per Commodity
+================================================================
+``FeatureFactory`` emits about 40 columns and every member trains on
+all of them, including near-duplicates (``bb_upper`` / ``bb_lower`` /
+``roll_mean_*`` all track the price level). This offline job decides,
+per commodity, which columns are worth their build and training cost.
+
+Importance comes from the ensemble's own expanding-window CV
+(``RACEForecaster._cv_jobs`` / ``_score_cv``) pooled over every mandi
+series of the commodity, by one of two methods:
+    gain         — each boosting member's gain importance (the ensemble
+                   counterpart of ``model_zoo``'s ``get_feature_importance``)
+    permutation  — MAPE increase on the validation fold when a column
+                   is shuffled, for every member
+averaged over members, folds and series.
+
+Columns are then pruned in two passes:
+    collinear    — walking columns from most to least important, a
+                   column whose |correlation| with an already kept one
+                   reaches ``correlation`` in every series is dropped
+    low share    — of the rest, the least important columns beyond
+                   ``keep_share`` of the total importance are dropped,
+                   keeping at least ``min_features``
+
+The pruned set is re-scored with the same CV; it is only accepted when
+its MAPE stays within ``tolerance`` of the full set's, otherwise
+nothing is pruned.
+
+Usage
+-----
+    selector = FeatureSelector(method="gain")
+    result = selector.select(histories, commodity="Onion")
+    result.pruned                          # ["bb_lower", "roll_mean_7", ...]
+
+``etl/feature_selection.py`` runs this per commodity and writes the
+pruned lists to the ``feature_selection`` table, which ``RACEForecaster``
+reads through ``pruned_features``: ``build_features`` then skips those
+columns and the members never see them.
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .ensemble import RACEForecaster, DEFAULT_MEMBERS, _BaseModel, _TrainingMatrix
+from .feature_factory import FeatureFactory
+
+logger = logging.getLogger(__name__)
+
+METHODS = ("gain", "permutation")
+
+
+@dataclass
+class SelectionResult:
+    """Pruning decision for one commodity."""
+    commodity: str
+    kept: List[str]
+    pruned: List[str]
+    importance: Dict[str, float]     # mean normalised importance per column
+    cv_mape: float                   # CV MAPE on the kept columns
+    full_mape: float                 # CV MAPE on every column
+    seconds: float
+    accepted: bool                   # False if pruning cost accuracy (nothing pruned)
+
+
+class _Series(NamedTuple):
+    cols: List[str]
+    matrix: _TrainingMatrix
+
+
+class FeatureSelector:
+    """Importance-driven feature pruning over the RACE CV folds."""
+
+    def __init__(self, method: str = "gain", keep_share: float = 0.99,
+                 min_features: int = 12, correlation: float = 0.98,
+                 tolerance: float = 0.01, n_splits: int = 3,
+                 members: Sequence[str] = DEFAULT_MEMBERS,
+                 n_jobs: Optional[int] = None, seed: int = 42):
+        """
+        Parameters
+        ----------
+        method : "gain" or "permutation" (see module docstring).
+        keep_share : share of the total importance the kept columns cover.
+        min_features : never keep fewer columns than this.
+        correlation : |correlation| from which a less important column
+            counts as a duplicate of a kept one.
+        tolerance : accepted relative CV MAPE increase of the pruned set.
+        n_splits : expanding-window CV folds per series.
+        members : ensemble members whose importances are averaged.
+        n_jobs : concurrent fits (see ``RACEForecaster``).
+        """
+        if method not in METHODS:
+            raise ValueError(f"method must be one of {METHODS}, got {method!r}")
+        self.method = method
+        self.keep_share = keep_share
+        self.min_features = max(1, min_features)
+        self.correlation = correlation
+        self.tolerance = tolerance
+        self.n_splits = n_splits
+        self.seed = seed
+        # CV plumbing and member construction of the ensemble itself
+        self._race = RACEForecaster(n_jobs=n_jobs, members=members)
+
+    # ----- Public API -----
+
+    def select(self, histories: Sequence[pd.DataFrame],
+               commodity: str = "Unknown") -> Optional[SelectionResult]:
+        """
+        Pruning decision for the price histories of one commodity; None
+        when no history is long enough for CV.
+        """
+        start = time.perf_counter()
+        series = self._series(histories, commodity)
+        if not series:
+            return None
+        members = [self._race._create_member(name) for name in self._race.members]
+        members = [m for m in members if m.available]
+        rng = np.random.default_rng(self.seed)
+
+        full_mape, fits = self._cv(series, members)
+        importance = self._importance(series, fits, rng)
+        kept, pruned = self._prune(series, importance)
+
+        cv_mape = full_mape
+        if pruned:
+            cv_mape, _ = self._cv([self._subset(s, kept) for s in series], members)
+        accepted = cv_mape <= full_mape * (1 + self.tolerance)
+        if not accepted:
+            logger.info(f"{commodity}: pruning {len(pruned)} columns raised CV MAPE "
+                        f"{full_mape:.3f} -> {cv_mape:.3f}; keeping all")
+            kept, pruned = kept + pruned, []
+        return SelectionResult(
+            commodity=commodity,
+            kept=kept,
+            pruned=sorted(pruned),
+            importance={name: round(value, 6) for name, value in importance.items()},
+            cv_mape=float(cv_mape),
+            full_mape=float(full_mape),
+            seconds=round(time.perf_counter() - start, 2),
+            accepted=accepted,
+        )
+
+    @staticmethod
+    def _series(histories: Sequence[pd.DataFrame], commodity: str) -> List[_Series]:
+        """Unpruned feature matrices of the histories long enough for CV."""
+        series = []
+        for data in histories:
+            if len(data) < 40:
+                continue
+            factory = FeatureFactory(commodity=commodity)
+            featured = factory.build_features(RACEForecaster._sorted(data), target_col="price")
+            cols = factory.get_feature_columns(featured)
+            series.append(_Series(cols, _TrainingMatrix(featured[cols].values,
+                                                        featured["price"].values)))
+        return series
+
+    @staticmethod
+    def _subset(s: _Series, kept: List[str]) -> _Series:
+        keep = set(kept)
+        idx = [i for i, c in enumerate(s.cols) if c in keep]
+        return _Series([s.cols[i] for i in idx],
+                       _TrainingMatrix(s.matrix.X[:, idx], s.matrix.y))
+
+    # ----- Scoring -----
+
+    def _cv(self, series: List[_Series], members: List[_BaseModel]):
+        """
+        Mean CV MAPE over members and series, and per series the
+        ``(jobs, fitted members)`` of its folds.
+        """
+        race = self._race
+        with ThreadPoolExecutor(max_workers=race.n_jobs) as pool:
+            runs = []
+            for s in series:
+                jobs = race._cv_jobs(s.matrix, members, self.n_splits)
+                futures = [pool.submit(race._fit_one, m.spawn(), train, valid)
+                           if train is not None else None
+                           for m, train, valid, _ in jobs or ()]
+                runs.append((jobs, futures))
+            mapes, fits = [], []
+            for s, (jobs, futures) in zip(series, runs):
+                scores, _ = race._score_cv(s.matrix, members, jobs, futures)
+                mapes.append(np.mean(list(scores.values())))
+                fitted = []
+                for future in futures:
+                    try:
+                        fitted.append(future.result() if future is not None else None)
+                    except Exception:
+                        fitted.append(None)
+                fits.append((jobs or [], fitted))
+        return float(np.mean(mapes)), fits
+
+    def _importance(self, series: List[_Series], fits: list,
+                    rng: np.random.Generator) -> Dict[str, float]:
+        """Mean normalised importance per column over every fold fit."""
+        totals: Dict[str, float] = {}
+        counts: Dict[str, int] = {}
+        for s, (jobs, fitted) in zip(series, fits):
+            for (_, _, _, val_rows), member in zip(jobs, fitted):
+                if member is None:
+                    continue
+                if self.method == "gain":
+                    values = member.feature_importance(len(s.cols))
+                else:
+                    values = self._permutation_importance(
+                        member, s.matrix.X[val_rows], s.matrix.y[val_rows], rng)
+                if values is None:
+                    continue
+                for name, value in zip(s.cols, values):
+                    totals[name] = totals.get(name, 0.0) + float(value)
+                    counts[name] = counts.get(name, 0) + 1
+        names = list(dict.fromkeys(c for s in series for c in s.cols))
+        importance = {name: totals.get(name, 0.0) / max(counts.get(name, 0), 1)
+                      for name in names}
+        total = sum(importance.values())
+        return {name: value / total if total > 0 else 0.0
+                for name, value in importance.items()}
+
+    @staticmethod
+    def _permutation_importance(member: _BaseModel, X: np.ndarray, y: np.ndarray,
+                                rng: np.random.Generator) -> Optional[np.ndarray]:
+        """Validation MAPE increase per shuffled column, normalised to sum 1."""
+        y = y.astype(np.float64)
+
+        def mape(X_):
+            return np.mean(np.abs((y - member.predict(X_)) / (y + 1e-9))) * 100
+
+        base = mape(X)
+        X = X.copy()
+        increase = np.zeros(X.shape[1])
+        for j in range(X.shape[1]):
+            column = X[:, j].copy()
+            X[:, j] = rng.permutation(column)
+            increase[j] = mape(X) - base
+            X[:, j] = column
+        increase = np.maximum(increase, 0.0)
+        total = increase.sum()
+        return increase / total if total > 0 else None
+
+    # ----- Pruning -----
+
+    def _prune(self, series: List[_Series], importance: Dict[str, float]):
+        """(kept, pruned) column names, kept ones by descending importance."""
+        names = list(importance)
+        order = sorted(names, key=lambda name: -importance[name])
+        redundant = self._redundant(series, names)
+        index = {name: i for i, name in enumerate(names)}
+
+        kept, pruned = [], []
+        for name in order:
+            i = index[name]
+            if any(redundant[i, index[k]] for k in kept):
+                pruned.append(name)
+            else:
+                kept.append(name)
+
+        total = sum(importance[name] for name in kept)
+        covered, n_keep = 0.0, len(kept)
+        for n, name in enumerate(kept, start=1):
+            covered += importance[name]
+            if total > 0 and covered >= self.keep_share * total:
+                n_keep = n
+                break
+        n_keep = max(n_keep, min(self.min_features, len(kept)))
+        return kept[:n_keep], pruned + kept[n_keep:]
+
+    def _redundant(self, series: List[_Series], names: List[str]) -> np.ndarray:
+        """Column pairs correlated beyond ``correlation`` in every series holding both."""
+        index = {name: i for i, name in enumerate(names)}
+        lowest = np.full((len(names), len(names)), np.inf)
+        for s in series:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                corr = np.abs(np.corrcoef(s.matrix.X.astype(np.float64), rowvar=False))
+            corr = np.nan_to_num(np.atleast_2d(corr), nan=0.0)
+            idx = np.array([index[c] for c in s.cols])
+            block = np.ix_(idx, idx)
+            lowest[block] = np.minimum(lowest[block], corr)
+        lowest[np.isinf(lowest)] = 0.0
+        np.fill_diagonal(lowest, 0.0)
+        return lowest >= self.correlation
@@ -0,0 +1,234 @@
+"""
+RACE Feature Store — Persisted FeatureFactory Output
+=====================================================
+Keeps the feature matrix of each (commodity, mandi) pair on disk so the
+dashboard, the API and the nightly swarm stop rebuilding it from raw
+prices. When new dates arrive only the new rows are computed, from a
+trailing window of history, and appended.
+
+Layout (one directory per pair, under the feature-set version):
+    <root>/v<FEATURE_SET_VERSION>/<commodity>__<mandi>/
+        meta.json      version, feature and raw column names, pruned
+                       columns, row count, last date
+        dates.npy      datetime64[ns]
+        raw.npy        float64, the input's numeric columns (price, arrival, ...)
+        matrix.npy     float32, C order: the feature columns in the
+                       trainer's layout (see ``ensemble._TrainingMatrix``)
+
+``load_matrix`` returns the read-only memory map of ``matrix.npy``
+itself, so a training run reads its features without copying them;
+``load`` wraps the memory maps in a frame for the other readers.
+
+Appended rows are computed over the trailing ``window`` rows only;
+stored rows are never revised. Whole-series features (STL, EWM memory)
+of appended rows are therefore windowed approximations of a full
+rebuild, which happens whenever the feature-set version changes, the
+stored history no longer matches the input, or the layout (including
+the factory's pruned columns) changes.
+"""
+
+import json
+import os
+import re
+import shutil
+import logging
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .feature_factory import FeatureFactory, FEATURE_SET_VERSION
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FEATURE_DIR = os.path.join("models", "features")
+
+
+class FeatureStore:
+    """Disk-backed, append-only store of FeatureFactory output per pair."""
+
+    def __init__(self, root: str = DEFAULT_FEATURE_DIR, window: int = 240,
+                 version: str = FEATURE_SET_VERSION):
+        """
+        Parameters
+        ----------
+        root : store directory.
+        window : trailing rows of history re-featurised to append new
+            dates; must cover the longest lookback (30d) and the STL
+            minimum (60).
+        version : feature-set version the stored matrices belong to.
+        """
+        self.root = root
+        self.window = window
+        self.version = version
+
+    def path(self, commodity: str, mandi: str) -> str:
+        key = "__".join(re.sub(r"[^A-Za-z0-9_-]+", "_", part)
+                        for part in (commodity, mandi))
+        return os.path.join(self.root, f"v{self.version}", key)
+
+    # ----- Read -----
+
+    def load(self, commodity: str, mandi: str) -> Optional[pd.DataFrame]:
+        """
+        Stored features for a pair (``date`` + numeric columns), backed by
+        a read-only memory map. None if missing/unreadable.
+        """
+        loaded = self._load_arrays(commodity, mandi)
+        if loaded is None:
+            return None
+        meta, dates, raw, matrix = loaded
+        return pd.concat([
+            pd.DataFrame({"date": dates}),
+            pd.DataFrame(raw, columns=meta["raw_columns"], copy=False),
+            pd.DataFrame(matrix, columns=meta["columns"], copy=False),
+        ], axis=1)
+
+    def load_matrix(self, commodity: str, mandi: str,
+                    columns: Optional[List[str]] = None
+                    ) -> Optional[Tuple[np.ndarray, np.ndarray, List[str]]]:
+        """
+        ``(dates, X, columns)`` for training. ``X`` is the float32,
+        C-order memory map itself when *columns* is None or all stored
+        feature columns in order; other selections are gathered into a
+        copy.
+        """
+        loaded = self._load_arrays(commodity, mandi)
+        if loaded is None:
+            return None
+        meta, dates, _, matrix = loaded
+        stored = meta["columns"]
+        if columns is None or list(columns) == stored:
+            return dates, matrix, stored
+        idx = [stored.index(c) for c in columns]
+        return dates, matrix[:, idx], list(columns)
+
+    def _load_arrays(self, commodity: str, mandi: str):
+        path = self.path(commodity, mandi)
+        try:
+            with open(os.path.join(path, "meta.json")) as f:
+                meta = json.load(f)
+            dates = np.load(os.path.join(path, "dates.npy"))
+            raw = np.load(os.path.join(path, "raw.npy"), mmap_mode="r")
+            matrix = np.load(os.path.join(path, "matrix.npy"), mmap_mode="r")
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Could not load features {path}: {e}")
+            return None
+        if meta.get("version") != self.version or matrix.dtype != np.float32 \
+                or not len(dates) == len(raw) == matrix.shape[0]:
+            return None
+        return meta, dates, raw, matrix
+
+    # ----- Build / append -----
+
+    def features(self, data: pd.DataFrame, commodity: str, mandi: str,
+                 target_col: str = "price",
+                 factory: Optional[FeatureFactory] = None) -> pd.DataFrame:
+        """
+        Features for *data*, bringing the stored matrix up to date first.
+
+        Rows already stored are served from disk; dates after the stored
+        ones are featurised over the trailing window and appended. The
+        store is rebuilt from scratch when *data* disagrees with the
+        stored history.
+        """
+        factory = factory or FeatureFactory(commodity=commodity)
+        data = data.copy()
+        data["date"] = pd.to_datetime(data["date"])
+        data = data.sort_values("date").reset_index(drop=True)
+
+        stored = self.load(commodity, mandi)
+        n_stored = self._matching_prefix(stored, data, target_col)
+        if n_stored is not None and self._pruned(commodity, mandi) != sorted(factory.pruned):
+            n_stored = None
+        if n_stored is None:
+            featured = factory.build_features(data, target_col=target_col)
+            self._write(commodity, mandi, featured, factory)
+        elif n_stored < len(data):
+            start = max(0, n_stored - self.window)
+            tail = factory.build_features(data.iloc[start:], target_col=target_col)
+            new_rows = tail.iloc[n_stored - start:].reset_index(drop=True)
+            columns = self._numeric_columns(new_rows)
+            if sorted(columns) != sorted(stored.columns[1:]):
+                featured = factory.build_features(data, target_col=target_col)
+                self._write(commodity, mandi, featured, factory)
+            else:
+                self._carry_shock_counter(stored, new_rows)
+                self._write(commodity, mandi,
+                            pd.concat([stored, new_rows[stored.columns]],
+                                      ignore_index=True), factory)
+        else:
+            return stored
+        return self.load(commodity, mandi)
+
+    def _pruned(self, commodity: str, mandi: str) -> List[str]:
+        """Pruned columns the stored matrix was built without."""
+        loaded = self._load_arrays(commodity, mandi)
+        return loaded[0].get("pruned", []) if loaded is not None else []
+
+    def _matching_prefix(self, stored: Optional[pd.DataFrame], data: pd.DataFrame,
+                         target_col: str) -> Optional[int]:
+        """Stored row count if it is a prefix of *data*, else None."""
+        if stored is None or target_col not in stored.columns:
+            return None
+        n = len(stored)
+        if n == 0 or n > len(data):
+            return None
+        same_dates = np.array_equal(stored["date"].to_numpy(),
+                                    data["date"].to_numpy()[:n])
+        same_prices = np.allclose(stored[target_col].to_numpy(),
+                                  data[target_col].to_numpy(dtype=float)[:n],
+                                  rtol=0, atol=1e-9, equal_nan=True)
+        return n if same_dates and same_prices else None
+
+    @staticmethod
+    def _carry_shock_counter(stored: pd.DataFrame, new_rows: pd.DataFrame):
+        """
+        A window without a shock restarts ``days_since_shock`` at 999;
+        continue the stored counter instead.
+        """
+        if "days_since_shock" not in new_rows.columns or stored.empty:
+            return
+        counter = float(stored["days_since_shock"].iloc[-1])
+        values = new_rows["days_since_shock"].to_numpy(dtype=float).copy()
+        for i, value in enumerate(values):
+            counter = value if value < 999 else counter + 1
+            values[i] = counter
+        new_rows["days_since_shock"] = values
+
+    @staticmethod
+    def _numeric_columns(featured: pd.DataFrame) -> List[str]:
+        return [c for c in featured.columns
+                if c != "date" and pd.api.types.is_numeric_dtype(featured[c])
+                and not pd.api.types.is_bool_dtype(featured[c])]
+
+    def _write(self, commodity: str, mandi: str, featured: pd.DataFrame,
+               factory: FeatureFactory) -> None:
+        """Atomically replace the stored matrix of a pair."""
+        numeric = self._numeric_columns(featured)
+        columns = factory.get_feature_columns(featured[numeric])
+        raw_columns = [c for c in numeric if c not in columns]
+        meta = {
+            "version": self.version,
+            "columns": columns,
+            "raw_columns": raw_columns,
+            "pruned": sorted(factory.pruned),
+            "rows": len(featured),
+            "last_date": str(featured["date"].max()),
+        }
+        path = self.path(commodity, mandi)
+        tmp_path = f"{path}.tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        np.save(os.path.join(tmp_path, "dates.npy"),
+                featured["date"].to_numpy(dtype="datetime64[ns]"))
+        np.save(os.path.join(tmp_path, "raw.npy"),
+                featured[raw_columns].to_numpy(dtype=np.float64))
+        np.save(os.path.join(tmp_path, "matrix.npy"),
+                np.ascontiguousarray(featured[columns].to_numpy(dtype=np.float32)))
+        with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+            json.dump(meta, f, indent=2)
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp_path, path)
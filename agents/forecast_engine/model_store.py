@@ -0,0 +1,77 @@
+"""
+RACE Model Store — Persisted Ensemble State
+============================================
+Keeps the fitted boosters, weights and feature layout of the last RACE
+run for each (commodity, mandi) pair on disk, so the nightly swarm can
+warm-start from yesterday's models instead of retraining from scratch.
+
+Layout:
+    <root>/<commodity>__<mandi>.joblib
+"""
+
+import os
+import re
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from .regime_detector import RegimeState
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_DIR = os.path.join("models", "race")
+
+
+@dataclass
+class FittedState:
+    """Everything needed to continue or reuse a fitted RACE ensemble."""
+    models: list                         # fitted ensemble members
+    weights: Dict[str, float]
+    feature_cols: List[str]
+    regime: str
+    cv_scores: Dict[str, float]
+    trained_until: pd.Timestamp          # last date in the training data
+    last_full_retrain: pd.Timestamp      # data date of the last from-scratch fit
+    rmse: float = 0.0
+    warm_updates: int = 0                # warm starts since the last full retrain
+    regime_state: Optional[RegimeState] = None
+    metadata: Dict = field(default_factory=dict)
+    # {member name: {"weights": [...], "sat_out": n, "fit_seconds": s,
+    #  "predict_ms": ms}}, see RACEForecaster._member_history
+    member_history: Dict[str, Dict] = field(default_factory=dict)
+
+
+class ModelStore:
+    """Disk-backed store of ``FittedState`` objects keyed by pair."""
+
+    def __init__(self, root: str = DEFAULT_MODEL_DIR):
+        self.root = root
+
+    def path(self, commodity: str, mandi: str) -> str:
+        key = "__".join(re.sub(r"[^A-Za-z0-9_-]+", "_", part)
+                        for part in (commodity, mandi))
+        return os.path.join(self.root, f"{key}.joblib")
+
+    def load(self, commodity: str, mandi: str) -> Optional[FittedState]:
+        """Return the stored state for a pair, or None if missing/unreadable."""
+        import joblib
+        path = self.path(commodity, mandi)
+        if not os.path.exists(path):
+            return None
+        try:
+            state = joblib.load(path)
+            return state if isinstance(state, FittedState) else None
+        except Exception as e:
+            logger.warning(f"Could not load model state {path}: {e}")
+            return None
+
+    def save(self, commodity: str, mandi: str, state: FittedState) -> None:
+        """Atomically persist the state for a pair."""
+        import joblib
+        os.makedirs(self.root, exist_ok=True)
+        path = self.path(commodity, mandi)
+        tmp_path = f"{path}.tmp"
+        joblib.dump(state, tmp_path)
+        os.replace(tmp_path, path)
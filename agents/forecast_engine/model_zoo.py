@@ -10,6 +10,13 @@ Models:
 - LightGBMForecaster
 - CatBoostForecaster
 - LinearTrendForecaster (baseline)
+
+``RACEForecaster`` builds its members through ``create_member``: the
+ensemble's adapters (which train on shared native containers, see
+``ensemble._BaseModel``) register themselves in ``MEMBER_REGISTRY``
+under the same names as the standalone forecasters here.
+
+Thread counts of the standalone forecasters come from ``resources``.
 """
 
 import numpy as np
@@ -20,9 +27,16 @@ import warnings
 import hashlib
 from datetime import datetime
 
+from . import resources
+
 warnings.filterwarnings("ignore")
 
 
+def _threads() -> int:
+    """Library threads of one standalone fit (see ``resources``)."""
+    return resources.get_config().library_threads()
+
+
 class BaseForecaster(ABC):
     """Abstract base class for all RACE ensemble members."""
 
@@ -68,6 +82,7 @@ class XGBoostForecaster(BaseForecaster):
             reg_lambda=1.0,
             verbosity=0,
             random_state=42,
+            n_jobs=_threads(),
         )
         self._feature_names = []
         self._version = f"XGB-{datetime.now().strftime('%Y%m%d')}"
@@ -118,6 +133,7 @@ class LightGBMForecaster(BaseForecaster):
                 reg_lambda=1.0,
                 verbose=-1,
                 random_state=42,
+                n_jobs=_threads(),
             )
             self._model.fit(X, y)
         except ImportError:
@@ -126,7 +142,7 @@ class LightGBMForecaster(BaseForecaster):
             self._feature_names = list(X.columns)
             self._model = xgb.XGBRegressor(
                 n_estimators=120, learning_rate=0.1, max_depth=5,
-                verbosity=0, random_state=43,
+                verbosity=0, random_state=43, n_jobs=_threads(),
             )
             self._model.fit(X, y)
             self._version = f"LGBM-FALLBACK-{datetime.now().strftime('%Y%m%d')}"
@@ -165,6 +181,7 @@ class CatBoostForecaster(BaseForecaster):
                 l2_leaf_reg=3.0,
                 verbose=0,
                 random_seed=42,
+                thread_count=_threads(),
             )
             self._model.fit(X, y)
         except ImportError:
@@ -173,7 +190,7 @@ class CatBoostForecaster(BaseForecaster):
             self._feature_names = list(X.columns)
             self._model = xgb.XGBRegressor(
                 n_estimators=120, learning_rate=0.1, max_depth=5,
-                verbosity=0, random_state=44,
+                verbosity=0, random_state=44, n_jobs=_threads(),
             )
             self._model.fit(X, y)
             self._version = f"CB-FALLBACK-{datetime.now().strftime('%Y%m%d')}"
@@ -234,3 +251,21 @@ def create_model(name: str) -> BaseForecaster:
     if cls is None:
         raise ValueError(f"Unknown model: {name}. Available: {list(MODEL_REGISTRY.keys())}")
     return cls()
+
+
+# Registry of RACE ensemble members, filled by ``register_member``
+MEMBER_REGISTRY: Dict[str, type] = {}
+
+
+def register_member(cls: type) -> type:
+    """Class decorator registering an ensemble member under ``cls.name``."""
+    MEMBER_REGISTRY[cls.name] = cls
+    return cls
+
+
+def create_member(name: str, **kwargs):
+    """Factory function to create an ensemble member by name."""
+    cls = MEMBER_REGISTRY.get(name)
+    if cls is None:
+        raise ValueError(f"Unknown member: {name}. Available: {list(MEMBER_REGISTRY.keys())}")
+    return cls(**kwargs)
@@ -7,20 +7,52 @@ the current market regime as STABLE, VOLATILE, or CRISIS.
 Falls back to a rule-based volatility classifier if the HMM fails
 (insufficient data, convergence issues, or missing hmmlearn).
 
+Fitted HMM parameters travel with the returned ``RegimeState`` (and so
+with the persisted RACE state of a pair). Passing the previous state
+back in lets the next call skip EM entirely — new returns are forward
+filtered — or warm-start a short EM from the old parameters when the
+history changed or the new returns no longer fit the model.
+
+``detect_regimes_batch`` classifies many series at once: features are
+computed column-wise over one price matrix and series of the same
+commodity share one pooled HMM fit.
+
 Patent-relevant novelty: domain-specific feature engineering
 combining rolling volatility, Hurst exponent estimation, kurtosis,
 and price velocity to detect agricultural commodity market regimes.
 """
 
+import hashlib
+import json
+from collections import defaultdict
 import numpy as np
 import pandas as pd
 from dataclasses import dataclass, field
-from typing import Dict, Optional
+from typing import Dict, Hashable, List, Mapping, Optional, Sequence
 import warnings
 
+from . import indicators
+
 warnings.filterwarnings("ignore")
 
 
+@dataclass
+class HMMParams:
+    """Fitted Gaussian HMM of a return series and its forward-filter state."""
+    startprob: np.ndarray
+    transmat: np.ndarray
+    means: np.ndarray
+    covars: np.ndarray                  # full covariances, (states, d, d)
+    label_map: Dict[int, str]           # hidden state -> regime label
+    n_obs: int                          # returns consumed (fit + filtered)
+    fingerprint: str                    # hash of those returns
+    alpha: np.ndarray                   # filtered state probabilities after n_obs
+    state: int                          # current hidden state
+    loglik_mean: float                  # per-return predictive log-likelihood
+    loglik_std: float                   #   over the EM fit: mean and std
+    filtered_obs: int = 0               # returns filtered since the last EM fit
+
+
 @dataclass
 class RegimeState:
     """Encapsulates the detected market regime and confidence metadata."""
@@ -28,6 +60,31 @@ class RegimeState:
     confidence: float  # 0.0 – 1.0
     transition_prob: Dict[str, float] = field(default_factory=dict)
     features: Dict[str, float] = field(default_factory=dict)
+    hmm: Optional[HMMParams] = field(default=None, repr=False)
+
+    # Columns of the ``regime_snapshots`` table taken from ``features``
+    SNAPSHOT_FEATURES = ("vol_7", "vol_14", "vol_30", "velocity", "kurtosis",
+                         "hurst", "bb_width")
+
+    def to_snapshot(self) -> Dict:
+        """Row of the ``regime_snapshots`` table (without date / pair keys)."""
+        row = {"regime": self.regime, "confidence": float(self.confidence),
+               "transition_prob": json.dumps(self.transition_prob)}
+        for name in self.SNAPSHOT_FEATURES:
+            value = self.features.get(name)
+            row[name] = None if value is None else float(value)
+        return row
+
+    @classmethod
+    def from_snapshot(cls, row: Mapping) -> "RegimeState":
+        """Inverse of ``to_snapshot`` (the HMM parameters are not stored)."""
+        transition_prob = row.get("transition_prob") or "{}"
+        if isinstance(transition_prob, str):
+            transition_prob = json.loads(transition_prob)
+        features = {name: row[name] for name in cls.SNAPSHOT_FEATURES
+                    if row.get(name) is not None}
+        return cls(regime=row["regime"], confidence=float(row["confidence"]),
+                   transition_prob=transition_prob, features=features)
 
 
 class RegimeDetector:
@@ -41,30 +98,38 @@ class RegimeDetector:
 
     REGIME_MAP = {0: "STABLE", 1: "VOLATILE", 2: "CRISIS"}
 
-    def __init__(self, n_states: int = 3, lookback: int = 60):
+    def __init__(self, n_states: int = 3, lookback: int = 60, n_iter: int = 200,
+                 warm_iter: int = 10, max_filter_obs: int = 30,
+                 drift_tolerance: float = 3.0):
+        """
+        Parameters
+        ----------
+        n_iter : EM iterations of a cold HMM fit.
+        warm_iter : EM iterations when refitting from previous parameters.
+        max_filter_obs : new returns forward filtered before the next EM
+            refit is forced.
+        drift_tolerance : standard errors the new returns' mean predictive
+            log-likelihood may fall below the fit's before refitting.
+        """
         self.n_states = n_states
         self.lookback = lookback
-        self._hmm_available = False
-        self._hmm = None
+        self.n_iter = n_iter
+        self.warm_iter = warm_iter
+        self.max_filter_obs = max_filter_obs
+        self.drift_tolerance = drift_tolerance
 
         try:
-            from hmmlearn.hmm import GaussianHMM
-            self._hmm = GaussianHMM(
-                n_components=n_states,
-                covariance_type="full",
-                n_iter=200,
-                random_state=42,
-                verbose=False,
-            )
+            import hmmlearn.hmm  # noqa: F401
             self._hmm_available = True
         except ImportError:
-            pass
+            self._hmm_available = False
 
     # ------------------------------------------------------------------
     # Public API
     # ------------------------------------------------------------------
 
-    def detect_regime(self, price_series: pd.Series) -> RegimeState:
+    def detect_regime(self, price_series: pd.Series,
+                      previous: Optional[RegimeState] = None) -> RegimeState:
         """
         Classify the current market regime from a price time-series.
 
@@ -72,6 +137,9 @@ class RegimeDetector:
         ----------
         price_series : pd.Series
             Daily modal prices, ordered chronologically.
+        previous : RegimeState, optional
+            Last result for the same series; its HMM parameters are
+            reused (forward filtering or warm-started EM).
 
         Returns
         -------
@@ -86,103 +154,312 @@ class RegimeDetector:
         # Try HMM first
         if self._hmm_available and len(price_series) >= 30:
             try:
-                return self._hmm_classify(price_series, features)
+                return self._hmm_classify(price_series, features,
+                                          previous.hmm if previous is not None else None)
             except Exception:
                 pass
 
         # Fallback: rule-based
         return self._rule_based_classify(features)
 
+    def detect_regimes_batch(
+        self,
+        price_series: Mapping[Hashable, pd.Series],
+        previous: Optional[Mapping[Hashable, RegimeState]] = None,
+        pools: Optional[Mapping[Hashable, Hashable]] = None,
+    ) -> Dict[Hashable, RegimeState]:
+        """
+        Classify many price series at once.
+
+        Features of all series are computed together; HMM-eligible
+        series (>= 30 prices) of the same pool share one HMM fit, each
+        series then getting its own filtered posterior and Viterbi path.
+
+        Parameters
+        ----------
+        price_series : {key: daily prices}, e.g. keyed by (commodity, mandi).
+        previous : {key: last RegimeState}; HMM parameters are reused as
+            in ``detect_regime`` (a pool refits if any member must).
+        pools : {key: pool name}. Defaults to the first element of tuple
+            keys (the commodity); other keys are not pooled.
+
+        Returns
+        -------
+        {key: RegimeState} in the order of *price_series*.
+        """
+        previous = previous or {}
+        keys = list(price_series)
+        values = {k: np.asarray(price_series[k], dtype=np.float64) for k in keys}
+        results: Dict[Hashable, RegimeState] = {}
+
+        eligible = [k for k in keys if len(values[k]) >= 20]
+        for k in keys:
+            if len(values[k]) < 20:
+                results[k] = RegimeState(regime="STABLE", confidence=0.3,
+                                         features={"reason": "insufficient_data"})
+        features = dict(zip(eligible, self._engineer_features_batch(
+            [values[k] for k in eligible])))
+
+        members = defaultdict(list)
+        for k in eligible:
+            if self._hmm_available and len(values[k]) >= 30:
+                pool = pools.get(k, k) if pools is not None else \
+                    (k[0] if isinstance(k, tuple) and k else k)
+                members[pool].append(k)
+        for pool_keys in members.values():
+            try:
+                states = self._hmm_classify_pool(
+                    [_returns(values[k]).reshape(-1, 1) for k in pool_keys],
+                    [features[k] for k in pool_keys],
+                    [getattr(previous.get(k), "hmm", None) for k in pool_keys],
+                )
+                results.update(zip(pool_keys, states))
+            except Exception:
+                pass
+
+        for k in eligible:
+            if k not in results:
+                results[k] = self._rule_based_classify(features[k])
+        return {k: results[k] for k in keys}
+
     # ------------------------------------------------------------------
     # Feature Engineering
     # ------------------------------------------------------------------
 
     def _engineer_features(self, prices: pd.Series) -> Dict[str, float]:
         """Compute regime-detection features from raw prices."""
-        returns = prices.pct_change().dropna()
+        return self._engineer_features_batch([np.asarray(prices, dtype=np.float64)])[0]
 
-        vol_7 = returns.iloc[-7:].std() if len(returns) >= 7 else returns.std()
-        vol_14 = returns.iloc[-14:].std() if len(returns) >= 14 else returns.std()
-        vol_30 = returns.iloc[-30:].std() if len(returns) >= 30 else returns.std()
-
-        # Price velocity (annualised trend slope over last 14 days)
-        recent = prices.iloc[-14:].values if len(prices) >= 14 else prices.values
-        velocity = (recent[-1] - recent[0]) / (recent[0] + 1e-9)
-
-        # Kurtosis of returns (fat-tails indicator)
-        kurt = returns.kurtosis() if len(returns) >= 10 else 0.0
+    def _engineer_features_batch(self, series: Sequence[np.ndarray]) -> List[Dict[str, float]]:
+        """
+        ``_engineer_features`` of many price arrays, computed column-wise
+        over end-aligned (NaN-padded at the top) price / return matrices.
+        """
+        if not series:
+            return []
+        returns = [_returns(v) for v in series]
+        n_prices = np.array([len(v) for v in series])
+        n_returns = np.array([len(r) for r in returns])
+        prices = _end_aligned(series)
+        rets = _end_aligned(returns)
+        cols = np.arange(len(series))
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            vols = {}
+            for window in (7, 14, 30):
+                tail = rets[-window:]
+                n = np.minimum(n_returns, window)
+                vols[window] = np.where(n > 1, np.nanstd(tail, axis=0, ddof=1), np.nan) \
+                    if len(tail) else np.full(len(series), np.nan)
+
+            # Price velocity (annualised trend slope over last 14 days)
+            last = prices[-1]
+            first = prices[len(prices) - np.minimum(n_prices, 14), cols]
+            velocity = (last - first) / (first + 1e-9)
+
+            # Kurtosis of returns (fat-tails indicator)
+            kurt = np.where(n_returns >= 10, _excess_kurtosis(rets, n_returns), 0.0)
+
+            # Bollinger Band width (normalised), latest window only
+            bb_width = np.zeros(len(series))
+            if len(prices) >= 20:
+                bands = indicators.bollinger(prices[-20:], 20)
+                width = (2 * bands.std[-1]) / (bands.mid[-1] + 1e-9)
+                bb_width = np.where(n_prices >= 20, width, 0.0)
 
         # Hurst exponent estimate (simplified R/S method)
-        hurst = self._hurst_exponent(prices.values)
-
-        # Bollinger Band width (normalised)
-        bb_mid = prices.rolling(20).mean()
-        bb_std = prices.rolling(20).std()
-        bb_width = ((2 * bb_std) / (bb_mid + 1e-9)).iloc[-1] if len(prices) >= 20 else 0.0
-
-        return {
-            "vol_7": float(vol_7),
-            "vol_14": float(vol_14),
-            "vol_30": float(vol_30),
-            "velocity": float(velocity),
-            "kurtosis": float(kurt),
-            "hurst": float(hurst),
-            "bb_width": float(bb_width),
-        }
+        hurst = self._hurst_exponent_batch(_start_aligned(series), n_prices)
+
+        return [
+            {
+                "vol_7": float(vols[7][i]),
+                "vol_14": float(vols[14][i]),
+                "vol_30": float(vols[30][i]),
+                "velocity": float(velocity[i]),
+                "kurtosis": float(kurt[i]),
+                "hurst": float(hurst[i]),
+                "bb_width": float(bb_width[i]),
+            }
+            for i in range(len(series))
+        ]
 
     @staticmethod
     def _hurst_exponent(ts: np.ndarray, max_lag: int = 20) -> float:
         """Simplified Hurst exponent via R/S analysis."""
-        if len(ts) < max_lag + 2:
-            return 0.5  # default → random walk
-        lags = range(2, min(max_lag, len(ts) // 2))
-        tau = []
-        for lag in lags:
-            chunks = [ts[i: i + lag] for i in range(0, len(ts) - lag, lag)]
-            rs_values = []
-            for chunk in chunks:
-                if len(chunk) < 2:
-                    continue
-                mean_c = np.mean(chunk)
-                deviations = np.cumsum(chunk - mean_c)
-                r = np.max(deviations) - np.min(deviations)
-                s = np.std(chunk, ddof=1) if np.std(chunk, ddof=1) > 0 else 1e-9
-                rs_values.append(r / s)
-            if rs_values:
-                tau.append(np.mean(rs_values))
-            else:
-                tau.append(1.0)
+        ts = np.asarray(ts, dtype=np.float64)
+        return float(RegimeDetector._hurst_exponent_batch(ts[:, None], max_lag=max_lag)[0])
 
-        if len(tau) < 2:
-            return 0.5
+    @staticmethod
+    def _hurst_exponent_batch(matrix: np.ndarray, lengths: Optional[np.ndarray] = None,
+                              max_lag: int = 20) -> np.ndarray:
+        """
+        ``_hurst_exponent`` of every column of a (time, series) matrix.
 
-        log_lags = np.log(list(lags)[: len(tau)])
-        log_tau = np.log(np.array(tau) + 1e-9)
+        For each lag, the non-overlapping chunks of all columns are one
+        ``(chunks, lag, series)`` reshaped view of the matrix, so the R/S
+        statistic of every chunk is computed without a Python loop. The
+        log R/S vs. log lag slope is a closed-form least-squares fit.
 
-        try:
-            poly = np.polyfit(log_lags, log_tau, 1)
-            return float(np.clip(poly[0], 0.0, 1.0))
-        except Exception:
-            return 0.5
+        Parameters
+        ----------
+        matrix : prices, one series per column, start-aligned (padded
+            at the bottom when series differ in length).
+        lengths : valid rows per column; defaults to all rows.
+
+        Returns
+        -------
+        Hurst exponent per column, clipped to [0, 1]; 0.5 (random walk)
+        where a series is too short or the fit is undefined.
+        """
+        matrix = np.ascontiguousarray(matrix, dtype=np.float64)
+        n_rows, n_series = matrix.shape
+        lengths = np.full(n_series, n_rows) if lengths is None else np.asarray(lengths)
+
+        lags = np.arange(2, min(max_lag, n_rows // 2))
+        # Lags of a column: range(2, min(max_lag, len // 2))
+        used = lags[:, None] < np.minimum(max_lag, lengths // 2)[None, :]
+        log_tau = np.zeros((len(lags), n_series))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for i, lag in enumerate(lags):
+                # Chunks start at 0, lag, ... < len - lag: (len - 1) // lag of them
+                n_chunks = (lengths - 1) // lag
+                k = int(n_chunks.max())
+                chunks = matrix[:k * lag].reshape(k, lag, n_series)
+                deviations = np.cumsum(chunks - chunks.mean(axis=1, keepdims=True), axis=1)
+                r = deviations.max(axis=1) - deviations.min(axis=1)
+                s = chunks.std(axis=1, ddof=1)
+                rs = r / np.where(s > 0, s, 1e-9)
+                valid = np.arange(k)[:, None] < n_chunks[None, :]
+                count = valid.sum(axis=0)
+                tau = np.where(count > 0,
+                               np.where(valid, rs, 0.0).sum(axis=0) / np.maximum(count, 1),
+                               1.0)
+                log_tau[i] = np.log(tau + 1e-9)
+
+            x = np.log(lags)[:, None] * used
+            y = log_tau * used
+            n = used.sum(axis=0)
+            sx, sy = x.sum(axis=0), y.sum(axis=0)
+            slope = (n * (x * y).sum(axis=0) - sx * sy) / (n * (x * x).sum(axis=0) - sx * sx)
+
+        ok = (lengths >= max_lag + 2) & (n >= 2) & np.isfinite(slope)
+        return np.where(ok, np.clip(slope, 0.0, 1.0), 0.5)
 
     # ------------------------------------------------------------------
     # HMM Classification
     # ------------------------------------------------------------------
 
-    def _hmm_classify(self, prices: pd.Series, features: Dict) -> RegimeState:
-        """Fit a Gaussian HMM and classify the latest observation."""
-        returns = prices.pct_change().dropna().values.reshape(-1, 1)
+    def _hmm_classify(self, prices: pd.Series, features: Dict,
+                      previous: Optional[HMMParams] = None) -> RegimeState:
+        """
+        Classify the latest observation with a Gaussian HMM.
 
-        self._hmm.fit(returns)
-        hidden_states = self._hmm.predict(returns)
-        current_state = int(hidden_states[-1])
+        With *previous* parameters whose returns are a prefix of the
+        current ones, the new returns are only forward filtered, unless
+        too many have accumulated or their likelihood shows drift; then
+        EM restarts from *previous* for ``warm_iter`` iterations. Without
+        usable parameters a cold fit runs ``n_iter`` iterations.
+        """
+        returns = _returns(np.asarray(prices, dtype=np.float64)).reshape(-1, 1)
+        return self._hmm_classify_pool([returns], [features], [previous])[0]
+
+    def _hmm_classify_pool(self, returns: List[np.ndarray], features: List[Dict],
+                           previous: List[Optional[HMMParams]]) -> List[RegimeState]:
+        """``_hmm_classify`` for series sharing one HMM (filtered, or fitted jointly)."""
+        params = [self._hmm_filter(prev, r) if prev is not None else None
+                  for r, prev in zip(returns, previous)]
+        if any(p is None for p in params):
+            warm = next((p for p in previous if p is not None), None)
+            params = self._hmm_fit(returns, warm)
+
+        states = []
+        for p, feats in zip(params, features):
+            label_map = p.label_map
+            # Transition probabilities from current state
+            trans_probs = {}
+            for s_idx, prob in enumerate(p.transmat[p.state]):
+                trans_probs[label_map.get(s_idx, f"S{s_idx}")] = round(float(prob), 4)
+
+            feats["hmm_state_raw"] = p.state
+            states.append(RegimeState(
+                regime=label_map.get(p.state, "VOLATILE"),
+                confidence=round(float(p.alpha[p.state]), 4),
+                transition_prob=trans_probs,
+                features=feats,
+                hmm=p,
+            ))
+        return states
+
+    def _hmm_filter(self, previous: HMMParams, returns: np.ndarray) -> Optional[HMMParams]:
+        """
+        *previous* advanced over the returns after ``previous.n_obs`` by
+        forward filtering, or None when a refit is due.
+        """
+        n_old = previous.n_obs
+        if n_old > len(returns) or _fingerprint(returns[:n_old]) != previous.fingerprint:
+            return None
+        new = returns[n_old:]
+        if previous.filtered_obs + len(new) > self.max_filter_obs:
+            return None
+        if len(new) == 0:
+            return previous
+
+        log_b = _emission_logprob(previous.means, previous.covars, new)
+        alpha, loglik, _ = _forward_pass(previous.startprob, previous.transmat, log_b,
+                                         alpha0=previous.alpha)
+        threshold = (previous.loglik_mean
+                     - self.drift_tolerance * previous.loglik_std / np.sqrt(len(new)))
+        if loglik.mean() < threshold:
+            return None
+        return HMMParams(
+            startprob=previous.startprob, transmat=previous.transmat,
+            means=previous.means, covars=previous.covars,
+            label_map=previous.label_map, n_obs=len(returns),
+            fingerprint=_fingerprint(returns), alpha=alpha, state=int(np.argmax(alpha)),
+            loglik_mean=previous.loglik_mean, loglik_std=previous.loglik_std,
+            filtered_obs=previous.filtered_obs + len(new),
+        )
+
+    def _hmm_fit(self, returns: List[np.ndarray],
+                 previous: Optional[HMMParams]) -> List[HMMParams]:
+        """
+        EM fit of one HMM over all *returns* sequences (cold, or warm from
+        *previous*), then one forward / Viterbi pass per sequence.
+        """
+        from hmmlearn.hmm import GaussianHMM
+
+        warm = previous is not None and previous.means.shape == (self.n_states,
+                                                                returns[0].shape[1])
+        hmm = GaussianHMM(
+            n_components=self.n_states,
+            covariance_type="full",
+            n_iter=self.warm_iter if warm else self.n_iter,
+            random_state=42,
+            init_params="" if warm else "stmc",
+            verbose=False,
+        )
+        if warm:
+            hmm.startprob_ = previous.startprob
+            hmm.transmat_ = previous.transmat
+            hmm.means_ = previous.means
+            hmm.covars_ = previous.covars
+        hmm.fit(np.concatenate(returns), lengths=[len(r) for r in returns])
+
+        # Filtered posterior, likelihood and Viterbi path in one pass; the
+        # last filtered posterior is the smoothed one
+        startprob, transmat = hmm.startprob_, hmm.transmat_
+        means, covars = hmm.means_, hmm.covars_
+        passes = [_forward_pass(startprob, transmat, _emission_logprob(means, covars, r),
+                                viterbi=True) for r in returns]
 
         # Map states to labels by volatility (lowest vol → STABLE)
+        all_returns = np.concatenate(returns)
+        hidden_states = np.concatenate([path for _, _, path in passes])
         state_vols = {}
         for s in range(self.n_states):
             mask = hidden_states == s
             if mask.sum() > 0:
-                state_vols[s] = np.std(returns[mask])
+                state_vols[s] = np.std(all_returns[mask])
             else:
                 state_vols[s] = 0.0
 
@@ -192,31 +469,15 @@ class RegimeDetector:
         for idx, s in enumerate(sorted_states):
             label_map[s] = labels[min(idx, len(labels) - 1)]
 
-        regime = label_map.get(current_state, "VOLATILE")
-
-        # Transition probabilities from current state
-        trans_probs = {}
-        try:
-            transmat = self._hmm.transmat_[current_state]
-            for s_idx, prob in enumerate(transmat):
-                trans_probs[label_map.get(s_idx, f"S{s_idx}")] = round(float(prob), 4)
-        except Exception:
-            trans_probs = {"STABLE": 0.33, "VOLATILE": 0.34, "CRISIS": 0.33}
-
-        # Confidence: posterior probability of being in this state
-        try:
-            posteriors = self._hmm.predict_proba(returns)
-            confidence = float(posteriors[-1][current_state])
-        except Exception:
-            confidence = 0.6
-
-        features["hmm_state_raw"] = current_state
-        return RegimeState(
-            regime=regime,
-            confidence=round(confidence, 4),
-            transition_prob=trans_probs,
-            features=features,
-        )
+        return [
+            HMMParams(
+                startprob=startprob, transmat=transmat, means=means, covars=covars,
+                label_map=label_map, n_obs=len(r), fingerprint=_fingerprint(r),
+                alpha=alpha, state=int(path[-1]),
+                loglik_mean=float(loglik.mean()), loglik_std=float(loglik.std()),
+            )
+            for r, (alpha, loglik, path) in zip(returns, passes)
+        ]
 
     # ------------------------------------------------------------------
     # Rule-Based Fallback
@@ -247,3 +508,116 @@ class RegimeDetector:
             transition_prob={"STABLE": 0.6, "VOLATILE": 0.3, "CRISIS": 0.1},
             features=features,
         )
+
+
+# ---------------------------------------------------------------------------
+# Array helpers
+# ---------------------------------------------------------------------------
+
+def _returns(prices: np.ndarray) -> np.ndarray:
+    """Daily returns with NaNs dropped (``pct_change().dropna()``)."""
+    returns = indicators.pct_change(prices)
+    return returns[~np.isnan(returns)]
+
+
+def _start_aligned(arrays: Sequence[np.ndarray]) -> np.ndarray:
+    """(longest length, n arrays) matrix with every array starting on the first row."""
+    matrix = np.full((max((len(a) for a in arrays), default=0), len(arrays)), np.nan)
+    for j, a in enumerate(arrays):
+        matrix[:len(a), j] = a
+    return matrix
+
+
+def _end_aligned(arrays: Sequence[np.ndarray]) -> np.ndarray:
+    """(longest length, n arrays) matrix with every array ending on the last row."""
+    matrix = np.full((max((len(a) for a in arrays), default=0), len(arrays)), np.nan)
+    for j, a in enumerate(arrays):
+        if len(a):
+            matrix[len(matrix) - len(a):, j] = a
+    return matrix
+
+
+def _excess_kurtosis(matrix: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Column-wise bias-corrected excess kurtosis, as ``Series.kurtosis``."""
+    n = counts.astype(np.float64)
+    deviation = matrix - np.nansum(matrix, axis=0) / n
+    m2 = np.nansum(deviation ** 2, axis=0)
+    m4 = np.nansum(deviation ** 4, axis=0)
+    numerator = n * (n + 1) * (n - 1) * m4
+    denominator = (n - 2) * (n - 3) * m2 ** 2
+    numerator[np.abs(numerator) < 1e-14] = 0.0
+    denominator[np.abs(denominator) < 1e-14] = 0.0
+    kurt = numerator / denominator - 3 * (n - 1) ** 2 / ((n - 2) * (n - 3))
+    kurt[denominator == 0] = 0.0
+    kurt[n < 4] = np.nan
+    return kurt
+
+
+# ---------------------------------------------------------------------------
+# HMM inference
+# ---------------------------------------------------------------------------
+
+def _fingerprint(returns: np.ndarray) -> str:
+    return hashlib.blake2b(np.ascontiguousarray(returns).tobytes(),
+                           digest_size=16).hexdigest()
+
+
+def _emission_logprob(means: np.ndarray, covars: np.ndarray, X: np.ndarray) -> np.ndarray:
+    """(n_obs, n_states) Gaussian log-densities of *X* under each state."""
+    n_dim = X.shape[1]
+    log_b = np.empty((len(X), len(means)))
+    for k, (mean, cov) in enumerate(zip(means, covars)):
+        chol = np.linalg.cholesky(cov)
+        z = np.linalg.solve(chol, (X - mean).T)
+        log_det = 2.0 * np.log(np.diag(chol)).sum()
+        log_b[:, k] = -0.5 * (n_dim * np.log(2 * np.pi) + log_det + (z * z).sum(axis=0))
+    return log_b
+
+
+def _forward_pass(startprob: np.ndarray, transmat: np.ndarray, log_b: np.ndarray,
+                  alpha0: Optional[np.ndarray] = None, viterbi: bool = False):
+    """
+    One pass over the observations: scaled forward filtering (and,
+    optionally, the Viterbi recursion alongside it).
+
+    Parameters
+    ----------
+    alpha0 : filtered probabilities before the first observation; the
+        first step then transitions from them instead of ``startprob``.
+
+    Returns
+    -------
+    (filtered probabilities after the last observation,
+     per-observation predictive log-likelihoods, Viterbi path or None)
+    """
+    n_obs, n_states = log_b.shape
+    shift = log_b.max(axis=1, keepdims=True)
+    b = np.exp(log_b - shift)
+    with np.errstate(divide="ignore"):
+        log_a = np.log(transmat)
+        log_pi = np.log(startprob)
+
+    alpha = startprob if alpha0 is None else alpha0 @ transmat
+    loglik = shift[:, 0].copy()
+    if viterbi:
+        backpointers = np.empty((n_obs, n_states), dtype=np.intp)
+        delta = (log_pi if alpha0 is None else np.log(alpha)) + log_b[0]
+    for t in range(n_obs):
+        if t:
+            alpha = alpha @ transmat
+            if viterbi:
+                scores = delta[:, None] + log_a
+                backpointers[t] = scores.argmax(axis=0)
+                delta = scores.max(axis=0) + log_b[t]
+        alpha = alpha * b[t]
+        scale = alpha.sum()
+        alpha = alpha / scale
+        loglik[t] += np.log(scale)
+
+    path = None
+    if viterbi:
+        path = np.empty(n_obs, dtype=np.intp)
+        path[-1] = delta.argmax()
+        for t in range(n_obs - 1, 0, -1):
+            path[t - 1] = backpointers[t, path[t]]
+    return alpha, loglik, path
@@ -0,0 +1,126 @@
+"""
+RACE Resource Governor — Library Thread Budgets
+================================================
+XGBoost, LightGBM and CatBoost each default to every core, and so do
+the BLAS pools behind NumPy / SciPy (sklearn, statsmodels, hmmlearn).
+A few forecasts running side by side then put cores x forecasts x fits
+threads on the box. This module makes one decision for all of them:
+
+    cpus                  cores this process may use (CPU affinity;
+                          ``AGRIINTEL_CPUS`` overrides)
+    workers               forecasts run concurrently by the caller
+                          (``AGRIINTEL_FORECAST_WORKERS``, default 1)
+    cores_per_forecast    cpus // workers
+    fit_jobs()            concurrent fits inside one forecast
+                          (CV folds x members), min(4, cores_per_forecast)
+    library_threads(n)    threads of each fit when n run at once,
+                          cores_per_forecast // n
+
+``RACEForecaster``, the ``model_zoo`` forecasters and the legacy path
+of ``ForecastingAgent`` read their thread counts from here; BLAS pools
+are capped at ``cores_per_forecast`` through ``threadpoolctl`` when it
+is installed. Code that runs several forecasts at once declares it:
+
+    resources.configure(workers=4)          # before building forecasters
+
+Usage
+-----
+    config = resources.get_config()
+    config.fit_jobs()                       # 4 on a 16-core box, 1 worker
+    config.library_threads(config.fit_jobs())   # 4
+"""
+
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+MAX_FIT_JOBS = 4
+
+
+@dataclass(frozen=True)
+class ResourceConfig:
+    """Core budget of the process and how many forecasts share it."""
+    cpus: int
+    workers: int = 1
+
+    @property
+    def cores_per_forecast(self) -> int:
+        return max(1, self.cpus // max(1, self.workers))
+
+    def fit_jobs(self, n_jobs: Optional[int] = None) -> int:
+        """Concurrent fits of one forecast (*n_jobs* if given)."""
+        if n_jobs is not None:
+            return max(1, n_jobs)
+        return max(1, min(MAX_FIT_JOBS, self.cores_per_forecast))
+
+    def library_threads(self, n_jobs: int = 1) -> int:
+        """Threads per model fit / predict when *n_jobs* fits run at once."""
+        return max(1, self.cores_per_forecast // max(1, n_jobs))
+
+
+_CONFIG: Optional[ResourceConfig] = None
+_LOCK = threading.Lock()
+
+
+def available_cpus() -> int:
+    """Cores the process may run on: ``AGRIINTEL_CPUS``, else its CPU affinity."""
+    env = os.environ.get("AGRIINTEL_CPUS")
+    if env:
+        try:
+            return max(1, int(env))
+        except ValueError:
+            logger.warning(f"Ignoring invalid AGRIINTEL_CPUS={env!r}")
+    try:
+        return max(1, len(os.sched_getaffinity(0)))
+    except (AttributeError, OSError):
+        return os.cpu_count() or 1
+
+
+def get_config() -> ResourceConfig:
+    """The process-wide configuration, created from the environment on first use."""
+    global _CONFIG
+    with _LOCK:
+        if _CONFIG is None:
+            try:
+                workers = int(os.environ.get("AGRIINTEL_FORECAST_WORKERS", "1"))
+            except ValueError:
+                workers = 1
+            _CONFIG = ResourceConfig(cpus=available_cpus(), workers=max(1, workers))
+            _limit_blas(_CONFIG.cores_per_forecast)
+        return _CONFIG
+
+
+def configure(cpus: Optional[int] = None, workers: Optional[int] = None) -> ResourceConfig:
+    """
+    Replace the process-wide configuration; unset arguments keep their
+    current value. Forecasters built afterwards use the new budget.
+    """
+    global _CONFIG
+    current = get_config()
+    with _LOCK:
+        _CONFIG = ResourceConfig(
+            cpus=max(1, cpus if cpus is not None else current.cpus),
+            workers=max(1, workers if workers is not None else current.workers),
+        )
+        _limit_blas(_CONFIG.cores_per_forecast)
+        return _CONFIG
+
+
+def _limit_blas(threads: int) -> None:
+    """
+    Cap the BLAS pools loaded so far (NumPy / SciPy OpenBLAS or MKL).
+    OpenMP pools are left alone: the boosting libraries get explicit
+    thread counts instead.
+    """
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        return
+    try:
+        threadpool_limits(limits=threads, user_api="blas")
+    except Exception as e:
+        logger.debug(f"BLAS thread limit not applied: {e}")
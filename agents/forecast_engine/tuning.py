@@ -0,0 +1,255 @@
+"""
+RACE Hyperparameter Tuning — Successive Halving per Commodity
+==============================================================
+Offline search over the hyperparameters of the boosting members,
+pooled over every mandi series of a commodity, so tuning cost lives in
+a batch job instead of the request path.
+
+Candidates are scored with the ensemble's own expanding-window CV
+(``RACEForecaster._cv_jobs`` / ``_score_cv``): the MAPE of a
+configuration is the mean over all folds of all series. Successive
+halving starts ``n_configs`` sampled configurations on ``min_rounds``
+boosting rounds and promotes the best ``1 / eta`` of every rung to
+``eta`` times more rounds, until one configuration is left, the rounds
+reach ``max_rounds`` or the compute budget is spent. All fits of a
+rung run concurrently; a rung cut short by the budget is discarded.
+
+The library defaults compete as one of the candidates and are also
+scored at their usual number of rounds, so a stored winner is never
+worse than the fixed parameters on CV.
+
+Usage
+-----
+    tuner = SuccessiveHalvingTuner(budget_seconds=600)
+    results = tuner.tune(histories)        # [price history DataFrame, ...]
+    results["XGBoost"].params              # {"max_depth": 4, ..., "n_estimators": 90}
+
+``etl/model_tuning.py`` runs this per commodity and writes the winners
+to the ``model_params`` table, which ``RACEForecaster`` reads at fit
+time through ``member_params``.
+"""
+
+import logging
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .ensemble import RACEForecaster, DEFAULT_MEMBERS, _TrainingMatrix
+from .feature_factory import FeatureFactory
+
+logger = logging.getLogger(__name__)
+
+
+class Real(NamedTuple):
+    """Continuous search dimension, sampled uniformly (in log space if *log*)."""
+    low: float
+    high: float
+    log: bool = False
+
+
+# Tuples are categorical choices
+SEARCH_SPACES: Dict[str, Dict] = {
+    "XGBoost": {
+        "max_depth": (3, 4, 5, 6, 8),
+        "learning_rate": Real(0.02, 0.3, log=True),
+        "subsample": (0.6, 0.7, 0.8, 0.9, 1.0),
+        "colsample_bytree": (0.5, 0.7, 0.8, 1.0),
+        "min_child_weight": (1, 3, 5, 10),
+        "reg_lambda": Real(0.1, 10.0, log=True),
+    },
+    "LightGBM": {
+        "num_leaves": (7, 15, 31, 63),
+        "max_depth": (-1, 4, 5, 6, 8),
+        "learning_rate": Real(0.02, 0.3, log=True),
+        "min_child_samples": (5, 10, 20, 40),
+        "colsample_bytree": (0.5, 0.7, 0.8, 1.0),
+        "reg_lambda": Real(0.1, 10.0, log=True),
+    },
+    "CatBoost": {
+        "depth": (4, 5, 6, 8),
+        "learning_rate": Real(0.02, 0.3, log=True),
+        "l2_leaf_reg": Real(1.0, 10.0, log=True),
+    },
+}
+
+
+def sample_config(space: Dict, rng: np.random.Generator) -> Dict:
+    """One random configuration from a search space."""
+    config = {}
+    for name, dim in space.items():
+        if isinstance(dim, Real):
+            if dim.log:
+                value = math.exp(rng.uniform(math.log(dim.low), math.log(dim.high)))
+            else:
+                value = rng.uniform(dim.low, dim.high)
+            config[name] = round(float(value), 5)
+        else:
+            config[name] = dim[int(rng.integers(len(dim)))]
+            if isinstance(config[name], np.generic):
+                config[name] = config[name].item()
+    return config
+
+
+@dataclass
+class TuningResult:
+    """Winner of one member's search."""
+    member: str
+    params: Dict                 # library params + "n_estimators"
+    cv_mape: float
+    default_mape: float          # library defaults at their usual rounds
+    configs_evaluated: int
+    seconds: float
+    completed: bool              # False if the budget cut the search short
+
+
+class SuccessiveHalvingTuner:
+    """Successive-halving search over RACE member hyperparameters."""
+
+    def __init__(self, n_configs: int = 27, eta: int = 3, min_rounds: int = 30,
+                 max_rounds: int = 300, n_splits: int = 3,
+                 budget_seconds: float = 600.0, n_jobs: Optional[int] = None,
+                 seed: int = 42):
+        """
+        Parameters
+        ----------
+        n_configs : configurations in the first rung (defaults included).
+        eta : keep the best ``1 / eta`` per rung, ``eta`` x rounds for them.
+        min_rounds, max_rounds : boosting rounds of the first / last rung.
+        n_splits : expanding-window CV folds per series.
+        budget_seconds : wall-clock budget of one ``tune`` call, split
+            evenly over the members.
+        n_jobs : concurrent fits (see ``RACEForecaster``).
+        """
+        self.n_configs = max(1, n_configs)
+        self.eta = max(2, eta)
+        self.min_rounds = min_rounds
+        self.max_rounds = max(min_rounds, max_rounds)
+        self.n_splits = n_splits
+        self.budget_seconds = budget_seconds
+        self.seed = seed
+        # CV plumbing and member construction of the ensemble itself
+        self._race = RACEForecaster(n_jobs=n_jobs)
+
+    # ----- Public API -----
+
+    def tune(self, histories: Sequence[pd.DataFrame], commodity: str = "Unknown",
+             members: Sequence[str] = DEFAULT_MEMBERS) -> Dict[str, TuningResult]:
+        """
+        Tune *members* on the price histories of one commodity.
+
+        Returns {member name: TuningResult} for members that are
+        installed, have a search space and scored at least one
+        configuration within their share of the budget.
+        """
+        matrices = self.training_matrices(histories, commodity)
+        if not matrices:
+            return {}
+        members = [name for name in members
+                   if name in SEARCH_SPACES and self._race._create_member(name).available]
+        start = time.perf_counter()
+        results = {}
+        for i, name in enumerate(members):
+            deadline = start + self.budget_seconds * (i + 1) / len(members)
+            result = self._tune_member(name, matrices, deadline)
+            if not math.isfinite(result.cv_mape):
+                logger.warning(f"{commodity}/{name}: budget too small to score any configuration")
+                continue
+            results[name] = result
+            logger.info(f"{commodity}/{name}: CV MAPE {result.cv_mape:.3f} "
+                        f"(defaults {result.default_mape:.3f})")
+        return results
+
+    @staticmethod
+    def training_matrices(histories: Sequence[pd.DataFrame],
+                          commodity: str) -> List[_TrainingMatrix]:
+        """RACE training matrices of the histories long enough for CV."""
+        matrices = []
+        for data in histories:
+            if len(data) < 40:
+                continue
+            data = RACEForecaster._sorted(data)
+            factory = FeatureFactory(commodity=commodity)
+            featured = factory.build_features(data, target_col="price")
+            cols = factory.get_feature_columns(featured)
+            matrices.append(_TrainingMatrix(featured[cols].values, featured["price"].values))
+        return matrices
+
+    # ----- Search -----
+
+    def _tune_member(self, name: str, matrices: List[_TrainingMatrix],
+                     deadline: float) -> TuningResult:
+        start = time.perf_counter()
+        rng = np.random.default_rng(self.seed)
+        defaults = self._race._create_member(name)
+        configs = [{}] + [sample_config(SEARCH_SPACES[name], rng)
+                          for _ in range(self.n_configs - 1)]
+        evaluated = len(configs)
+
+        default_mape = self._run_rung(name, [{}], defaults.n_estimators, matrices, deadline)
+        default_mape = default_mape[0] if default_mape is not None else math.inf
+        best = (default_mape, {}, defaults.n_estimators)
+
+        rounds, completed = self.min_rounds, True
+        while True:
+            scores = self._run_rung(name, configs, rounds, matrices, deadline)
+            if scores is None:
+                completed = False
+                break
+            order = np.argsort(scores, kind="stable")
+            if scores[order[0]] < best[0]:
+                best = (float(scores[order[0]]), configs[order[0]], rounds)
+            if len(configs) == 1 or rounds >= self.max_rounds:
+                break
+            configs = [configs[i] for i in order[:max(1, len(configs) // self.eta)]]
+            rounds = min(self.max_rounds, rounds * self.eta)
+
+        mape, params, n_rounds = best
+        return TuningResult(
+            member=name,
+            params={**params, "n_estimators": int(n_rounds)},
+            cv_mape=float(mape),
+            default_mape=float(default_mape),
+            configs_evaluated=evaluated,
+            seconds=round(time.perf_counter() - start, 2),
+            completed=completed,
+        )
+
+    def _run_rung(self, name: str, configs: List[Dict], rounds: int,
+                  matrices: List[_TrainingMatrix], deadline: float) -> Optional[List[float]]:
+        """
+        Mean CV MAPE of every configuration at *rounds* boosting rounds,
+        or None if the deadline passed before all fits finished.
+        """
+        race = self._race
+        stop = threading.Event()
+        pool = ThreadPoolExecutor(max_workers=race.n_jobs)
+        try:
+            runs = []
+            for params in configs:
+                member = race._create_member(name, {**params, "n_estimators": rounds})
+                for matrix in matrices:
+                    jobs = race._cv_jobs(matrix, [member], self.n_splits)
+                    futures = [pool.submit(race._fit_one, m.spawn(), train, valid, stop)
+                               if train is not None else None
+                               for m, train, valid, _ in jobs or ()]
+                    runs.append((member, matrix, jobs, futures))
+
+            pending = [f for *_, futures in runs for f in futures if f is not None]
+            done, not_done = wait(pending, timeout=max(0.0, deadline - time.perf_counter()))
+            if not_done:
+                return None
+
+            per_config: List[List[float]] = [[] for _ in configs]
+            for i, (member, matrix, jobs, futures) in enumerate(runs):
+                scores, _ = race._score_cv(matrix, [member], jobs, futures)
+                per_config[i // len(matrices)].append(scores[member.name])
+            return [float(np.mean(s)) for s in per_config]
+        finally:
+            stop.set()
+            pool.shutdown(wait=True, cancel_futures=True)
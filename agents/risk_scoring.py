@@ -10,7 +10,8 @@ class MarketRiskEngine:
         pass
 
     def calculate_risk_score(self, shock_info: dict, forecast_std: float, market_volatility: float, 
-                           sentiment_score: float = 0, arrival_anomaly: float = 0, weather_risk: float = 0) -> dict:
+                           sentiment_score: float = 0, arrival_anomaly: float = 0, weather_risk: float = 0,
+                           regime: str = None) -> dict:
         """
         Decomposes risk into 4 components:
         1. Volatility (Price instability)
@@ -18,6 +19,9 @@ class MarketRiskEngine:
         3. Sentiment (Market mood)
         4. External Factors (Arrivals + Weather)
         
+        regime: the pair's classified regime (e.g. from the daily
+        regime_snapshots table); estimated from volatility when omitted.
+
         Returns Total Score (0-100) and Breakdown.
         """
         # 1. Volatility Risk (0-30 pts)
@@ -53,7 +57,8 @@ class MarketRiskEngine:
         return {
             "risk_score": int(total_score),
             "risk_level": risk_level,
-            "regime": self.determine_regime(market_volatility, shock_info.get('is_shock', False)),
+            "regime": regime.title() if regime else
+                      self.determine_regime(market_volatility, shock_info.get('is_shock', False)),
             "breakdown": {
                 "Volatility": int(vol_risk),
                 "Market Shocks": int(shock_risk),
@@ -175,7 +175,9 @@ def load_agents():
         "profile": UserProfileAgent(user_id=user_email), # Personalized
         "decision": DecisionAgent(),
         "risk": MarketRiskEngine(),
-        "forecast": ForecastingAgent(),
+        # Dashboard forecasts keep whatever RACE members fit in the budget
+        "forecast": ForecastingAgent(
+            latency_budget=float(os.environ.get("AGRIINTEL_FORECAST_BUDGET", "3"))),
         "explain": AIExplanationAgent(),
         "intel": IntelligenceAgent(),
         "lang": LanguageManager(),
@@ -225,7 +227,7 @@ def run_forecasting_agent(data, commodity, mandi):
     return agent.generate_forecasts(data, commodity, mandi)
 
 @st.cache_data(ttl=600)
-def run_shock_risk_agents(data, forecast_df, sentiment_score, arrival_anomaly, weather_risk):
+def run_shock_risk_agents(data, forecast_df, sentiment_score, arrival_anomaly, weather_risk, regime=None):
     # shock_agent = AnomalyDetectionEngine() # Removed as agents dict is used
     # risk_agent = MarketRiskEngine() # Removed as agents dict is used
     
@@ -236,7 +238,8 @@ def run_shock_risk_agents(data, forecast_df, sentiment_score, arrival_anomaly, w
         data['price'].pct_change().std(),
         sentiment_score,
         arrival_anomaly,
-        weather_risk
+        weather_risk,
+        regime=regime,
     )
     
     return shock_info, risk_info
@@ -320,8 +323,15 @@ with st.spinner("Analyzing Market Intelligence & Executing ML Projections..."):
         if w['temperature'] > 40 or w['rainfall'] > 50:
             weather_risk = 1.0
 
+    # 4. Market Regime (daily snapshot written by the swarm)
     try:
-        shock_info, risk_info = run_shock_risk_agents(data, forecast_df, sentiment_score, arrival_anomaly, weather_risk) 
+        regime_snapshot = db_manager.get_regime_snapshot(selected_commodity, selected_mandi, as_of=last_date)
+    except Exception:
+        regime_snapshot = None
+    snapshot_regime = regime_snapshot["regime"] if regime_snapshot else None
+
+    try:
+        shock_info, risk_info = run_shock_risk_agents(data, forecast_df, sentiment_score, arrival_anomaly, weather_risk, snapshot_regime) 
     except Exception:
         shock_info = {"is_shock": False, "severity": "None", "details": "", "shocks": []}
         risk_info = {"risk_score": 0, "risk_level": "Low", "regime": "Unknown", "explanation_tags": [], "breakdown": {}}
@@ -1172,7 +1182,9 @@ try:
             # Display RACE metadata if available
             try:
                 forecast_agent = agents.get("forecast") or ForecastingAgent()
-                race_result = forecast_agent.get_last_result()
+                # Served from the agent's result cache when run_forecasting_agent
+                # already trained on this data.
+                race_result = forecast_agent.get_race_result(data, selected_commodity, selected_mandi)
             except Exception:
                 race_result = None
 
@@ -1208,9 +1220,13 @@ try:
                         </div>
                     """, unsafe_allow_html=True)
 
+                skipped = race_result.metadata.get("members_skipped")
+                if skipped:
+                    st.caption(f"Not trained within the latency budget: {', '.join(skipped)}")
+
                 # Confidence score
-                st.metric("Overall Confidence", f"{race_result.confidence_score:.0f}/100")
-                st.caption(f"Version: {race_result.model_version}")
+                st.metric("Overall Confidence", f"{race_result.confidence * 100:.0f}/100")
+                st.caption(f"Version: {race_result.metadata.get('model_version', 'RACE v3.0')}")
             else:
                 st.info("RACE model card loads after forecast execution.")
                 st.caption("Run a forecast to populate model metadata.")
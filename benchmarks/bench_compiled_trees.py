@@ -0,0 +1,77 @@
+"""
+Compiled Tree Scoring Benchmark
+===============================
+Per-call latency of native XGBoost / LightGBM / CatBoost ``predict`` vs.
+the compiled NumPy evaluator (``compiled_trees``) for 1-row and
+10k-row batches, plus the export cost and max absolute difference.
+
+Usage:
+    python benchmarks/bench_compiled_trees.py --features 40 --repeats 200
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# Ensure workspace root is in path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.forecast_engine.ensemble import (
+    _TrainingMatrix, _XGBModel, _LGBModel, _CatModel,
+)
+from agents.forecast_engine.compiled_trees import compile_member
+
+
+def per_call(fn, X, repeats: int) -> float:
+    """Median seconds per call of ``fn(X)``."""
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn(X)
+        times.append(time.perf_counter() - t0)
+    return float(np.median(times))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--features", type=int, default=40)
+    parser.add_argument("--train-rows", type=int, default=365)
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    X = rng.normal(size=(args.train_rows, args.features))
+    y = 2000 + X @ rng.normal(size=args.features) * 50
+    matrix = _TrainingMatrix(X, y)
+    one_row = rng.normal(size=(1, args.features))
+    batch = rng.normal(size=(10_000, args.features))
+
+    print(f"Tree scoring — {args.features} features, median of {args.repeats} "
+          f"(10k-row: {max(1, args.repeats // 20)})")
+    print(f"{'member':<10}{'export ms':>10}{'1-row native us':>17}{'compiled us':>13}"
+          f"{'10k native ms':>15}{'compiled ms':>13}{'max |diff|':>12}")
+    for cls in (_XGBModel, _LGBModel, _CatModel):
+        member = cls(n_threads=1)
+        if not member.available:
+            continue
+        member.fit(matrix.container(member.library))
+
+        t0 = time.perf_counter()
+        compiled = compile_member(member)
+        export_s = time.perf_counter() - t0
+
+        big_repeats = max(1, args.repeats // 20)
+        diff = np.abs(member._predict_native(batch) - compiled.predict(batch)).max()
+        print(f"{member.name:<10}{export_s * 1e3:>10.1f}"
+              f"{per_call(member._predict_native, one_row, args.repeats) * 1e6:>17.0f}"
+              f"{per_call(compiled.predict, one_row, args.repeats) * 1e6:>13.0f}"
+              f"{per_call(member._predict_native, batch, big_repeats) * 1e3:>15.1f}"
+              f"{per_call(compiled.predict, batch, big_repeats) * 1e3:>13.1f}"
+              f"{diff:>12.2e}")
+
+
+if __name__ == "__main__":
+    main()
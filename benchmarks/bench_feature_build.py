@@ -0,0 +1,89 @@
+"""
+Feature Build Benchmark
+=======================
+FeatureFactory.build_features time per STL mode for
+  - a cold build of a fresh series,
+  - a warm rebuild of the same series (STL cache hit),
+  - a 30-step recursive extension (one row appended per build, as in
+    RACEForecaster._recursive_forecast),
+and the max |diff| of the last row's STL trend vs. the robust build.
+
+Usage:
+    python benchmarks/bench_feature_build.py --days 365 730
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Ensure workspace root is in path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.forecast_engine.feature_factory import FeatureFactory, STL_MODES, _STL_CACHE
+
+
+def make_series(days: int, seed: int = 42) -> pd.DataFrame:
+    """Seeded random-walk price history with weekly seasonality."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(days)
+    return pd.DataFrame({
+        "date": pd.date_range("2020-01-01", periods=days),
+        "price": 2000 + np.cumsum(rng.normal(0, 30, days)) + 40 * np.sin(2 * np.pi * t / 30),
+        "arrival": rng.integers(100, 500, days),
+    })
+
+
+def recursive_builds(factory: FeatureFactory, data: pd.DataFrame, steps: int):
+    """Append one placeholder row per step and rebuild, like the recursive forecast."""
+    current = data
+    last_trends = []
+    for i in range(1, steps + 1):
+        next_row = pd.DataFrame([{
+            "date": data["date"].iloc[-1] + pd.Timedelta(days=i),
+            "price": current["price"].iloc[-1],
+            "arrival": current["arrival"].iloc[-1],
+        }])
+        current = pd.concat([current, next_row], ignore_index=True)
+        last_trends.append(factory.build_features(current)["stl_trend"].iloc[-1])
+    return np.array(last_trends)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--days", type=int, nargs="+", default=[365, 730])
+    parser.add_argument("--steps", type=int, default=30)
+    args = parser.parse_args()
+
+    print(f"{'days':>6}{'mode':>10}{'cold (s)':>10}{'warm (s)':>10}"
+          f"{f'{args.steps}-step (s)':>14}{'max |trend diff|':>18}")
+    for days in args.days:
+        data = make_series(days)
+        reference = None
+        for mode in STL_MODES:
+            _STL_CACHE.clear()
+            factory = FeatureFactory(commodity="Onion", stl_mode=mode)
+
+            t0 = time.perf_counter()
+            factory.build_features(data)
+            cold = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            factory.build_features(data)
+            warm = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            trends = recursive_builds(factory, data, args.steps)
+            steps = time.perf_counter() - t0
+
+            if reference is None:
+                reference = trends
+            diff = float(np.abs(trends - reference).max())
+            print(f"{days:>6}{mode:>10}{cold:>10.3f}{warm:>10.3f}{steps:>14.3f}{diff:>18.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+RACE Forecast Latency Benchmark
+===============================
+End-to-end ``RACEForecaster.forecast`` latency and competitive-CV stage
+time for sequential vs. concurrent CV, with and without early stopping.
+
+Usage:
+    python benchmarks/bench_race_forecast.py --days 365 --repeats 3
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Ensure workspace root is in path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.forecast_engine.ensemble import (
+    RACEForecaster, _TrainingMatrix, _XGBModel, _LGBModel, _CatModel,
+)
+from agents.forecast_engine.feature_factory import FeatureFactory
+
+
+def make_series(days: int, seed: int = 42) -> pd.DataFrame:
+    """Seeded random-walk price history."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "date": pd.date_range("2020-01-01", periods=days),
+        "price": 2000 + np.cumsum(rng.normal(0, 30, days)),
+        "arrival": rng.integers(100, 500, days),
+    })
+
+
+def time_config(data: pd.DataFrame, repeats: int, **kwargs) -> dict:
+    forecaster = RACEForecaster(**kwargs)
+
+    factory = FeatureFactory(commodity="Onion")
+    featured = factory.build_features(data)
+    cols = factory.get_feature_columns(featured)
+    matrix = _TrainingMatrix(featured[cols].values, featured["price"].values)
+
+    cv_times, total_times = [], []
+    for _ in range(repeats):
+        forecaster.models = [
+            cls(early_stopping_rounds=forecaster.early_stopping_rounds,
+                n_threads=forecaster.n_threads)
+            for cls in (_XGBModel, _LGBModel, _CatModel)
+        ]
+        t0 = time.perf_counter()
+        forecaster._competitive_cv(matrix, n_splits=3)
+        cv_times.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        forecaster.forecast(data, "Onion", "Agra", horizon=30)
+        total_times.append(time.perf_counter() - t0)
+
+    return {
+        "cv_s": float(np.median(cv_times)),
+        "forecast_s": float(np.median(total_times)),
+        "trees": {m.name: m.n_estimators for m in forecaster.models},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    data = make_series(args.days)
+    cpu = os.cpu_count() or 1
+    configs = {
+        "sequential": dict(n_jobs=1),
+        f"parallel(n_jobs={min(4, cpu)})": dict(n_jobs=min(4, cpu)),
+        "sequential+early_stop": dict(n_jobs=1, early_stopping_rounds=15),
+        "parallel+early_stop": dict(n_jobs=min(4, cpu), early_stopping_rounds=15),
+    }
+
+    print(f"RACE forecast latency — {args.days} days, {cpu} CPUs, "
+          f"median of {args.repeats}")
+    print(f"{'config':<28}{'CV (s)':>10}{'forecast (s)':>14}  final trees")
+    for label, kwargs in configs.items():
+        res = time_config(data, args.repeats, **kwargs)
+        print(f"{label:<28}{res['cv_s']:>10.3f}{res['forecast_s']:>14.3f}  {res['trees']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+"""
+Forecast Engine Benchmark Suite
+===============================
+Reproducible per-stage numbers for the RACE forecast engine on seeded
+synthetic price histories:
+
+  series stages, one history per length in --days
+    build_features       FeatureFactory.build_features (cold STL cache)
+    detect_regime        RegimeDetector.detect_regime (cold HMM fit)
+    competitive_cv       RACEForecaster._competitive_cv, 3 folds
+    recursive_forecast   RACEForecaster._recursive_forecast, fitted members
+    forecast             RACEForecaster.forecast, end to end
+  universe stages, --universe series of --universe-days each
+    features_panel       FeatureFactory.build_features_panel
+    regimes_batch        RegimeDetector.detect_regimes_batch (pooled HMM)
+    forecast_many        RACEForecaster.forecast_many
+
+Every stage reports the median wall time of --repeats timed runs
+(after one untimed warm-up run), then one extra run under
+``tracemalloc`` for memory: ``peak_kb`` is the peak of Python-visible
+allocations (NumPy buffers included, native library internals not)
+above the level before the run, ``retained_kb`` / ``retained_blocks``
+what the run left allocated. Tracing is off while timing.
+
+``--save`` writes the results as JSON; ``--baseline`` compares against
+a saved file and exits with status 1 when a stage got slower (or its
+peak memory grew) by more than --tolerance.
+
+Usage:
+    python benchmarks/bench_suite.py --save bench_baseline.json
+    python benchmarks/bench_suite.py --baseline bench_baseline.json
+    python benchmarks/bench_suite.py --days 90 365 --universe 10 --stages build_features forecast
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, NamedTuple
+
+import numpy as np
+import pandas as pd
+
+# Ensure workspace root is in path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.forecast_engine.ensemble import RACEForecaster, _TrainingMatrix
+from agents.forecast_engine.feature_factory import FeatureFactory, _STL_CACHE
+from agents.forecast_engine.regime_detector import RegimeDetector
+
+COMMODITIES = ["Onion", "Potato", "Tomato", "Wheat", "Rice"]
+
+
+# ---------------------------------------------------------------------------
+# Seeded synthetic prices
+# ---------------------------------------------------------------------------
+
+def make_series(days: int, seed: int = 42, commodity: str = "Onion",
+                mandi: str = "Agra") -> pd.DataFrame:
+    """
+    Random-walk price history with a 30-day season, rare shocks and
+    arrivals falling as prices rise.
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(days)
+    shocks = rng.normal(0, 250, days) * (rng.random(days) < 0.01)
+    price = 2000 + np.cumsum(rng.normal(0, 30, days) + shocks) \
+        + 60 * np.sin(2 * np.pi * t / 30)
+    price = np.maximum(price, 100.0)
+    arrival = np.maximum(10, 400 - 0.05 * (price - 2000) + rng.normal(0, 60, days))
+    return pd.DataFrame({
+        "date": pd.date_range("2015-01-01", periods=days),
+        "price": price,
+        "price_min": price - rng.uniform(50, 150, days),
+        "price_max": price + rng.uniform(50, 150, days),
+        "arrival": arrival.round(),
+        "commodity": commodity,
+        "mandi": mandi,
+    })
+
+
+def make_universe(n_series: int, days: int, seed: int = 42) -> List[pd.DataFrame]:
+    """*n_series* histories spread over a few commodities, one seed each."""
+    return [make_series(days, seed + i, COMMODITIES[i % len(COMMODITIES)], f"Mandi{i}")
+            for i in range(n_series)]
+
+
+# ---------------------------------------------------------------------------
+# Stages: setup(input) -> timed callable
+# ---------------------------------------------------------------------------
+
+def _build_features(data):
+    factory = FeatureFactory(commodity="Onion")
+
+    def run():
+        _STL_CACHE.clear()
+        return factory.build_features(data)
+    return run
+
+
+def _detect_regime(data):
+    return lambda: RegimeDetector().detect_regime(data["price"])
+
+
+def _fitted_forecaster(data):
+    forecaster = RACEForecaster()
+    factory = FeatureFactory(commodity="Onion")
+    featured = factory.build_features(data)
+    cols = factory.get_feature_columns(featured)
+    matrix = _TrainingMatrix(featured[cols].values, featured["price"].values)
+    return forecaster, factory, featured, cols, matrix
+
+
+def _competitive_cv(data):
+    forecaster, _, _, _, matrix = _fitted_forecaster(data)
+
+    def run():
+        forecaster.models, _ = forecaster._select_members({})
+        return forecaster._competitive_cv(matrix, n_splits=3)
+    return run
+
+
+def _recursive_forecast(data):
+    forecaster, factory, featured, cols, matrix = _fitted_forecaster(data)
+    forecaster.models, _ = forecaster._select_members({})
+    scores = forecaster._fit_members(matrix)
+    weights = forecaster._compute_weights(scores, "STABLE")
+
+    def run():
+        _STL_CACHE.clear()
+        return forecaster._recursive_forecast(data, featured, cols, weights, horizon=30,
+                                              models=forecaster.models,
+                                              feature_factory=factory)
+    return run
+
+
+def _forecast(data):
+    def run():
+        _STL_CACHE.clear()
+        return RACEForecaster().forecast(data, "Onion", "Agra", horizon=30)
+    return run
+
+
+def _features_panel(universe):
+    panel = pd.concat(universe, ignore_index=True)
+
+    def run():
+        _STL_CACHE.clear()
+        return FeatureFactory().build_features_panel(panel)
+    return run
+
+
+def _regimes_batch(universe):
+    prices = {(d["commodity"].iloc[0], d["mandi"].iloc[0]): d["price"] for d in universe}
+    return lambda: RegimeDetector().detect_regimes_batch(prices)
+
+
+def _forecast_many(universe):
+    pairs = [(d, d["commodity"].iloc[0], d["mandi"].iloc[0]) for d in universe]
+
+    def run():
+        _STL_CACHE.clear()
+        return RACEForecaster().forecast_many(pairs, horizon=30)
+    return run
+
+
+class Stage(NamedTuple):
+    name: str
+    scope: str                   # "series" or "universe"
+    setup: Callable
+
+
+STAGES: Dict[str, Stage] = {s.name: s for s in [
+    Stage("build_features", "series", _build_features),
+    Stage("detect_regime", "series", _detect_regime),
+    Stage("competitive_cv", "series", _competitive_cv),
+    Stage("recursive_forecast", "series", _recursive_forecast),
+    Stage("forecast", "series", _forecast),
+    Stage("features_panel", "universe", _features_panel),
+    Stage("regimes_batch", "universe", _regimes_batch),
+    Stage("forecast_many", "universe", _forecast_many),
+]}
+
+
+# ---------------------------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------------------------
+
+def measure(run: Callable, repeats: int) -> Dict[str, float]:
+    """
+    Median wall time of *repeats* runs after an untimed warm-up (lazy
+    imports, first-call JIT/thread-pool start-up), then one traced run
+    for memory.
+    """
+    run()
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - t0)
+
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        base, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        result = run()
+        current, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    del result
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+    return {
+        "seconds": round(float(np.median(times)), 5),
+        "peak_kb": round((peak - base) / 1024, 1),
+        "retained_kb": round((current - base) / 1024, 1),
+        "retained_blocks": int(blocks),
+    }
+
+
+def run_suite(stages: List[str], days: List[int], universe: List[int],
+              universe_days: int, repeats: int, seed: int) -> List[Dict]:
+    results = []
+    for name in stages:
+        stage = STAGES[name]
+        if stage.scope == "series":
+            cases = [(d, 1, make_series(d, seed)) for d in days]
+        else:
+            cases = [(universe_days, n, make_universe(n, universe_days, seed))
+                     for n in universe]
+        for n_days, n_series, inputs in cases:
+            row = {"stage": name, "days": n_days, "series": n_series,
+                   **measure(stage.setup(inputs), repeats)}
+            print(_format(row), flush=True)
+            results.append(row)
+    return results
+
+
+def compare(results: List[Dict], baseline: List[Dict], tolerance: float) -> List[Dict]:
+    """
+    Rows of *results* with a baseline counterpart, annotated with the
+    time / peak-memory ratios and whether either exceeds 1 + tolerance.
+    """
+    index = {(b["stage"], b["days"], b["series"]): b for b in baseline}
+    rows = []
+    for r in results:
+        b = index.get((r["stage"], r["days"], r["series"]))
+        if b is None:
+            continue
+        time_ratio = r["seconds"] / max(b["seconds"], 1e-9)
+        # Peaks under 1 MB are noise
+        mem_ratio = max(r["peak_kb"], 1024) / max(b["peak_kb"], 1024)
+        rows.append({**r, "time_ratio": round(time_ratio, 3), "mem_ratio": round(mem_ratio, 3),
+                     "regressed": time_ratio > 1 + tolerance or mem_ratio > 1 + tolerance})
+    return rows
+
+
+def _format(row: Dict) -> str:
+    return (f"{row['stage']:<20}{row['days']:>6}{row['series']:>7}{row['seconds']:>11.4f}"
+            f"{row['peak_kb']:>12.1f}{row['retained_kb']:>13.1f}{row['retained_blocks']:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--stages", nargs="+", default=list(STAGES), choices=list(STAGES))
+    parser.add_argument("--days", type=int, nargs="+", default=[90, 365, 1095, 3650],
+                        help="history lengths of the series stages")
+    parser.add_argument("--universe", type=int, nargs="+", default=[10, 50],
+                        help="universe sizes of the universe stages")
+    parser.add_argument("--universe-days", type=int, default=365)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="compare against this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown / peak-memory growth vs. the baseline")
+    args = parser.parse_args()
+
+    print(f"RACE benchmark suite — {os.cpu_count()} CPUs, median of {args.repeats}")
+    print(f"{'stage':<20}{'days':>6}{'series':>7}{'seconds':>11}"
+          f"{'peak KB':>12}{'retained KB':>13}{'blocks':>9}")
+    results = run_suite(args.stages, args.days, args.universe, args.universe_days,
+                        args.repeats, args.seed)
+
+    if args.save:
+        report = {
+            "meta": {
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "pandas": pd.__version__,
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "repeats": args.repeats,
+                "seed": args.seed,
+            },
+            "results": results,
+        }
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved {len(results)} results to {args.save}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        rows = compare(results, baseline, args.tolerance)
+        print(f"\nvs. {args.baseline} (tolerance {args.tolerance:.0%})")
+        print(f"{'stage':<20}{'days':>6}{'series':>7}{'time x':>9}{'peak x':>9}")
+        for row in rows:
+            flag = "  REGRESSION" if row["regressed"] else ""
+            print(f"{row['stage']:<20}{row['days']:>6}{row['series']:>7}"
+                  f"{row['time_ratio']:>9.2f}{row['mem_ratio']:>9.2f}{flag}")
+        if any(row["regressed"] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
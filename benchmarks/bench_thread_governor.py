@@ -0,0 +1,109 @@
+"""
+Thread Governor Benchmark
+=========================
+Wall time of W concurrent ``RACEForecaster.forecast`` calls (one thread
+each, as in a dashboard serving W sessions or a parallel swarm) on C
+cores, for
+  - ungoverned: every forecast sized as if it had the box to itself
+    (``workers=1``), i.e. the library defaults before the governor,
+  - governed: ``resources.configure(workers=W)``, each fit concurrency
+    ``n_jobs`` in --jobs,
+and the fastest setting per (cores, workers). Cores are restricted with
+CPU affinity (Linux); elsewhere only the configured budget changes.
+
+Usage:
+    python benchmarks/bench_thread_governor.py --cores 1 2 4 8 --workers 1 2 4
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Ensure workspace root is in path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.forecast_engine import resources
+from agents.forecast_engine.ensemble import RACEForecaster
+
+
+def make_series(days: int, seed: int) -> pd.DataFrame:
+    """Seeded random-walk price history."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "date": pd.date_range("2020-01-01", periods=days),
+        "price": 2000 + np.cumsum(rng.normal(0, 30, days)),
+        "arrival": rng.integers(100, 500, days),
+    })
+
+
+def restrict_cores(n: int) -> int:
+    """Pin the process to its first *n* allowed cores; returns the count in effect."""
+    try:
+        allowed = sorted(os.sched_getaffinity(0))
+        os.sched_setaffinity(0, allowed[:n])
+        return min(n, len(allowed))
+    except (AttributeError, OSError):
+        return n
+
+
+def run_concurrent(workers: int, days: int, horizon: int, n_jobs=None) -> float:
+    """Seconds for *workers* forecasts run side by side."""
+    series = [make_series(days, seed) for seed in range(workers)]
+    forecasters = [RACEForecaster(n_jobs=n_jobs) for _ in range(workers)]
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(lambda i: forecasters[i].forecast(series[i], "Onion", f"M{i}",
+                                                        horizon=horizon),
+                      range(workers)))
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--cores", type=int, nargs="+",
+                        default=[c for c in (1, 2, 4, 8, 16) if c <= (os.cpu_count() or 1)])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--jobs", type=int, nargs="+", default=[1, 2, 4],
+                        help="fit concurrency per forecast tried when governed")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--horizon", type=int, default=7)
+    args = parser.parse_args()
+
+    allowed = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") \
+        else (os.cpu_count() or 1)
+    run_concurrent(1, args.days, args.horizon)  # warm-up: imports, thread pools
+
+    print(f"RACE thread governor — {args.days} days, horizon {args.horizon}")
+    print(f"{'cores':>6}{'workers':>8}{'config':>22}{'jobs x threads':>16}{'seconds':>10}")
+    best = {}
+    for cores in args.cores:
+        cores = restrict_cores(min(cores, allowed))
+        for workers in args.workers:
+            candidates = []
+            config = resources.configure(cpus=cores, workers=1)
+            jobs = config.fit_jobs()
+            candidates.append(("ungoverned", jobs, config.library_threads(jobs),
+                               run_concurrent(workers, args.days, args.horizon)))
+            config = resources.configure(cpus=cores, workers=workers)
+            for n_jobs in args.jobs:
+                if n_jobs > config.cores_per_forecast and n_jobs != 1:
+                    continue
+                candidates.append(("governed", n_jobs, config.library_threads(n_jobs),
+                                   run_concurrent(workers, args.days, args.horizon, n_jobs)))
+            for label, jobs, threads, seconds in candidates:
+                print(f"{cores:>6}{workers:>8}{label:>22}{f'{jobs} x {threads}':>16}{seconds:>10.2f}")
+            best[(cores, workers)] = min(candidates, key=lambda c: c[3])
+
+    print("\nFastest setting")
+    print(f"{'cores':>6}{'workers':>8}{'config':>22}{'jobs x threads':>16}{'seconds':>10}")
+    for (cores, workers), (label, jobs, threads, seconds) in best.items():
+        print(f"{cores:>6}{workers:>8}{label:>22}{f'{jobs} x {threads}':>16}{seconds:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+import json
 import sqlite3
 import pandas as pd
 from datetime import datetime, timedelta
@@ -310,6 +311,74 @@ def init_db():
             )
         ''')
 
+        # Table: Regime Snapshots (daily market-wide regime classification)
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS regime_snapshots (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                date TEXT,
+                commodity TEXT,
+                mandi TEXT,
+                as_of TEXT,
+                regime TEXT,
+                confidence REAL,
+                transition_prob TEXT,
+                vol_7 REAL,
+                vol_14 REAL,
+                vol_30 REAL,
+                velocity REAL,
+                kurtosis REAL,
+                hurst REAL,
+                bb_width REAL,
+                UNIQUE(date, commodity, mandi)
+            )
+        ''')
+        c.execute("CREATE INDEX IF NOT EXISTS idx_regime_pair ON regime_snapshots (commodity, mandi, date)")
+
+        # Table: Model Params (offline-tuned RACE member hyperparameters)
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS model_params (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                commodity TEXT,
+                member TEXT,
+                params TEXT,
+                cv_mape REAL,
+                default_mape REAL,
+                configs_evaluated INTEGER,
+                tuned_at TEXT,
+                UNIQUE(commodity, member)
+            )
+        ''')
+
+        # Table: Feature Selection (RACE feature columns pruned per commodity)
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS feature_selection (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                commodity TEXT UNIQUE,
+                pruned TEXT,
+                importance TEXT,
+                cv_mape REAL,
+                full_mape REAL,
+                selected_at TEXT
+            )
+        ''')
+
+        # Table: Backtest Results (walk-forward MAPE per pair, horizon and regime)
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS backtest_results (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                run_id TEXT,
+                commodity TEXT,
+                mandi TEXT,
+                horizon INTEGER,
+                regime TEXT,
+                n_forecasts INTEGER,
+                mape REAL,
+                retrain_every INTEGER,
+                run_at TEXT,
+                UNIQUE(run_id, commodity, mandi, horizon, regime)
+            )
+        ''')
+
         # Migration: Add regime column to forecast_logs
         try:
             c.execute("SELECT regime FROM forecast_logs LIMIT 1")
@@ -960,5 +1029,176 @@ def get_ensemble_weight_history(commodity, mandi, limit=30):
     return df
 
 
+
+REGIME_SNAPSHOT_COLUMNS = ["regime", "confidence", "transition_prob", "vol_7", "vol_14",
+                           "vol_30", "velocity", "kurtosis", "hurst", "bb_width"]
+
+
+def save_regime_snapshots(date, rows):
+    """
+    Upsert one day's regime snapshot rows.
+    rows: dicts with commodity, mandi, as_of (last price date) and
+    REGIME_SNAPSHOT_COLUMNS (transition_prob as a JSON string).
+    """
+    columns = ["date", "commodity", "mandi", "as_of"] + REGIME_SNAPSHOT_COLUMNS
+    conn = sqlite3.connect(DB_NAME)
+    try:
+        conn.executemany(
+            f"""INSERT OR REPLACE INTO regime_snapshots ({", ".join(columns)})
+                VALUES ({", ".join("?" * len(columns))})""",
+            [[date] + [row.get(col) for col in columns[1:]] for row in rows],
+        )
+        conn.commit()
+    except Exception as e:
+        logger.error(f"Failed to save regime snapshots: {e}", exc_info=True)
+    finally:
+        conn.close()
+
+
+def get_regime_snapshot(commodity, mandi, as_of=None):
+    """
+    Latest regime snapshot of a pair as a dict, or None. With *as_of*,
+    only a snapshot computed on prices up to that date qualifies.
+    """
+    query = "SELECT * FROM regime_snapshots WHERE commodity=? AND mandi=?"
+    params = [commodity, mandi]
+    if as_of is not None:
+        query += " AND as_of=?"
+        params.append(as_of)
+    conn = sqlite3.connect(DB_NAME)
+    try:
+        row = conn.execute(query + " ORDER BY date DESC LIMIT 1", params)
+        columns = [d[0] for d in row.description]
+        row = row.fetchone()
+    except sqlite3.OperationalError:
+        row = None
+    finally:
+        conn.close()
+    return dict(zip(columns, row)) if row else None
+
+
+def get_regime_snapshots(date=None):
+    """All pairs' regime snapshots of *date* (default: the latest snapshot day)."""
+    conn = sqlite3.connect(DB_NAME)
+    try:
+        if date is None:
+            date = conn.execute("SELECT MAX(date) FROM regime_snapshots").fetchone()[0]
+        return pd.read_sql("SELECT * FROM regime_snapshots WHERE date=? ORDER BY commodity, mandi",
+                           conn, params=[date])
+    except Exception:
+        return pd.DataFrame()
+    finally:
+        conn.close()
+
+
+def save_model_params(commodity, member, params, cv_mape=None, default_mape=None,
+                      configs_evaluated=None):
+    """Upsert the tuned hyperparameters of one RACE member for a commodity."""
+    conn = sqlite3.connect(DB_NAME)
+    try:
+        conn.execute(
+            """INSERT OR REPLACE INTO model_params
+               (commodity, member, params, cv_mape, default_mape, configs_evaluated, tuned_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?)""",
+            (commodity, member, json.dumps(params), cv_mape, default_mape,
+             configs_evaluated, datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
+        )
+        conn.commit()
+    except Exception as e:
+        logger.error(f"Failed to save model params: {e}", exc_info=True)
+    finally:
+        conn.close()
+
+
+def get_model_params(commodity):
+    """{member: params} tuned for *commodity* ({} if never tuned)."""
+    conn = sqlite3.connect(DB_NAME)
+    try:
+        rows = conn.execute("SELECT member, params FROM model_params WHERE commodity=?",
+                            (commodity,)).fetchall()
+    except sqlite3.OperationalError:
+        rows = []
+    finally:
+        conn.close()
+    return {member: json.loads(params) for member, params in rows}
+
+
+def save_pruned_features(commodity, pruned, importance=None, cv_mape=None, full_mape=None):
+    """Upsert the RACE feature columns pruned for a commodity."""
+    conn = sqlite3.connect(DB_NAME)
+    try:
+        conn.execute(
+            """INSERT OR REPLACE INTO feature_selection
+               (commodity, pruned, importance, cv_mape, full_mape, selected_at)
+               VALUES (?, ?, ?, ?, ?, ?)""",
+            (commodity, json.dumps(sorted(pruned)), json.dumps(importance or {}),
+             cv_mape, full_mape, datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
+        )
+        conn.commit()
+    except Exception as e:
+        logger.error(f"Failed to save pruned features: {e}", exc_info=True)
+    finally:
+        conn.close()
+
+
+def get_pruned_features(commodity):
+    """Feature columns pruned for *commodity* ([] if never selected)."""
+    conn = sqlite3.connect(DB_NAME)
+    try:
+        row = conn.execute("SELECT pruned FROM feature_selection WHERE commodity=?",
+                           (commodity,)).fetchone()
+    except sqlite3.OperationalError:
+        row = None
+    finally:
+        conn.close()
+    return json.loads(row[0]) if row else []
+
+
+
+def save_backtest_results(run_id, summary, retrain_every=None):
+    """
+    Store the per (commodity, mandi, horizon, regime) MAPE rows of a
+    backtest run (``BacktestReport.summary()``).
+    """
+    run_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    conn = sqlite3.connect(DB_NAME)
+    try:
+        conn.executemany(
+            """INSERT OR REPLACE INTO backtest_results
+               (run_id, commodity, mandi, horizon, regime, n_forecasts, mape, retrain_every, run_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            [(run_id, row.commodity, row.mandi, int(row.horizon), row.regime,
+              int(row.n_forecasts), float(row.mape), retrain_every, run_at)
+             for row in summary.itertuples(index=False)],
+        )
+        conn.commit()
+    except Exception as e:
+        logger.error(f"Failed to save backtest results: {e}", exc_info=True)
+    finally:
+        conn.close()
+
+
+def get_backtest_results(run_id=None, commodity=None):
+    """Rows of a backtest run (default: the latest), optionally one commodity's."""
+    conn = sqlite3.connect(DB_NAME)
+    try:
+        if run_id is None:
+            run_id = conn.execute(
+                "SELECT run_id FROM backtest_results ORDER BY run_at DESC, id DESC LIMIT 1"
+            ).fetchone()
+            run_id = run_id[0] if run_id else None
+        query = "SELECT * FROM backtest_results WHERE run_id=?"
+        params = [run_id]
+        if commodity:
+            query += " AND commodity=?"
+            params.append(commodity)
+        return pd.read_sql(query + " ORDER BY commodity, mandi, horizon, regime",
+                           conn, params=params)
+    except Exception:
+        return pd.DataFrame()
+    finally:
+        conn.close()
+
+
 if __name__ == "__main__":
     init_db()
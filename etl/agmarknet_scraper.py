@@ -8,6 +8,17 @@ Data Source Chain (in priority order):
     2. Agmarknet     — Direct HTML scraping (agmarknet.gov.in)
     3. Simulation    — Fallback if all real sources fail
 
+data.gov.in is read page by page: after the first page, the remaining
+pages are requested concurrently over one keep-alive session
+(``etl.http_client``) with retry/backoff and a rate limit. Responses go
+through the client's on-disk cache, so reruns within ``DATA_GOV_TTL``
+are served locally and ``AGRIINTEL_HTTP_MODE=record`` / ``replay``
+capture and replay a whole run offline.
+
+Agmarknet is scraped for every tracked commodity concurrently, paced by
+a per-host token bucket, its result tables parsed by a streaming row
+iterator (lxml when installed) on a worker pool.
+
 API Key Management:
     • Set env var  DATA_GOV_IN_API_KEY
     • Or add to Streamlit secrets: st.secrets["DATA_GOV_IN_API_KEY"]
@@ -15,12 +26,22 @@ API Key Management:
 """
 
 import requests
+import numpy as np
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 import random
+import threading
 import time
 import os
+import sys
 import logging
+from html.parser import HTMLParser
+from io import BytesIO
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from etl.http_client import HttpClient, configured_cache, configured_mode
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +51,19 @@ logger = logging.getLogger(__name__)
 
 DATA_GOV_RESOURCE_ID = "9ef84268-d588-465a-a308-a864a43d0070"
 DATA_GOV_BASE_URL = "https://api.data.gov.in/resource"
+DATA_GOV_PAGE_SIZE = 1000
+DATA_GOV_CONCURRENCY = 4        # pages in flight
+DATA_GOV_RATE = 5.0             # requests per second to api.data.gov.in
+DATA_GOV_TTL = 3600             # seconds a cached page is reused as is
+
+AGMARKNET_URL = "https://agmarknet.gov.in/SearchCmmMkt.aspx"
+AGMARKNET_TABLE_ID = "cph_GridPriceData"
+AGMARKNET_CONCURRENCY = 4       # result pages in flight
+AGMARKNET_RATE = 2.0            # requests per second to agmarknet.gov.in
+
+_DATA_GOV_CLIENT: Optional[HttpClient] = None
+_AGMARKNET_CLIENT: Optional[HttpClient] = None
+_CLIENT_LOCK = threading.Lock()
 
 # Commodities & Markets we track
 TRACKED_COMMODITIES = [
@@ -50,6 +84,43 @@ TRACKED_MARKETS = [
 ]
 
 
+PRICE_COLUMNS = ["date", "commodity", "mandi", "price_min", "price_max", "price_modal", "arrival"]
+
+# Spellings of each data.gov.in field, preferred first
+DATA_GOV_FIELDS = {
+    "commodity": ("commodity", "Commodity"),
+    "market": ("market", "Market"),
+    "min_price": ("min_price", "Min_Price"),
+    "max_price": ("max_price", "Max_Price"),
+    "modal_price": ("modal_price", "Modal_Price"),
+    "arrival_date": ("arrival_date", "Arrival_Date"),
+    "quantity": ("quantity", "Arrival"),
+}
+_DATA_GOV_SPELLINGS = [name for names in DATA_GOV_FIELDS.values() for name in names]
+DATA_GOV_DATE_FORMATS = ("%d/%m/%Y", "%Y-%m-%d", "%d-%b-%Y", "%d-%m-%Y")
+
+
+class NormalizedRecords(NamedTuple):
+    frame: pd.DataFrame          # accepted rows, AgriIntel schema
+    rejected: np.ndarray         # bool per input record
+
+
+class IncompleteFetchError(requests.RequestException):
+    """Pages of a paginated data.gov.in fetch still failed after retries."""
+
+    def __init__(self, failed: List[int], frame: pd.DataFrame):
+        super().__init__(f"{len(failed)} data.gov.in page(s) failed at offsets {failed}")
+        self.failed = failed         # page offsets missing from *frame*
+        self.frame = frame           # the pages that were fetched, in offset order
+
+
+class _Page(NamedTuple):
+    offset: int
+    last: bool                   # fewer records than requested
+    total: Optional[int]         # resource size reported by the API
+    frame: pd.DataFrame
+
+
 def _get_api_key():
     """Retrieve data.gov.in API key from environment or Streamlit secrets."""
     # 1. Environment variable
@@ -73,79 +144,272 @@ def _get_api_key():
 # Source 1: data.gov.in API (Official Government)
 # ---------------------------------------------------------------------------
 
-def fetch_from_data_gov(api_key: str, limit: int = 1000) -> pd.DataFrame:
+def _data_gov_client() -> HttpClient:
+    """Keep-alive client sized and rate-limited for api.data.gov.in."""
+    global _DATA_GOV_CLIENT
+    with _CLIENT_LOCK:
+        if _DATA_GOV_CLIENT is None:
+            _DATA_GOV_CLIENT = HttpClient(pool_size=DATA_GOV_CONCURRENCY, rate=DATA_GOV_RATE,
+                                          burst=DATA_GOV_CONCURRENCY,
+                                          cache=configured_cache(), mode=configured_mode(),
+                                          default_ttl=DATA_GOV_TTL)
+        return _DATA_GOV_CLIENT
+
+
+def fetch_data_gov_pages(api_key: str, parse: Callable[[list], pd.DataFrame],
+                         page_size: int = DATA_GOV_PAGE_SIZE,
+                         max_records: Optional[int] = None,
+                         filters: Optional[Dict[str, str]] = None,
+                         concurrency: int = DATA_GOV_CONCURRENCY,
+                         client: Optional[HttpClient] = None,
+                         on_page: Optional[Callable[[pd.DataFrame], None]] = None,
+                         url: Optional[str] = None) -> pd.DataFrame:
     """
-    Fetch current daily commodity prices from data.gov.in.
-    Returns DataFrame matching AgriIntel schema:
-        date, commodity, mandi, price_min, price_max, price_modal, arrival
+    Fetch every page of the data.gov.in mandi price resource.
+
+    The first page reports the resource's ``total``; the remaining
+    offsets are then requested concurrently (at most *concurrency* in
+    flight) over the client's keep-alive pool, rate limit and retries.
+    Without a ``total``, pages are requested in waves of *concurrency*
+    until one comes back short. Each page is parsed by *parse*
+    (records -> DataFrame) and handed to *on_page* as soon as it
+    arrives, on the calling thread, e.g. to stream it into the staging
+    table. Pages that still fail after the client's retries are
+    requested once more after the others; a failing first page raises
+    right away.
+
+    Returns the parsed pages in offset order. Raises
+    ``IncompleteFetchError`` (failed offsets, fetched pages) when pages
+    are still missing, so callers never mistake a partial load for a
+    complete one.
     """
-    url = f"{DATA_GOV_BASE_URL}/{DATA_GOV_RESOURCE_ID}"
+    client = client or _data_gov_client()
+    url = url or f"{DATA_GOV_BASE_URL}/{DATA_GOV_RESOURCE_ID}"
+    params = {"api-key": api_key, "format": "json"}
+    for field, value in (filters or {}).items():
+        params[f"filters[{field}]"] = value
+
+    def fetch(offset: int) -> _Page:
+        limit = page_size if max_records is None else min(page_size, max_records - offset)
+        payload = client.get(url, params={**params, "limit": limit, "offset": offset}).json()
+        records = payload.get("records") or []
+        try:
+            total = int(payload["total"])
+        except (KeyError, TypeError, ValueError):
+            total = None
+        return _Page(offset, len(records) < limit, total, parse(records))
+
+    pages: Dict[int, pd.DataFrame] = {}
+
+    def collect(page: _Page):
+        pages[page.offset] = page.frame
+        if on_page is not None and not page.frame.empty:
+            on_page(page.frame)
+
+    first = fetch(0)
+    collect(first)
+    total = first.total
+    if max_records is not None:
+        total = min(total, max_records) if total is not None else max_records
+
+    next_offset, exhausted = page_size, first.last
+    failed: List[int] = []
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        while not exhausted and (total is None or next_offset < total):
+            stop = total if total is not None else next_offset + concurrency * page_size
+            futures = {pool.submit(fetch, offset): offset
+                       for offset in range(next_offset, stop, page_size)}
+            next_offset = stop
+            for future in as_completed(futures):
+                try:
+                    page = future.result()
+                except Exception as e:
+                    logger.warning(f"data.gov.in page at offset {futures[future]} failed: {e}")
+                    failed.append(futures[future])
+                    continue
+                collect(page)
+                exhausted = exhausted or page.last
 
-    params = {
-        "api-key": api_key,
-        "format": "json",
-        "limit": limit,
-        "offset": 0,
-    }
+    # One more pass over the failed pages, now that the others are in
+    for offset in sorted(failed):
+        try:
+            collect(fetch(offset))
+            failed.remove(offset)
+        except Exception as e:
+            logger.error(f"data.gov.in page at offset {offset} failed again: {e}")
 
-    logger.info(f"Fetching from data.gov.in (limit={limit})...")
+    frames = [pages[offset] for offset in sorted(pages) if not pages[offset].empty]
+    frame = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    if failed:
+        raise IncompleteFetchError(sorted(failed), frame)
+    return frame
 
-    try:
-        response = requests.get(url, params=params, timeout=30)
-        response.raise_for_status()
-        data = response.json()
 
-        records = data.get("records", [])
-        if not records:
-            logger.warning("data.gov.in returned 0 records.")
-            return pd.DataFrame()
+def _absent(column: np.ndarray) -> np.ndarray:
+    """
+    Records without the field. In the object frame a missing key is NaN
+    while a JSON null stays None, i.e. the field is present but null.
+    """
+    return pd.isna(column) & ~np.equal(column, None)
 
-        logger.info(f"data.gov.in returned {len(records)} records.")
 
-        # Map to our schema
-        rows = []
-        for rec in records:
-            try:
-                # data.gov.in field names (may vary slightly)
-                commodity = rec.get("commodity", rec.get("Commodity", ""))
-                market = rec.get("market", rec.get("Market", ""))
-                min_price = float(rec.get("min_price", rec.get("Min_Price", 0)))
-                max_price = float(rec.get("max_price", rec.get("Max_Price", 0)))
-                modal_price = float(rec.get("modal_price", rec.get("Modal_Price", 0)))
-
-                # Parse arrival date
-                arrival_date = rec.get("arrival_date", rec.get("Arrival_Date", ""))
-                if arrival_date:
-                    # Try multiple date formats
-                    for fmt in ("%d/%m/%Y", "%Y-%m-%d", "%d-%b-%Y", "%d-%m-%Y"):
-                        try:
-                            dt = datetime.strptime(arrival_date, fmt)
-                            arrival_date = dt.strftime("%Y-%m-%d")
-                            break
-                        except ValueError:
-                            continue
-
-                if not commodity or not market or modal_price <= 0:
-                    continue
+def _coalesce(raw: pd.DataFrame, names) -> np.ndarray:
+    """Value of the first spelling in *names* a record has (NaN if none)."""
+    present = [name for name in names if name in raw.columns]
+    if not present:
+        return np.full(len(raw), np.nan, dtype=object)
+    column = raw[present[0]].to_numpy(dtype=object)
+    for name in present[1:]:
+        absent = _absent(column)
+        if absent.any():
+            column = np.where(absent, raw[name].to_numpy(dtype=object), column)
+    return column
 
-                rows.append({
-                    "date": arrival_date or datetime.now().strftime("%Y-%m-%d"),
-                    "commodity": commodity.strip().title(),
-                    "mandi": market.strip().title(),
-                    "price_min": min_price,
-                    "price_max": max_price,
-                    "price_modal": modal_price,
-                    "arrival": float(rec.get("quantity", rec.get("Arrival", random.randint(50, 500)))),
-                })
-            except (ValueError, TypeError) as e:
-                continue
 
-        df = pd.DataFrame(rows)
-        if not df.empty:
-            logger.info(f"Parsed {len(df)} valid records from data.gov.in "
-                        f"({df['commodity'].nunique()} commodities, {df['mandi'].nunique()} markets)")
+def _map_unique(values: np.ndarray, fn: Callable) -> np.ndarray:
+    """*fn* applied once per distinct non-null value; None where null."""
+    codes, uniques = pd.factorize(values)
+    mapped = np.empty(len(uniques) + 1, dtype=object)
+    mapped[:-1] = [fn(value) for value in uniques]
+    mapped[-1] = None
+    return mapped[codes]                     # code -1 (null) -> mapped[-1]
+
+
+def _parse_dates(raw: np.ndarray):
+    """
+    (dates as "YYYY-MM-DD" or None, unparseable mask) of a batch.
+
+    Only the distinct values are parsed. The format of the first one is
+    tried on all of them first, the other ``DATA_GOV_DATE_FORMATS`` only
+    on what it left.
+    """
+    codes, uniques = pd.factorize(raw)
+    text = pd.Series(uniques, dtype=object).astype(str).str.strip()
+    todo = (text != "").to_numpy().copy()
+    parsed = pd.Series(pd.NaT, index=text.index, dtype="datetime64[ns]")
+    formats = list(DATA_GOV_DATE_FORMATS)
+    if todo.any():
+        sample = text[todo].iloc[0]
+        for fmt in DATA_GOV_DATE_FORMATS:
+            if not pd.isna(pd.to_datetime(sample, format=fmt, errors="coerce")):
+                formats.remove(fmt)
+                formats.insert(0, fmt)
+                break
+    for fmt in formats:
+        if not todo.any():
+            break
+        parsed[todo] = pd.to_datetime(text[todo], format=fmt, errors="coerce")
+        todo &= parsed.isna().to_numpy()
+
+    dates = np.empty(len(uniques) + 1, dtype=object)
+    dates[:-1] = parsed.dt.strftime("%Y-%m-%d").to_numpy(dtype=object)
+    dates[:-1][parsed.isna().to_numpy()] = None
+    dates[-1] = None
+    return dates[codes], np.append(todo, False)[codes]
+
+
+def _parse_numbers(raw: np.ndarray, missing) -> tuple:
+    """(float values, *missing* where absent, and the non-numeric or null mask)."""
+    codes, uniques = pd.factorize(raw)
+    absent = _absent(raw)
+    values = np.append(pd.to_numeric(uniques, errors="coerce").astype(np.float64), np.nan)[codes]
+    invalid = np.isnan(values) & ~absent
+    values[absent] = missing(int(absent.sum())) if callable(missing) else missing
+    return values, invalid
+
+
+def normalize_data_gov_records(records: list, require_names: bool = True) -> NormalizedRecords:
+    """
+    data.gov.in records -> AgriIntel schema, vectorised over the batch.
+
+    The records are loaded into one DataFrame; alternate field spellings
+    (``commodity`` / ``Commodity``, ...) are coalesced, dates parsed with
+    per-batch format detection and prices coerced in bulk. A record is
+    rejected when a price or quantity is null or not numeric, the modal
+    price is not positive, the date is present but matches no
+    ``DATA_GOV_DATE_FORMATS``, or (with *require_names*) the commodity
+    or market is empty. Absent prices count as 0, an absent quantity is
+    simulated and a missing date is today's.
+
+    Returns the accepted rows and the rejection mask over *records*.
+    """
+    if not records:
+        return NormalizedRecords(pd.DataFrame(columns=PRICE_COLUMNS), np.zeros(0, dtype=bool))
+    # object columns: the raw values, without string-dtype inference
+    raw = pd.DataFrame(records, columns=_DATA_GOV_SPELLINGS, dtype=object)
+    rejected = np.zeros(len(raw), dtype=bool)
+
+    names = {}
+    for field in ("commodity", "market"):
+        names[field] = _map_unique(_coalesce(raw, DATA_GOV_FIELDS[field]),
+                                   lambda value: str(value).strip().title())
+        empty = pd.isna(names[field])
+        names[field][empty] = ""
+        if require_names:
+            rejected |= empty | (names[field] == "")
+
+    prices = {}
+    for field in ("min_price", "max_price", "modal_price"):
+        prices[field], invalid = _parse_numbers(_coalesce(raw, DATA_GOV_FIELDS[field]), 0.0)
+        rejected |= invalid
+    rejected |= ~(prices["modal_price"] > 0)
+
+    arrival, invalid = _parse_numbers(_coalesce(raw, DATA_GOV_FIELDS["quantity"]),
+                                      lambda n: np.random.randint(50, 501, n))
+    rejected |= invalid
+
+    dates, unparseable = _parse_dates(_coalesce(raw, DATA_GOV_FIELDS["arrival_date"]))
+    rejected |= unparseable
+    dates[pd.isna(dates)] = datetime.now().strftime("%Y-%m-%d")
+
+    keep = ~rejected
+    frame = pd.DataFrame({
+        "date": dates[keep],
+        "commodity": names["commodity"][keep],
+        "mandi": names["market"][keep],
+        "price_min": prices["min_price"][keep],
+        "price_max": prices["max_price"][keep],
+        "price_modal": prices["modal_price"][keep],
+        "arrival": arrival[keep],
+    })
+    return NormalizedRecords(frame, rejected)
+
+
+def _parse_data_gov_records(records: list) -> pd.DataFrame:
+    """data.gov.in records -> AgriIntel schema rows (invalid records dropped)."""
+    return normalize_data_gov_records(records).frame
+
+
+def fetch_from_data_gov(api_key: str, limit: int = DATA_GOV_PAGE_SIZE,
+                        max_records: Optional[int] = None,
+                        on_page: Optional[Callable[[pd.DataFrame], None]] = None,
+                        client: Optional[HttpClient] = None) -> pd.DataFrame:
+    """
+    Fetch current daily commodity prices from data.gov.in, every page of
+    *limit* records (up to *max_records*); see ``fetch_data_gov_pages``.
+    Returns DataFrame matching AgriIntel schema:
+        date, commodity, mandi, price_min, price_max, price_modal, arrival
+
+    Raises ``IncompleteFetchError`` when pages are missing; other
+    failures return an empty DataFrame.
+    """
+    logger.info(f"Fetching from data.gov.in (page size {limit})...")
+
+    try:
+        start = time.perf_counter()
+        df = fetch_data_gov_pages(api_key, _parse_data_gov_records, page_size=limit,
+                                  max_records=max_records, on_page=on_page, client=client)
+        if df.empty:
+            logger.warning("data.gov.in returned 0 records.")
+            return df
+        logger.info(f"Parsed {len(df)} valid records from data.gov.in "
+                    f"({df['commodity'].nunique()} commodities, {df['mandi'].nunique()} markets) "
+                    f"in {time.perf_counter() - start:.1f}s")
         return df
 
+    except IncompleteFetchError as e:
+        logger.error(f"data.gov.in load incomplete: {e}")
+        raise
     except requests.exceptions.Timeout:
         logger.warning("data.gov.in request timed out.")
         return pd.DataFrame()
@@ -157,59 +421,27 @@ def fetch_from_data_gov(api_key: str, limit: int = 1000) -> pd.DataFrame:
         return pd.DataFrame()
 
 
-def fetch_from_data_gov_filtered(api_key: str, commodity: str = None,
-                                   state: str = None) -> pd.DataFrame:
-    """Fetch with optional filters for specific commodity/state."""
-    url = f"{DATA_GOV_BASE_URL}/{DATA_GOV_RESOURCE_ID}"
-
-    params = {
-        "api-key": api_key,
-        "format": "json",
-        "limit": 500,
-        "offset": 0,
-    }
+def _parse_filtered_records(records: list) -> pd.DataFrame:
+    """Rows of a filtered data.gov.in query (names may be empty)."""
+    return normalize_data_gov_records(records, require_names=False).frame
 
+
+def fetch_from_data_gov_filtered(api_key: str, commodity: str = None,
+                                   state: str = None,
+                                   client: Optional[HttpClient] = None) -> pd.DataFrame:
+    """Fetch every page matching optional filters for specific commodity/state."""
+    filters = {}
     if commodity:
-        params["filters[commodity]"] = commodity
+        filters["commodity"] = commodity
     if state:
-        params["filters[state]"] = state
+        filters["state"] = state
 
     try:
-        response = requests.get(url, params=params, timeout=30)
-        response.raise_for_status()
-        data = response.json()
-        records = data.get("records", [])
-
-        rows = []
-        for rec in records:
-            try:
-                modal_price = float(rec.get("modal_price", rec.get("Modal_Price", 0)))
-                if modal_price <= 0:
-                    continue
-
-                arrival_date = rec.get("arrival_date", rec.get("Arrival_Date", ""))
-                for fmt in ("%d/%m/%Y", "%Y-%m-%d", "%d-%b-%Y"):
-                    try:
-                        dt = datetime.strptime(arrival_date, fmt)
-                        arrival_date = dt.strftime("%Y-%m-%d")
-                        break
-                    except ValueError:
-                        continue
-
-                rows.append({
-                    "date": arrival_date or datetime.now().strftime("%Y-%m-%d"),
-                    "commodity": rec.get("commodity", rec.get("Commodity", "")).strip().title(),
-                    "mandi": rec.get("market", rec.get("Market", "")).strip().title(),
-                    "price_min": float(rec.get("min_price", rec.get("Min_Price", 0))),
-                    "price_max": float(rec.get("max_price", rec.get("Max_Price", 0))),
-                    "price_modal": modal_price,
-                    "arrival": float(rec.get("quantity", rec.get("Arrival", random.randint(50, 500)))),
-                })
-            except (ValueError, TypeError):
-                continue
-
-        return pd.DataFrame(rows)
-
+        return fetch_data_gov_pages(api_key, _parse_filtered_records, page_size=500,
+                                    filters=filters, client=client)
+    except IncompleteFetchError as e:
+        logger.error(f"Filtered data.gov.in fetch incomplete, discarding it: {e}")
+        return pd.DataFrame()
     except Exception as e:
         logger.error(f"Filtered data.gov.in fetch failed: {e}")
         return pd.DataFrame()
@@ -219,78 +451,249 @@ def fetch_from_data_gov_filtered(api_key: str, commodity: str = None,
 # Source 2: Direct Agmarknet Scraping
 # ---------------------------------------------------------------------------
 
-def fetch_from_agmarknet_direct() -> pd.DataFrame:
-    """
-    Scrape prices directly from agmarknet.gov.in.
-    This is a backup if data.gov.in API is down.
-    """
-    logger.info("Attempting direct Agmarknet scraping...")
-
-    try:
-        from bs4 import BeautifulSoup
-
-        # Agmarknet daily report page
-        url = "https://agmarknet.gov.in/SearchCmmMkt.aspx"
+class ScrapeStats(NamedTuple):
+    pages: int                   # result pages fetched
+    failed: int                  # commodities whose page could not be fetched or parsed
+    rows: int
+    seconds: float               # wall time of the whole scrape
+    parse_seconds: float         # summed over pages, across parse workers
 
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-        }
+    @property
+    def pages_per_second(self) -> float:
+        return self.pages / self.seconds if self.seconds > 0 else 0.0
 
-        session = requests.Session()
-        resp = session.get(url, headers=headers, timeout=15)
-        resp.raise_for_status()
 
-        soup = BeautifulSoup(resp.text, "html.parser")
+class _RowParser(HTMLParser):
+    """
+    Incremental stdlib parser collecting the ``<td>`` texts of each row of
+    one table (fallback when lxml is not installed).
+    """
 
-        # Extract ASP.NET form tokens for POST
-        viewstate = soup.find("input", {"name": "__VIEWSTATE"})
-        event_validation = soup.find("input", {"name": "__EVENTVALIDATION"})
+    def __init__(self, table_id: str):
+        super().__init__(convert_charrefs=True)
+        self.table_id = table_id
+        self.depth = 0               # table nesting inside the target, 0 = outside
+        self.done = False
+        self.rows: List[List[str]] = []
+        self._row: Optional[List[str]] = None
+        self._cell: Optional[List[str]] = None
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if tag == "table":
+            if self.depth:
+                self.depth += 1
+            elif dict(attrs).get("id") == self.table_id:
+                self.depth = 1
+        elif self.depth == 1 and tag == "tr":
+            self._end_row()
+            self._row = []
+        elif self.depth == 1 and tag == "td" and self._row is not None:
+            self._end_cell()
+            self._cell = []
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell.append(data)
+
+    def handle_endtag(self, tag):
+        if not self.depth or self.done:
+            return
+        if tag == "table":
+            self.depth -= 1
+            if not self.depth:
+                self._end_row()
+                self.done = True
+        elif self.depth == 1 and tag == "td":
+            self._end_cell()
+        elif self.depth == 1 and tag == "tr":
+            self._end_row()
+
+    def _end_cell(self):
+        if self._cell is not None:
+            self._row.append("".join(self._cell).strip())
+            self._cell = None
+
+    def _end_row(self):
+        if self._row is not None:
+            self._end_cell()
+            self.rows.append(self._row)
+            self._row = None
+
+
+def iter_table_rows(html: str, table_id: str, chunk_size: int = 1 << 16) -> Iterator[List[str]]:
+    """
+    Stream the ``<td>`` texts of each row of the table with id *table_id*.
 
-        if not viewstate or not event_validation:
-            logger.warning("Could not find ASP.NET form tokens on Agmarknet.")
-            return pd.DataFrame()
+    Uses lxml's ``iterparse`` (rows are yielded and freed as they close)
+    when installed, else an incremental ``html.parser`` fed *chunk_size*
+    characters at a time. Header rows made of ``<th>`` yield [].
+    """
+    try:
+        from lxml import etree
+    except ImportError:
+        etree = None
+
+    if etree is not None:
+        inside = None
+        for event, elem in etree.iterparse(BytesIO(html.encode("utf-8")), events=("start", "end"),
+                                           html=True, encoding="utf-8"):
+            if event == "start":
+                if inside is None and elem.tag == "table" and elem.get("id") == table_id:
+                    inside = elem
+                continue
+            if inside is None:
+                continue
+            if elem is inside:
+                return
+            if elem.tag == "tr" and next(elem.iterancestors("table"), None) is inside:
+                yield ["".join(td.itertext()).strip() for td in elem if td.tag == "td"]
+                elem.clear()
+                while elem.getprevious() is not None:
+                    del elem.getparent()[0]
+        return
+
+    parser = _RowParser(table_id)
+    for i in range(0, len(html), chunk_size):
+        parser.feed(html[i:i + chunk_size])
+        yield from parser.rows
+        parser.rows.clear()
+        if parser.done:
+            return
+    parser.close()
+    yield from parser.rows
+
+
+class _FormTokens(HTMLParser):
+    """Hidden ASP.NET state fields (``__VIEWSTATE``, ``__EVENTVALIDATION``, ...)."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.fields: Dict[str, str] = {}
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        name = attrs.get("name") or ""
+        if tag == "input" and name.startswith("__"):
+            self.fields[name] = attrs.get("value") or ""
+
+
+def _parse_agmarknet_page(html: str, commodity: str, date: str):
+    """(rows, seconds) of one commodity's result page."""
+    start = time.perf_counter()
+    rows = []
+    for cells in iter_table_rows(html, AGMARKNET_TABLE_ID):
+        if len(cells) < 7:
+            continue
+        try:
+            rows.append({
+                "date": date,
+                "commodity": commodity,
+                "mandi": cells[1],
+                "price_min": float(cells[4] or 0),
+                "price_max": float(cells[5] or 0),
+                "price_modal": float(cells[6] or 0),
+                "arrival": float(cells[3] or 0),
+            })
+        except ValueError:
+            continue
+    return rows, time.perf_counter() - start
+
+
+def _agmarknet_client() -> HttpClient:
+    """Keep-alive client sized and rate-limited for agmarknet.gov.in."""
+    global _AGMARKNET_CLIENT
+    with _CLIENT_LOCK:
+        if _AGMARKNET_CLIENT is None:
+            _AGMARKNET_CLIENT = HttpClient(pool_size=AGMARKNET_CONCURRENCY, rate=AGMARKNET_RATE,
+                                           burst=1, cache=configured_cache(),
+                                           mode=configured_mode())
+        return _AGMARKNET_CLIENT
+
+
+def scrape_agmarknet(commodities: Optional[List[str]] = None,
+                     concurrency: int = AGMARKNET_CONCURRENCY,
+                     parse_workers: Optional[int] = None,
+                     client: Optional[HttpClient] = None,
+                     url: str = AGMARKNET_URL):
+    """
+    Scrape the Agmarknet price table of every commodity (default
+    ``TRACKED_COMMODITIES``).
 
-        all_rows = []
+    One GET reads the ASP.NET form state; the per-commodity POSTs then
+    run concurrently (at most *concurrency* in flight), paced by the
+    client's per-host token bucket rather than fixed sleeps. Each page
+    is parsed with ``iter_table_rows`` on a separate pool of
+    *parse_workers* threads as soon as it arrives, so parsing overlaps
+    the network. A commodity whose page fails is logged and skipped.
 
-        # Query a subset of commodities
-        for commodity in ["Onion", "Tomato", "Potato", "Wheat", "Rice"]:
+    Returns (DataFrame, ScrapeStats).
+    """
+    client = client or _agmarknet_client()
+    commodities = list(commodities or TRACKED_COMMODITIES)
+    parse_workers = parse_workers or max(1, min(concurrency, os.cpu_count() or 1))
+    date = datetime.now().strftime("%Y-%m-%d")
+    start = time.perf_counter()
+
+    tokens = _FormTokens()
+    tokens.feed(client.get(url, timeout=15).text)
+    if "__VIEWSTATE" not in tokens.fields or "__EVENTVALIDATION" not in tokens.fields:
+        raise ValueError("Could not find ASP.NET form tokens on Agmarknet.")
+
+    def fetch(commodity: str) -> str:
+        form_data = {
+            **tokens.fields,
+            "ctl00$cph$ddlCommodity": commodity,
+            "ctl00$cph$btnGo": "Submit",
+        }
+        return client.post(url, data=form_data, timeout=15).text
+
+    results: Dict[str, list] = {}
+    pages, failed, parse_seconds = 0, 0, 0.0
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as fetchers, \
+            ThreadPoolExecutor(max_workers=parse_workers) as parsers:
+        fetches = {fetchers.submit(fetch, c): c for c in commodities}
+        parses = {}
+        for future in as_completed(fetches):
+            commodity = fetches[future]
             try:
-                form_data = {
-                    "__VIEWSTATE": viewstate.get("value", ""),
-                    "__EVENTVALIDATION": event_validation.get("value", ""),
-                    "ctl00$cph$ddlCommodity": commodity,
-                    "ctl00$cph$btnGo": "Submit",
-                }
-
-                post_resp = session.post(url, data=form_data, headers=headers, timeout=15)
-                post_soup = BeautifulSoup(post_resp.text, "html.parser")
-
-                # Parse the results table
-                table = post_soup.find("table", {"id": "cph_GridPriceData"})
-                if not table:
-                    continue
-
-                for row in table.find_all("tr")[1:]:  # Skip header
-                    cells = row.find_all("td")
-                    if len(cells) >= 7:
-                        all_rows.append({
-                            "date": datetime.now().strftime("%Y-%m-%d"),
-                            "commodity": commodity,
-                            "mandi": cells[1].text.strip(),
-                            "price_min": float(cells[4].text.strip() or 0),
-                            "price_max": float(cells[5].text.strip() or 0),
-                            "price_modal": float(cells[6].text.strip() or 0),
-                            "arrival": float(cells[3].text.strip() or 0),
-                        })
-
-                time.sleep(1)  # Be respectful to the server
+                html = future.result()
             except Exception as e:
                 logger.warning(f"Agmarknet scrape failed for {commodity}: {e}")
+                failed += 1
+                continue
+            pages += 1
+            parses[parsers.submit(_parse_agmarknet_page, html, commodity, date)] = commodity
+        for future in as_completed(parses):
+            try:
+                rows, seconds = future.result()
+            except Exception as e:
+                logger.warning(f"Agmarknet parse failed for {parses[future]}: {e}")
+                failed += 1
                 continue
+            results[parses[future]] = rows
+            parse_seconds += seconds
 
-        df = pd.DataFrame(all_rows)
-        if not df.empty:
-            logger.info(f"Scraped {len(df)} records from Agmarknet directly.")
+    # Rows in the order of *commodities*, whatever order the pages arrived in
+    all_rows = [row for c in commodities for row in results.get(c, ())]
+
+    stats = ScrapeStats(pages, failed, len(all_rows), time.perf_counter() - start, parse_seconds)
+    return pd.DataFrame(all_rows), stats
+
+
+def fetch_from_agmarknet_direct(commodities: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Scrape prices directly from agmarknet.gov.in (see ``scrape_agmarknet``).
+    This is a backup if data.gov.in API is down.
+    """
+    logger.info("Attempting direct Agmarknet scraping...")
+
+    try:
+        df, stats = scrape_agmarknet(commodities)
+        logger.info(f"Scraped {stats.rows} records from {stats.pages} Agmarknet pages "
+                    f"in {stats.seconds:.1f}s ({stats.pages_per_second:.2f} pages/s, "
+                    f"parse {stats.parse_seconds:.2f}s, {stats.failed} failed)")
         return df
 
     except Exception as e:
@@ -345,28 +748,46 @@ def fetch_simulated_prices() -> pd.DataFrame:
 # Main Public API — Cascading Fetch with Fallbacks
 # ---------------------------------------------------------------------------
 
-def get_all_commodities_data() -> pd.DataFrame:
+def get_all_commodities_data(batch_id: Optional[str] = None) -> pd.DataFrame:
     """
     Fetches today's commodity prices using cascading data sources:
         1. data.gov.in API (if API key available)
         2. Direct Agmarknet scraping
         3. Simulation fallback
 
+    With a *batch_id* the records are also written to the
+    ``raw_mandi_prices`` staging table under that batch — data.gov.in
+    pages as they arrive, the other sources once fetched.
+
+    A data.gov.in load with pages still missing after retries is kept,
+    but reported as incomplete (printed and logged as a WARNING
+    ``DATA_SOURCE`` event with the missing offsets).
+
     Returns DataFrame with columns:
         date, commodity, mandi, price_min, price_max, price_modal, arrival
     """
     source_used = "none"
+    stage = _stager(batch_id)
 
     # ---- Source 1: data.gov.in ----
     api_key = _get_api_key()
     if api_key:
         print("📡 Fetching REAL prices from data.gov.in...")
-        df = fetch_from_data_gov(api_key, limit=1500)
+        try:
+            df, missing = fetch_from_data_gov(api_key, on_page=stage), None
+        except IncompleteFetchError as e:
+            df, missing = e.frame, e.failed
         if not df.empty:
             source_used = "data.gov.in"
+            if missing:
+                print(f"⚠️ data.gov.in load INCOMPLETE: {len(missing)} page(s) failed "
+                      f"at offsets {missing}")
+                _log_source(f"{source_used} (INCOMPLETE, pages missing at offsets {missing})",
+                            len(df), level="WARNING")
+            else:
+                _log_source(source_used, len(df))
             print(f"✅ Got {len(df)} real records from data.gov.in "
                   f"({df['commodity'].nunique()} commodities, {df['mandi'].nunique()} markets)")
-            _log_source(source_used, len(df))
             return df
         else:
             print("⚠️ data.gov.in returned no data, trying next source...")
@@ -379,6 +800,7 @@ def get_all_commodities_data() -> pd.DataFrame:
     df = fetch_from_agmarknet_direct()
     if not df.empty:
         source_used = "agmarknet_direct"
+        stage(df)
         print(f"✅ Scraped {len(df)} records from Agmarknet directly.")
         _log_source(source_used, len(df))
         return df
@@ -388,19 +810,30 @@ def get_all_commodities_data() -> pd.DataFrame:
     # ---- Source 3: Simulation ----
     df = fetch_simulated_prices()
     source_used = "simulation"
+    stage(df)
     print(f"🔄 Generated {len(df)} simulated records (fallback).")
     _log_source(source_used, len(df))
     return df
 
 
-def _log_source(source: str, record_count: int):
+def _stager(batch_id: Optional[str]) -> Callable[[pd.DataFrame], None]:
+    """Writer of fetched records to the staging table (no-op without *batch_id*)."""
+    def stage(df: pd.DataFrame):
+        if batch_id is None or df.empty:
+            return
+        import database.db_manager as dbm
+        dbm.save_raw_prices(df.copy(), batch_id)
+    return stage
+
+
+def _log_source(source: str, record_count: int, level: str = "INFO"):
     """Log which data source was used for audit trail."""
     try:
         import sys
         sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
         import database.db_manager as dbm
         dbm.log_system_event(
-            "INFO", "DATA_SOURCE",
+            level, "DATA_SOURCE",
             f"Price data fetched from: {source} ({record_count} records)"
         )
     except Exception:
@@ -1,4 +1,3 @@
-import requests
 import feedparser
 import pandas as pd
 import random
@@ -12,6 +11,7 @@ import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 import database.db_manager as dbm
+from etl.http_client import default_client
 from agents.forecast_execution import ForecastingAgent
 from agents.risk_scoring import MarketRiskEngine
 from agents.decision_support import DecisionAgent
@@ -19,6 +19,10 @@ from agents.shock_monitoring import AnomalyDetectionEngine
 from agents.performance_monitor import PerformanceMonitor
 import numpy as np
 
+# Seconds a cached response is reused without asking the server again
+NEWS_TTL = 30 * 60
+WEATHER_TTL = 30 * 60
+
 # --- 1. FREE NEWS SOURCE: Google News RSS ---
 def fetch_agri_news(query="Agriculture News India"):
     """
@@ -28,7 +32,11 @@ def fetch_agri_news(query="Agriculture News India"):
     # 'ceid=IN:en' is good. 
     # Let's try a broader query to ensure volume.
     rss_url = f"https://news.google.com/rss/search?q={query.replace(' ', '+')}+when:7d&hl=en-IN&gl=IN&ceid=IN:en"
-    feed = feedparser.parse(rss_url)
+    try:
+        feed = feedparser.parse(default_client().get(rss_url, ttl=NEWS_TTL, timeout=15).content)
+    except Exception as e:
+        print(f"News Fetch Failed: {e}")
+        feed = feedparser.parse(b"")
     
     # Load Sentiment Agent
     try:
@@ -118,17 +126,19 @@ def fetch_mandi_prices_simulated():
     df = pd.DataFrame(data)
     return df
 
-def fetch_real_prices(fallback=True):
+def fetch_real_prices(fallback=True, batch_id=None):
     """
     Fetches REAL commodity prices using cascading data sources:
         1. data.gov.in API (requires DATA_GOV_IN_API_KEY)
         2. Direct Agmarknet scraping
         3. Enhanced simulation fallback
+    With a batch_id the records are also written to the raw staging
+    table as they are fetched.
     """
     try:
         from etl.agmarknet_scraper import get_all_commodities_data
         
-        real_df = get_all_commodities_data()
+        real_df = get_all_commodities_data(batch_id=batch_id)
         
         if real_df.empty:
             raise Exception("All data sources returned no data")
@@ -139,7 +149,10 @@ def fetch_real_prices(fallback=True):
     except Exception as e:
         print(f"Data fetch failed ({e}). Using simulation fallback.")
         if fallback:
-            return fetch_mandi_prices_simulated()
+            sim_df = fetch_mandi_prices_simulated()
+            if batch_id:
+                dbm.save_raw_prices(sim_df.copy(), batch_id)
+            return sim_df
         return pd.DataFrame()
 
 def seed_historical_data(days=90):
@@ -223,7 +236,7 @@ def fetch_weather_owm(lat, lon, api_key=None):
         
     try:
         url = f"https://api.openweathermap.org/data/2.5/weather?lat={lat}&lon={lon}&appid={api_key}&units=metric"
-        response = requests.get(url, timeout=10)
+        response = default_client().get(url, ttl=WEATHER_TTL, timeout=10)
         data = response.json()
         
         if response.status_code == 200:
@@ -247,7 +260,7 @@ def fetch_weather_open_meteo(lat, lon):
     """
     try:
         url = f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&current_weather=true"
-        response = requests.get(url, timeout=10)
+        response = default_client().get(url, ttl=WEATHER_TTL, timeout=10)
         data = response.json()
         
         if "current_weather" in data:
@@ -337,7 +350,8 @@ def run_daily_update(progress_callback=None, skip_swarm=False, **kwargs):
             seed_historical_data(days=90)
         else:
             print(f"DB exists. Appending latest daily prices (Batch: {batch_id})...")
-            prices_df = fetch_real_prices(fallback=True)
+            # Raw records are staged as they arrive (Phase 6 step 1)
+            prices_df = fetch_real_prices(fallback=True, batch_id=batch_id)
             
             # --- DATA RELIABILITY (New Phase 6) ---
             print("Running Data Reliability Checks...")
@@ -345,9 +359,6 @@ def run_daily_update(progress_callback=None, skip_swarm=False, **kwargs):
             dra = DataReliabilityAgent(db_manager=dbm)
             pm = PerformanceMonitor()
             
-            # 1. Save Raw
-            dbm.save_raw_prices(prices_df, batch_id)
-            
             # 2. Validate
             valid_df, issues, stats = dra.validate_batch(prices_df, batch_id)
             
@@ -408,8 +419,8 @@ def run_daily_update(progress_callback=None, skip_swarm=False, **kwargs):
     if progress_callback:
         progress_callback(0.25, "Starting Intelligence Swarm...")
     
-    # Initialize agents for the swarm
-    forecaster = ForecastingAgent()
+    # Initialize agents for the swarm (warm-start RACE from yesterday's models)
+    forecaster = ForecastingAgent(incremental=True)
     shock_agent = AnomalyDetectionEngine()
     risk_engine = MarketRiskEngine()
     decision_agent = DecisionAgent()
@@ -420,15 +431,13 @@ def run_daily_update(progress_callback=None, skip_swarm=False, **kwargs):
         commodities = dbm.get_unique_items("commodity")
         mandis = dbm.get_unique_items("mandi")
         
-        total_pairs = len(commodities) * len(mandis)
-        current_pair_idx = 0
-        
         # GLOBAL SILENCE FOR SWARM LOOP
         with suppress_output():
+            # A0. Gather histories first so RACE can forecast every pair in
+            # one lockstep batch
+            histories = {}
             for com in commodities:
                 for man in mandis:
-                    current_pair_idx += 1
-                    
                     try:
                         # Get History
                         df = dbm.get_latest_prices(commodity=com)
@@ -436,11 +445,6 @@ def run_daily_update(progress_callback=None, skip_swarm=False, **kwargs):
                         
                         if len(df) < 15: # Need minimum data for forecast
                             continue
-                            
-                        # Update Progress Bar (Scale 0.25 to 0.95)
-                        if progress_callback:
-                            progress = 0.25 + (0.7 * (current_pair_idx / total_pairs))
-                            progress_callback(progress, f"Processing {com} in {man}...")
 
                         # Rename for compatibility with agents ('price_modal' -> 'price')
                         df_agent = df.copy()
@@ -448,59 +452,93 @@ def run_daily_update(progress_callback=None, skip_swarm=False, **kwargs):
                             df_agent = df_agent.rename(columns={'price_modal': 'price'})
                         # Ensure dates are datetime
                         df_agent['date'] = pd.to_datetime(df_agent['date'])
-                            
-                        # A. Forecast
-                        forecast_df = forecaster.generate_forecasts(df_agent, com, man)
-                        
-                        if forecast_df.empty:
-                            continue
+                        histories[(com, man)] = df_agent
+                    except Exception:
+                        continue
 
-                        # LOG FORECAST (Phase 5)
-                        try:
-                            gen_date = datetime.now().strftime("%Y-%m-%d")
-                            dbm.log_forecast(gen_date, com, man, forecast_df)
-                        except Exception as e:
-                            print(f"Forecast Savelog error: {e}")
-                        
-                        # B. Risk & Shock
-                        # Calculate volatility (std dev of daily returns)
-                        current_price = df_agent['price'].iloc[-1]
-                        df_agent['returns'] = df_agent['price'].pct_change()
-                        volatility = df_agent['returns'].std()
-                        forecast_std = forecast_df['forecast_price'].std()
-                        
-                        # Detect Shock
-                        shock_info = shock_agent.detect_shocks(df_agent, forecast_df)
-                        
-                        # Calculate Risk Score
-                        risk_data = risk_engine.calculate_risk_score(shock_info, forecast_std, volatility)
-                        
-                        # C. Decision Signal
-                        signal_data = decision_agent.get_signal(current_price, forecast_df, risk_data, shock_info)
-                        
-                        # D. Log Signal
-                        # We log the signal for "Today"
-                        today_str = datetime.now().strftime("%Y-%m-%d")
-                        dbm.log_signal(
-                            date=today_str,
-                            commodity=com,
-                            mandi=man,
-                            signal=signal_data['signal'],
-                            price_at_signal=current_price
-                        )
+            # A1. Market-wide regime snapshot, shared by forecasts and risk
+            if progress_callback:
+                progress_callback(0.28, f"Classifying regimes of {len(histories)} markets...")
+            try:
+                regimes = forecaster.update_regime_snapshots(histories)
+            except Exception as e:
+                print(f"Regime Snapshot Failed: {e}")
+                regimes = {}
+
+            if progress_callback:
+                progress_callback(0.30, f"Forecasting {len(histories)} markets...")
+            try:
+                forecasts = forecaster.generate_forecasts_batch(histories, regimes)
+            except Exception as e:
+                print(f"Batch Forecast Failed: {e}")
+                forecasts = {}
+
+            total_pairs = len(histories)
+            current_pair_idx = 0
+            for (com, man), df_agent in histories.items():
+                current_pair_idx += 1
+                
+                try:
+                    # Update Progress Bar (Scale 0.60 to 0.95)
+                    if progress_callback:
+                        progress = 0.60 + (0.35 * (current_pair_idx / total_pairs))
+                        progress_callback(progress, f"Processing {com} in {man}...")
                         
-                        # E. Update Performance Metrics (Phase 7)
-                        try:
-                            pm.update_metrics(com, man)
-                        except Exception as e:
-                            print(f"Performance Update Failed: {e}")
-
-                        processed_count += 1
-                    except Exception as inner_e:
-                        # Log individual failures but continue loop
-                        # print(f"Error processing {com}-{man}: {inner_e}") # Squelch spam
+                    # A. Forecast
+                    forecast_df = forecasts.get((com, man))
+                    
+                    if forecast_df is None or forecast_df.empty:
                         continue
 
+                    # LOG FORECAST (Phase 5)
+                    try:
+                        gen_date = datetime.now().strftime("%Y-%m-%d")
+                        dbm.log_forecast(gen_date, com, man, forecast_df)
+                    except Exception as e:
+                        print(f"Forecast Savelog error: {e}")
+                    
+                    # B. Risk & Shock
+                    # Calculate volatility (std dev of daily returns)
+                    current_price = df_agent['price'].iloc[-1]
+                    df_agent['returns'] = df_agent['price'].pct_change()
+                    volatility = df_agent['returns'].std()
+                    forecast_std = forecast_df['forecast_price'].std()
+                    
+                    # Detect Shock
+                    shock_info = shock_agent.detect_shocks(df_agent, forecast_df)
+                    
+                    # Calculate Risk Score
+                    regime = regimes.get((com, man))
+                    risk_data = risk_engine.calculate_risk_score(
+                        shock_info, forecast_std, volatility,
+                        regime=regime.regime if regime is not None else None)
+                    
+                    # C. Decision Signal
+                    signal_data = decision_agent.get_signal(current_price, forecast_df, risk_data, shock_info)
+                    
+                    # D. Log Signal
+                    # We log the signal for "Today"
+                    today_str = datetime.now().strftime("%Y-%m-%d")
+                    dbm.log_signal(
+                        date=today_str,
+                        commodity=com,
+                        mandi=man,
+                        signal=signal_data['signal'],
+                        price_at_signal=current_price
+                    )
+                    
+                    # E. Update Performance Metrics (Phase 7)
+                    try:
+                        pm.update_metrics(com, man)
+                    except Exception as e:
+                        print(f"Performance Update Failed: {e}")
+
+                    processed_count += 1
+                except Exception as inner_e:
+                    # Log individual failures but continue loop
+                    # print(f"Error processing {com}-{man}: {inner_e}") # Squelch spam
+                    continue
+
         print(f"Intelligence Processing Complete. Generated signals for {processed_count} markets.")
         
     except Exception as e:
@@ -0,0 +1,91 @@
+"""
+Offline RACE Feature Selection Job
+==================================
+Scores the RACE feature columns of every commodity on the ensemble's CV
+folds, pooling all of its mandi histories
+(``agents.forecast_engine.feature_selection``), and stores the columns
+to prune in the ``feature_selection`` table. ``ForecastingAgent`` hands
+that table to ``RACEForecaster``, whose feature builds and fits then
+skip those columns.
+
+Meant for a weekly schedule, away from the request path.
+
+Usage:
+    python etl/feature_selection.py --method gain --commodity Onion Tomato
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+import database.db_manager as dbm
+from agents.forecast_engine.feature_selection import FeatureSelector, METHODS
+
+logger = logging.getLogger(__name__)
+
+
+def load_histories(commodity):
+    """Price histories of every mandi of a commodity, in RACE's input layout."""
+    df = dbm.get_latest_prices(commodity=commodity)
+    if df.empty:
+        return []
+    if 'price_modal' in df.columns:
+        df = df.rename(columns={'price_modal': 'price'})
+    return [group.reset_index(drop=True) for _, group in df.groupby('mandi')]
+
+
+def run_feature_selection(commodities=None, method="gain", keep_share=0.99,
+                          tolerance=0.01, n_jobs=None, progress_callback=None):
+    """
+    Select features for every commodity (or *commodities*) and upsert
+    ``feature_selection``.
+
+    Returns {commodity: SelectionResult}.
+    """
+    dbm.init_db()
+    commodities = commodities or dbm.get_unique_items("commodity")
+    selector = FeatureSelector(method=method, keep_share=keep_share,
+                               tolerance=tolerance, n_jobs=n_jobs)
+    summary = {}
+    for i, commodity in enumerate(commodities):
+        if progress_callback:
+            progress_callback(i / len(commodities), f"Selecting features for {commodity}...")
+        try:
+            result = selector.select(load_histories(commodity), commodity=commodity)
+        except Exception as e:
+            logger.error(f"Feature selection failed for {commodity}: {e}", exc_info=True)
+            continue
+        if result is None:
+            continue
+        dbm.save_pruned_features(commodity, result.pruned, result.importance,
+                                 result.cv_mape, result.full_mape)
+        summary[commodity] = result
+    if progress_callback:
+        progress_callback(1.0, "Feature selection complete")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--commodity", nargs="*", default=None)
+    parser.add_argument("--method", choices=METHODS, default="gain")
+    parser.add_argument("--keep-share", type=float, default=0.99,
+                        help="share of the total importance the kept columns cover")
+    parser.add_argument("--tolerance", type=float, default=0.01,
+                        help="accepted relative CV MAPE increase")
+    parser.add_argument("--jobs", type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    summary = run_feature_selection(args.commodity, args.method, args.keep_share,
+                                    args.tolerance, args.jobs)
+    for commodity, r in summary.items():
+        print(f"{commodity:<12}kept {len(r.kept):>3}  pruned {len(r.pruned):>3}  "
+              f"CV MAPE {r.full_mape:7.3f} -> {r.cv_mape:7.3f} {r.seconds:6.1f}s"
+              f"{'' if r.accepted else ' [rejected]'}  {r.pruned}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,407 @@
+"""
+AgriIntel — Shared HTTP Client for the ETL Fetchers
+====================================================
+One pooled, keep-alive ``requests.Session`` per client instead of a bare
+``requests.get`` (and a fresh TLS handshake) per call, with:
+
+    retries      urllib3 ``Retry`` with exponential backoff on connection
+                 errors and 429 / 5xx responses, honouring Retry-After
+    rate limit   a token bucket per host, shared by every thread using
+                 the client, so concurrent fetchers stay polite
+    pool size    connections kept open per host; size it to the
+                 fetcher's concurrency
+    cache        optional on-disk response cache (``ResponseCache``)
+
+Cache modes (``mode``, or ``AGRIINTEL_HTTP_MODE`` for the shared clients):
+    off      no cache
+    cache    a stored 200 response younger than the request's ``ttl``
+             is served from disk; an older one with an ETag /
+             Last-Modified is revalidated with a conditional request
+             (a 304 serves the stored body). GET only. Default.
+    record   every request (GET and POST) goes to the network and its
+             200 response is stored
+    replay   every request is served from disk, never the network; a
+             request without a recording raises ``ReplayMiss``
+
+Record once, then replay to rerun the ETL deterministically offline
+(e.g. for its performance tests). The shared clients store under
+``AGRIINTEL_HTTP_CACHE_DIR`` (default ``data/http_cache``). API keys
+are left out of cache keys and stored URLs, so cache files hold no
+credentials and replays need none.
+
+Public API
+----------
+    client = HttpClient(rate=5, burst=5, pool_size=4)
+    response = client.get(url, params={...})      # raises on HTTP errors
+    response = client.get(url, ttl=3600)           # cached for an hour
+    client = default_client()                      # process-wide instance
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, NamedTuple, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+}
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+HTTP_MODES = ("off", "cache", "record", "replay")
+DEFAULT_CACHE_DIR = os.path.join("data", "http_cache")
+# Query / form fields never part of a cache key
+SECRET_PARAMS = frozenset({"api-key", "api_key", "apikey", "appid"})
+
+
+class ReplayMiss(requests.RequestException):
+    """Replay mode has no recorded response for a request."""
+
+
+def redact_url(url: str) -> str:
+    """*url* without its ``SECRET_PARAMS`` query fields."""
+    parts = urlsplit(url)
+    if not parts.query:
+        return url
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+             if k not in SECRET_PARAMS]
+    return parts._replace(query=urlencode(query)).geturl()
+
+
+# ---------------------------------------------------------------------------
+# Rate limiting
+# ---------------------------------------------------------------------------
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: *rate* tokens per second, at most *burst*
+    banked. ``acquire`` blocks until a token is available.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1.0, rate))
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Take *tokens*, sleeping as needed; returns the seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class HostRateLimiter:
+    """One ``TokenBucket`` per host; ``rate=None`` disables limiting."""
+
+    def __init__(self, rate: Optional[float] = None, burst: Optional[float] = None,
+                 per_host: Optional[Dict[str, float]] = None):
+        """
+        Parameters
+        ----------
+        rate, burst : default bucket of every host.
+        per_host : {host: rate} overriding *rate* for specific hosts.
+        """
+        self.rate = rate
+        self.burst = burst
+        self.per_host = dict(per_host or {})
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, url: str) -> float:
+        host = urlsplit(url).netloc
+        rate = self.per_host.get(host, self.rate)
+        if not rate:
+            return 0.0
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(rate, self.burst)
+        return bucket.acquire()
+
+
+# ---------------------------------------------------------------------------
+# Response cache
+# ---------------------------------------------------------------------------
+
+class CachedResponse(NamedTuple):
+    meta: Dict
+    body: bytes
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.meta["stored_at"]
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional-request headers for this response."""
+        headers = {}
+        if self.meta.get("etag"):
+            headers["If-None-Match"] = self.meta["etag"]
+        if self.meta.get("last_modified"):
+            headers["If-Modified-Since"] = self.meta["last_modified"]
+        return headers
+
+    def response(self) -> requests.Response:
+        """A ``requests.Response`` carrying the stored status, headers and body."""
+        response = requests.Response()
+        response.status_code = self.meta["status"]
+        response.reason = self.meta.get("reason", "OK")
+        response.url = redact_url(self.meta["url"])
+        response.headers = CaseInsensitiveDict(self.meta["headers"])
+        response.encoding = self.meta.get("encoding")
+        response._content = self.body
+        response.from_cache = True
+        return response
+
+
+class ResponseCache:
+    """
+    Responses on disk, one ``<key>.json`` (status, headers, validators,
+    store time) and ``<key>.body`` pair per request, under two-character
+    shard directories. Writes are atomic (temp file + rename).
+    """
+
+    def __init__(self, root: str = DEFAULT_CACHE_DIR):
+        self.root = root
+
+    @staticmethod
+    def key(method: str, url: str, params=None, data=None) -> str:
+        """Hash of the method, URL and non-secret parameters / form fields."""
+        def clean(fields):
+            if not fields:
+                return []
+            items = fields.items() if isinstance(fields, dict) else fields
+            return sorted((str(k), str(v)) for k, v in items if k not in SECRET_PARAMS)
+
+        parts = urlsplit(url)
+        query = [tuple(p.split("=", 1)) if "=" in p else (p, "")
+                 for p in parts.query.split("&") if p]
+        base = parts._replace(query="").geturl()
+        raw = json.dumps([method.upper(), base, clean(query) + clean(params),
+                          clean(data) if isinstance(data, (dict, list, tuple)) else data],
+                         sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key)
+
+    def load(self, key: str) -> Optional[CachedResponse]:
+        path = self._path(key)
+        try:
+            with open(f"{path}.json") as f:
+                meta = json.load(f)
+            with open(f"{path}.body", "rb") as f:
+                body = f.read()
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Unreadable cache entry {path}: {e}")
+            return None
+        return CachedResponse(meta, body)
+
+    def store(self, key: str, response: requests.Response) -> None:
+        meta = {
+            "url": redact_url(response.url),
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": dict(response.headers),
+            "encoding": response.encoding,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "stored_at": time.time(),
+        }
+        self._write(key, meta, response.content)
+
+    def touch(self, entry: CachedResponse, key: str) -> None:
+        """Mark a revalidated (304) entry fresh again."""
+        self._write(key, {**entry.meta, "stored_at": time.time()}, None)
+
+    def _write(self, key: str, meta: Dict, body: Optional[bytes]) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        suffix = f".tmp{os.getpid()}.{threading.get_ident()}"
+        if body is not None:
+            with open(f"{path}.body{suffix}", "wb") as f:
+                f.write(body)
+            os.replace(f"{path}.body{suffix}", f"{path}.body")
+        with open(f"{path}.json{suffix}", "w") as f:
+            json.dump(meta, f)
+        os.replace(f"{path}.json{suffix}", f"{path}.json")
+
+
+def configured_mode() -> str:
+    """Cache mode of the shared clients (``AGRIINTEL_HTTP_MODE``, default "cache")."""
+    mode = os.environ.get("AGRIINTEL_HTTP_MODE", "cache")
+    if mode not in HTTP_MODES:
+        logger.warning(f"Ignoring invalid AGRIINTEL_HTTP_MODE={mode!r}")
+        return "cache"
+    return mode
+
+
+def configured_cache() -> Optional[ResponseCache]:
+    """Cache of the shared clients (``AGRIINTEL_HTTP_CACHE_DIR``); None when off."""
+    if configured_mode() == "off":
+        return None
+    return ResponseCache(os.environ.get("AGRIINTEL_HTTP_CACHE_DIR", DEFAULT_CACHE_DIR))
+
+
+# ---------------------------------------------------------------------------
+# Client
+# ---------------------------------------------------------------------------
+
+class HttpClient:
+    """Pooled keep-alive session with retry/backoff, per-host rate limiting and caching."""
+
+    def __init__(self, pool_size: int = 8, retries: int = 3, backoff: float = 0.5,
+                 rate: Optional[float] = None, burst: Optional[float] = None,
+                 per_host: Optional[Dict[str, float]] = None, timeout: float = 30.0,
+                 headers: Optional[Dict[str, str]] = None,
+                 cache: Optional[ResponseCache] = None, mode: str = "cache",
+                 default_ttl: float = 0.0):
+        """
+        Parameters
+        ----------
+        pool_size : keep-alive connections per host.
+        retries : retries per request on connection errors / 429 / 5xx.
+        backoff : urllib3 backoff factor (0.5 -> 0.5s, 1s, 2s, ...).
+        rate, burst, per_host : requests per second per host (see
+            ``HostRateLimiter``); None means unlimited.
+        timeout : default (connect, read) timeout in seconds.
+        headers : sent with every request (default: a browser User-Agent).
+        cache : on-disk response cache; None disables caching.
+        mode : "off", "cache", "record" or "replay" (see module docstring).
+        default_ttl : seconds a cached response is served without
+            revalidation when a request gives no ``ttl``.
+        """
+        if mode not in HTTP_MODES:
+            raise ValueError(f"mode must be one of {HTTP_MODES}, got {mode!r}")
+        self.cache = cache
+        self.mode = mode if cache is not None else "off"
+        self.default_ttl = default_ttl
+        self.timeout = timeout
+        self.limiter = HostRateLimiter(rate, burst, per_host)
+        self.session = requests.Session()
+        self.session.headers.update(headers or DEFAULT_HEADERS)
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=None,          # POSTs here are idempotent searches
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size,
+                              max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # Counters for logging / tests
+        self.requests_sent = 0
+        self.rate_wait_seconds = 0.0
+        self.cache_hits = 0
+        self.revalidated = 0
+        self._stats_lock = threading.Lock()
+
+    def request(self, method: str, url: str, ttl: Optional[float] = None,
+                **kwargs) -> requests.Response:
+        """
+        Rate-limited, cached request; raises ``requests.HTTPError`` on
+        4xx/5xx. *ttl* overrides ``default_ttl`` for this request.
+        Responses served from disk carry ``from_cache = True``.
+        """
+        method = method.upper()
+        if self.mode == "off" or (self.mode == "cache" and method != "GET"):
+            return self._send(method, url, **kwargs)
+
+        key = self.cache.key(method, url, kwargs.get("params"), kwargs.get("data"))
+        entry = self.cache.load(key) if self.mode != "record" else None
+        if self.mode == "replay":
+            if entry is None:
+                raise ReplayMiss(f"No recorded response for {method} {redact_url(url)}")
+            self._count(hits=1)
+            return entry.response()
+
+        if entry is not None:
+            if entry.age < (self.default_ttl if ttl is None else ttl):
+                self._count(hits=1)
+                return entry.response()
+            validators = entry.validators()
+            if validators:
+                headers = {**(kwargs.pop("headers", None) or {}), **validators}
+                response = self._send(method, url, headers=headers, **kwargs)
+                if response.status_code == 304:
+                    self.cache.touch(entry, key)
+                    self._count(revalidated=1)
+                    return entry.response()
+                self._store(key, response)
+                return response
+
+        response = self._send(method, url, **kwargs)
+        self._store(key, response)
+        return response
+
+    def _store(self, key: str, response: requests.Response) -> None:
+        if response.status_code == 200:
+            try:
+                self.cache.store(key, response)
+            except Exception as e:
+                logger.warning(f"Could not cache {redact_url(response.url)}: {e}")
+
+    def _count(self, hits: int = 0, revalidated: int = 0) -> None:
+        with self._stats_lock:
+            self.cache_hits += hits
+            self.revalidated += revalidated
+
+    def _send(self, method: str, url: str, **kwargs) -> requests.Response:
+        waited = self.limiter.acquire(url)
+        kwargs.setdefault("timeout", self.timeout)
+        response = self.session.request(method, url, **kwargs)
+        with self._stats_lock:
+            self.requests_sent += 1
+            self.rate_wait_seconds += waited
+        response.raise_for_status()
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+_DEFAULT: Optional[HttpClient] = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def default_client() -> HttpClient:
+    """Process-wide client shared by the ETL fetchers, cached per the environment."""
+    global _DEFAULT
+    with _DEFAULT_LOCK:
+        if _DEFAULT is None:
+            _DEFAULT = HttpClient(cache=configured_cache(), mode=configured_mode())
+        return _DEFAULT
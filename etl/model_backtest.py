@@ -0,0 +1,88 @@
+"""
+Walk-Forward RACE Backtest Job
+==============================
+Replays the stored price history of every (commodity, mandi) pair through
+the RACE ensemble (``agents.forecast_engine.backtest``) and writes MAPE by
+pair, horizon and regime to the ``backtest_results`` table, one run id
+per invocation.
+
+Usage:
+    python etl/model_backtest.py --days 365 --retrain-every 30 --commodity Onion
+"""
+
+import argparse
+import logging
+import os
+import sys
+from datetime import datetime
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+import database.db_manager as dbm
+from agents.forecast_engine.backtest import WalkForwardBacktester, DEFAULT_HORIZONS
+
+logger = logging.getLogger(__name__)
+
+
+def load_histories(commodities=None):
+    """{(commodity, mandi): price history} in RACE's input layout."""
+    df = dbm.get_latest_prices()
+    if df.empty:
+        return {}
+    if commodities:
+        df = df[df['commodity'].isin(commodities)]
+    if 'price_modal' in df.columns:
+        df = df.rename(columns={'price_modal': 'price'})
+    return {key: group.reset_index(drop=True)
+            for key, group in df.groupby(['commodity', 'mandi'])}
+
+
+def run_backtest(commodities=None, days=365, retrain_every=30, horizons=DEFAULT_HORIZONS,
+                 n_splits=3, n_jobs=None, run_id=None):
+    """
+    Backtest the cut-offs of the last *days* days of every pair (or of
+    *commodities*) and store the summary under *run_id*.
+
+    Returns the BacktestReport.
+    """
+    dbm.init_db()
+    histories = load_histories(commodities)
+    start = None
+    if histories:
+        last = max(pd.to_datetime(h['date']).max() for h in histories.values())
+        start = last - pd.Timedelta(days=days)
+    backtester = WalkForwardBacktester(horizons=horizons, retrain_every=retrain_every,
+                                       n_splits=n_splits, n_jobs=n_jobs,
+                                       member_params=dbm.get_model_params,
+                                       pruned_features=dbm.get_pruned_features)
+    report = backtester.run(histories, start=start)
+    run_id = run_id or datetime.now().strftime("bt-%Y%m%d-%H%M%S")
+    dbm.save_backtest_results(run_id, report.summary(), retrain_every)
+    logger.info(f"Backtest {run_id}: {len(report.forecasts)} forecasts from "
+                f"{report.retrains} retrains in {report.seconds}s")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--commodity", nargs="*", default=None)
+    parser.add_argument("--days", type=int, default=365,
+                        help="span of cut-off dates before the last price")
+    parser.add_argument("--retrain-every", type=int, default=30)
+    parser.add_argument("--horizons", type=int, nargs="+", default=list(DEFAULT_HORIZONS))
+    parser.add_argument("--splits", type=int, default=3,
+                        help="CV folds behind the member weights (0: equal weights)")
+    parser.add_argument("--jobs", type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    report = run_backtest(args.commodity, args.days, args.retrain_every, args.horizons,
+                          args.splits, args.jobs)
+    print(f"{len(report.forecasts)} forecasts, {report.retrains} retrains, {report.seconds}s")
+    print(report.mape("horizon").to_string(index=False))
+    print(report.mape("regime", "horizon").to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
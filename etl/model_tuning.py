@@ -0,0 +1,86 @@
+"""
+Offline RACE Hyperparameter Tuning Job
+======================================
+Runs successive-halving search (``agents.forecast_engine.tuning``) over
+the boosting members of the RACE ensemble for every commodity, pooling
+all of its mandi histories, and stores the winners in the
+``model_params`` table. ``ForecastingAgent`` hands that table to
+``RACEForecaster`` so every full fit uses the tuned parameters.
+
+Meant for a nightly / weekly schedule, away from the request path.
+
+Usage:
+    python etl/model_tuning.py --budget 600 --commodity Onion Tomato
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+import database.db_manager as dbm
+from agents.forecast_engine.tuning import SuccessiveHalvingTuner
+
+logger = logging.getLogger(__name__)
+
+
+def load_histories(commodity):
+    """Price histories of every mandi of a commodity, in RACE's input layout."""
+    df = dbm.get_latest_prices(commodity=commodity)
+    if df.empty:
+        return []
+    if 'price_modal' in df.columns:
+        df = df.rename(columns={'price_modal': 'price'})
+    return [group.reset_index(drop=True) for _, group in df.groupby('mandi')]
+
+
+def run_model_tuning(commodities=None, budget_seconds=600.0, n_configs=27,
+                     n_jobs=None, progress_callback=None):
+    """
+    Tune every commodity (or *commodities*) and upsert ``model_params``.
+
+    budget_seconds is per commodity. Returns {commodity: {member: TuningResult}}.
+    """
+    dbm.init_db()
+    commodities = commodities or dbm.get_unique_items("commodity")
+    tuner = SuccessiveHalvingTuner(n_configs=n_configs, budget_seconds=budget_seconds,
+                                   n_jobs=n_jobs)
+    summary = {}
+    for i, commodity in enumerate(commodities):
+        if progress_callback:
+            progress_callback(i / len(commodities), f"Tuning {commodity}...")
+        try:
+            results = tuner.tune(load_histories(commodity), commodity=commodity)
+        except Exception as e:
+            logger.error(f"Tuning failed for {commodity}: {e}", exc_info=True)
+            continue
+        for member, result in results.items():
+            dbm.save_model_params(commodity, member, result.params, result.cv_mape,
+                                  result.default_mape, result.configs_evaluated)
+        summary[commodity] = results
+    if progress_callback:
+        progress_callback(1.0, "Tuning complete")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--commodity", nargs="*", default=None)
+    parser.add_argument("--budget", type=float, default=600.0,
+                        help="seconds per commodity")
+    parser.add_argument("--configs", type=int, default=27)
+    parser.add_argument("--jobs", type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    summary = run_model_tuning(args.commodity, args.budget, args.configs, args.jobs)
+    for commodity, results in summary.items():
+        for member, r in results.items():
+            print(f"{commodity:<12}{member:<10} CV MAPE {r.cv_mape:7.3f} "
+                  f"(defaults {r.default_mape:7.3f}) {r.configs_evaluated} configs "
+                  f"{r.seconds:6.1f}s{'' if r.completed else ' [budget]'}  {r.params}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,414 @@
+"""
+Unit Test Suite for ETL Ingestion
+=================================
+Verifies correct operations of:
+1. Concurrent, paginated data.gov.in fetching over a keep-alive session,
+   with failed pages retried and reported
+2. On-disk HTTP cache: TTLs, ETag revalidation, record / offline replay
+3. Concurrent, rate-limited Agmarknet scraping and streaming table parsing
+4. Vectorised normalisation of data.gov.in records with a rejection mask
+"""
+
+import sys
+import os
+import json
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# Ensure workspace root is in path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from etl.http_client import HttpClient, ReplayMiss, ResponseCache, TokenBucket
+import etl.agmarknet_scraper as scraper
+from etl.agmarknet_scraper import (
+    IncompleteFetchError, PRICE_COLUMNS, TRACKED_COMMODITIES, fetch_data_gov_pages, iter_table_rows,
+    normalize_data_gov_records, scrape_agmarknet, _parse_data_gov_records,
+)
+
+
+def _record(i):
+    return {
+        "commodity": ["Onion", "Potato", "Tomato"][i % 3],
+        "market": f"Mandi {i % 40}",
+        "arrival_date": "05/01/2026",
+        "min_price": str(1000 + i),
+        "max_price": str(1400 + i),
+        "modal_price": str(1200 + i),
+        "quantity": "100",
+    }
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        server = self.server
+        query = parse_qs(urlsplit(self.path).query)
+        offset, limit = int(query["offset"][0]), int(query["limit"][0])
+        with server.lock:
+            server.offsets.append(offset)
+            fail = server.failures.get(offset, 0) > 0
+            if fail:
+                server.failures[offset] -= 1
+        if fail:
+            body, status = b"{}", 503
+        else:
+            records = [_record(i) for i in range(offset, min(offset + limit, server.total))]
+            payload = {"records": records, "count": len(records)}
+            if server.report_total:
+                payload["total"] = server.total
+            body, status = json.dumps(payload).encode(), 200
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestDataGovPagination(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+        self.server.lock = threading.Lock()
+        self.server.connections = 0
+        self.server.offsets = []
+        self.server.failures = {}         # offset -> times to answer 503
+        self.server.total = 2350
+        self.server.report_total = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/resource/test"
+        self.client = HttpClient(pool_size=3, retries=2, backoff=0.01)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_fetches_every_page_concurrently_with_retry(self):
+        self.server.failures = {1000: 1}
+        streamed = []
+        df = fetch_data_gov_pages("key", _parse_data_gov_records, page_size=500,
+                                  concurrency=3, client=self.client, url=self.url,
+                                  on_page=streamed.append)
+
+        self.assertEqual(len(df), 2350)
+        # Offset order, whatever order the pages arrived in
+        self.assertEqual(df["price_modal"].tolist(), [1200.0 + i for i in range(2350)])
+        self.assertEqual(sum(len(page) for page in streamed), 2350)
+        self.assertEqual(len(streamed), 5)
+        # One retry of the failed page; keep-alive connections are reused
+        self.assertEqual(sorted(self.server.offsets),
+                         [0, 500, 1000, 1000, 1500, 2000])
+        self.assertLessEqual(self.server.connections, 3)
+
+    def test_failed_page_is_retried_after_the_others(self):
+        # 3 failures exhaust the client's 2 retries; the final pass succeeds
+        self.server.failures = {1500: 3}
+        df = fetch_data_gov_pages("key", _parse_data_gov_records, page_size=500,
+                                  concurrency=3, client=self.client, url=self.url)
+        self.assertEqual(df["price_modal"].tolist(), [1200.0 + i for i in range(2350)])
+        self.assertEqual(self.server.offsets.count(1500), 4)
+
+    def test_missing_pages_raise_with_the_partial_load(self):
+        self.server.failures = {1000: 10}
+        streamed = []
+        with self.assertRaises(IncompleteFetchError) as caught:
+            fetch_data_gov_pages("key", _parse_data_gov_records, page_size=500,
+                                 concurrency=3, client=self.client, url=self.url,
+                                 on_page=streamed.append)
+        self.assertEqual(caught.exception.failed, [1000])
+        self.assertEqual(len(caught.exception.frame), 1850)
+        self.assertEqual(sum(len(page) for page in streamed), 1850)
+
+        with patch.object(scraper, "_get_api_key", return_value="key"), \
+                patch.object(scraper, "_log_source") as log_source, \
+                patch.object(scraper, "fetch_from_data_gov",
+                             side_effect=caught.exception):
+            df = scraper.get_all_commodities_data()
+        self.assertEqual(len(df), 1850)
+        self.assertIn("INCOMPLETE", log_source.call_args.args[0])
+        self.assertEqual(log_source.call_args.kwargs["level"], "WARNING")
+
+    def test_without_total_fetches_until_short_page(self):
+        self.server.report_total = False
+        self.server.total = 1200
+        df = fetch_data_gov_pages("key", _parse_data_gov_records, page_size=300,
+                                  concurrency=2, client=self.client, url=self.url)
+        self.assertEqual(len(df), 1200)
+        # Waves of 2 pages after the first: 300-600, 900-1200 (empty -> stop)
+        self.assertEqual(sorted(self.server.offsets), [0, 300, 600, 900, 1200])
+
+    def test_max_records_and_rate_limit(self):
+        client = HttpClient(pool_size=2, rate=20, burst=1)
+        try:
+            start = time.perf_counter()
+            df = fetch_data_gov_pages("key", _parse_data_gov_records, page_size=200,
+                                      max_records=1000, concurrency=4, client=client,
+                                      url=self.url)
+            elapsed = time.perf_counter() - start
+        finally:
+            client.close()
+        self.assertEqual(len(df), 1000)
+        # 5 requests, one token banked, 20/s: at least 4 x 50 ms of waiting
+        self.assertGreaterEqual(elapsed, 0.19)
+
+    def test_token_bucket(self):
+        bucket = TokenBucket(rate=100, burst=2)
+        start = time.perf_counter()
+        for _ in range(7):
+            bucket.acquire()
+        self.assertGreaterEqual(time.perf_counter() - start, 0.045)
+
+
+class _ConditionalHandler(BaseHTTPRequestHandler):
+    """Serves ``/feed`` with an ETag and answers If-None-Match with 304."""
+    protocol_version = "HTTP/1.1"
+    etag = '"v1"'
+
+    def do_GET(self):
+        self.server.hits.append(self.headers.get("If-None-Match"))
+        if self.headers.get("If-None-Match") == self.etag:
+            self.send_response(304)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = json.dumps({"path": urlsplit(self.path).path,
+                           "hit": len(self.server.hits)}).encode()
+        self.send_response(200)
+        self.send_header("ETag", self.etag)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _ConditionalHandler)
+        self.server.hits = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/feed"
+        self.root = tempfile.mkdtemp()
+        self.cache = ResponseCache(self.root)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_ttl_then_etag_revalidation(self):
+        client = HttpClient(cache=self.cache, mode="cache")
+        first = client.get(self.url, ttl=60)
+        again = client.get(self.url, ttl=60)
+        self.assertTrue(again.from_cache)
+        self.assertEqual(again.json(), first.json())
+        self.assertEqual(len(self.server.hits), 1)
+
+        # Expired: a conditional request, answered 304, serves the stored body
+        revalidated = client.get(self.url, ttl=0)
+        self.assertEqual(self.server.hits, [None, '"v1"'])
+        self.assertEqual(revalidated.status_code, 200)
+        self.assertEqual(revalidated.json(), first.json())
+        self.assertEqual((client.cache_hits, client.revalidated), (1, 1))
+        client.close()
+
+    def test_record_then_replay_offline(self):
+        recorder = HttpClient(cache=self.cache, mode="record")
+        recorded = recorder.get(self.url, params={"q": "onion", "api-key": "secret"}).json()
+        recorder.close()
+        self.server.shutdown()
+
+        # Same request, another key, no server: served from disk
+        replayer = HttpClient(cache=self.cache, mode="replay")
+        replayed = replayer.get(self.url, params={"api-key": "other", "q": "onion"})
+        self.assertEqual(replayed.json(), recorded)
+        self.assertEqual(replayer.requests_sent, 0)
+        with self.assertRaises(ReplayMiss):
+            replayer.get(self.url, params={"q": "tomato"})
+        replayer.close()
+
+    def test_api_keys_stay_out_of_cache_files(self):
+        recorder = HttpClient(cache=self.cache, mode="record")
+        recorder.get(self.url, params={"q": "onion", "api-key": "secret-key"})
+        recorder.get(f"{self.url}?lat=1&appid=other-secret")
+        recorder.close()
+
+        stored = [os.path.join(d, f) for d, _, files in os.walk(self.root) for f in files]
+        self.assertEqual(len(stored), 4)
+        for path in stored:
+            with open(path, "rb") as f:
+                content = f.read()
+            self.assertNotIn(b"secret", content, path)
+
+        replayer = HttpClient(cache=self.cache, mode="replay")
+        replayed = replayer.get(self.url, params={"q": "onion", "api-key": "secret-key"})
+        self.assertEqual(replayed.url, f"{self.url}?q=onion")
+        replayer.close()
+
+    def test_uncached_client_always_fetches(self):
+        client = HttpClient()
+        client.get(self.url)
+        client.get(self.url)
+        self.assertEqual(len(self.server.hits), 2)
+        self.assertEqual(os.listdir(self.root), [])
+        client.close()
+
+
+def _price_table(commodity, n_rows):
+    rows = "".join(
+        f"<tr><td>{i}</td><td>{commodity} Mandi {i}</td><td>Variety</td><td>{10 + i}</td>"
+        f"<td>{1000 + i}</td><td>{1400 + i}</td><td>{1200 + i}</td></tr>"
+        for i in range(n_rows))
+    return (f"<html><body><table id='other'><tr><td>ignored</td></tr></table>"
+            f"<table id='cph_GridPriceData'><tr><th>Sl</th><th>Market</th></tr>{rows}"
+            f"<tr><td>x</td><td>Bad</td><td>v</td><td>n/a</td><td>-</td><td>-</td><td>-</td></tr>"
+            f"<tr><td colspan='7'><table><tr><td>1</td><td>2</td></tr></table></td></tr>"
+            f"</table></body></html>")
+
+
+class _AgmarknetHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _reply(self, status, body):
+        body = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._reply(200, "<form><input type='hidden' name='__VIEWSTATE' value='vs'/>"
+                         "<input type='hidden' name='__EVENTVALIDATION' value='ev'/></form>")
+
+    def do_POST(self):
+        form = parse_qs(self.rfile.read(int(self.headers["Content-Length"])).decode())
+        commodity = form["ctl00$cph$ddlCommodity"][0]
+        with self.server.lock:
+            self.server.posts.append((commodity, form["__VIEWSTATE"][0]))
+        if commodity in self.server.fail:
+            self._reply(500, "error")
+        else:
+            self._reply(200, _price_table(commodity, 3))
+
+    def log_message(self, *args):
+        pass
+
+
+class TestAgmarknetScraper(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _AgmarknetHandler)
+        self.server.lock = threading.Lock()
+        self.server.posts = []
+        self.server.fail = {"Mango"}
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/SearchCmmMkt.aspx"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_scrapes_every_tracked_commodity_at_the_host_rate(self):
+        client = HttpClient(pool_size=4, retries=0, rate=100, burst=1)
+        try:
+            start = time.perf_counter()
+            df, stats = scrape_agmarknet(concurrency=4, client=client, url=self.url)
+            elapsed = time.perf_counter() - start
+        finally:
+            client.close()
+
+        scraped = [c for c in TRACKED_COMMODITIES if c != "Mango"]
+        self.assertEqual(sorted(c for c, _ in self.server.posts), sorted(TRACKED_COMMODITIES))
+        self.assertTrue(all(viewstate == "vs" for _, viewstate in self.server.posts))
+        # Header, malformed and nested-table rows skipped; commodity order kept
+        self.assertEqual(df["commodity"].tolist(), [c for c in scraped for _ in range(3)])
+        self.assertEqual(df["price_modal"].tolist()[:3], [1200.0, 1201.0, 1202.0])
+        self.assertEqual((stats.pages, stats.failed, stats.rows),
+                         (len(scraped), 1, 3 * len(scraped)))
+        self.assertGreater(stats.pages_per_second, 0)
+        # 26 requests at 100/s with no banked burst
+        self.assertGreaterEqual(elapsed, 0.24)
+
+    def test_row_iterator_streams_across_chunks(self):
+        html = _price_table("Onion", 50)
+        rows = list(iter_table_rows(html, "cph_GridPriceData", chunk_size=97))
+        self.assertEqual(rows, list(iter_table_rows(html, "cph_GridPriceData")))
+        data = [r for r in rows if len(r) == 7]
+        self.assertEqual(len(data), 51)
+        self.assertEqual(data[49], ["49", "Onion Mandi 49", "Variety", "59", "1049", "1449", "1249"])
+        self.assertEqual(rows[0], [])
+        self.assertEqual(list(iter_table_rows(html, "missing")), [])
+
+
+class TestRecordNormalizer(unittest.TestCase):
+
+    RECORDS = [
+        # accepted: both spellings, every date format, missing quantity / prices / date
+        {"commodity": " onion ", "market": "lasalgaon", "arrival_date": "05/01/2026",
+         "min_price": "1000", "max_price": "1400", "modal_price": "1200", "quantity": "10"},
+        {"Commodity": "Tomato", "Market": "Kolar", "Arrival_Date": "2026-01-06",
+         "Min_Price": 900, "Max_Price": 1100, "Modal_Price": 1000, "Arrival": "25"},
+        {"commodity": "Potato", "market": "Agra", "arrival_date": "07-Jan-2026",
+         "modal_price": "800", "quantity": 5},
+        {"commodity": "Wheat", "market": "Indore", "arrival_date": "08-01-2026",
+         "min_price": "1", "max_price": "2", "modal_price": "3", "quantity": "1"},
+        {"commodity": "Wheat", "market": "Indore", "modal_price": "3", "quantity": "1"},
+        # rejected
+        {"commodity": "Potato", "market": "Agra", "arrival_date": "07-Jan-2026",
+         "min_price": "NR", "max_price": "1", "modal_price": "5"},
+        {"commodity": "Potato", "market": "Agra", "arrival_date": "yesterday", "modal_price": "5"},
+        {"commodity": "", "market": "Agra", "modal_price": "5"},
+        {"commodity": "Wheat", "market": "Indore", "modal_price": "0"},
+        {"commodity": "Wheat", "market": "Indore", "modal_price": "3", "quantity": "lots"},
+        # present but null: rejected, not read as 0 / simulated, nor as the other spelling
+        {"commodity": "Wheat", "market": "Indore", "min_price": None, "modal_price": "3"},
+        {"commodity": "Wheat", "market": "Indore", "max_price": None, "Max_Price": "4",
+         "modal_price": "3"},
+        {"commodity": "Wheat", "market": "Indore", "modal_price": "3", "quantity": None},
+    ]
+
+    def test_schema_values_and_rejection_mask(self):
+        result = normalize_data_gov_records(self.RECORDS)
+        df = result.frame
+        self.assertEqual(result.rejected.tolist(), [False] * 5 + [True] * 8)
+        self.assertEqual(list(df.columns), PRICE_COLUMNS)
+        self.assertEqual(df["date"].tolist()[:4],
+                         ["2026-01-05", "2026-01-06", "2026-01-07", "2026-01-08"])
+        self.assertEqual(df["commodity"].tolist(), ["Onion", "Tomato", "Potato", "Wheat", "Wheat"])
+        self.assertEqual(df["mandi"].tolist()[:2], ["Lasalgaon", "Kolar"])
+        self.assertEqual(df["price_min"].tolist(), [1000.0, 900.0, 0.0, 1.0, 0.0])
+        self.assertEqual(df["arrival"].tolist(), [10.0, 25.0, 5.0, 1.0, 1.0])
+
+    def test_filtered_variant_accepts_empty_names(self):
+        rejected = normalize_data_gov_records(self.RECORDS, require_names=False).rejected
+        self.assertFalse(rejected[7])
+        self.assertEqual(normalize_data_gov_records([]).frame.columns.tolist(), PRICE_COLUMNS)
+
+    def test_parses_an_api_page(self):
+        df = _parse_data_gov_records([_record(i) for i in range(300)])
+        self.assertEqual(len(df), 300)
+        self.assertEqual(df["price_modal"].tolist(), [1200.0 + i for i in range(300)])
+        self.assertTrue((df["date"] == "2026-01-05").all())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,874 @@
+"""
+Unit Test Suite for RACE Forecast Engine Internals
+==================================================
+Verifies correct operations of:
+1. Concurrent, fold-sharing competitive CV
+2. Warm-start incremental training from the model store
+3. Realtime fast path reusing the last fitted ensemble
+4. Lockstep batched recursion across pairs
+5. Compiled NumPy tree scoring of fitted members
+6. Panel-wide and newest-row feature building
+7. Persistent feature store with incremental append
+8. Cached / windowed STL decomposition
+9. Vectorised indicator kernels vs. pandas
+10. Warm-started / forward-filtered HMM regime detection
+11. Batch regime detection and daily regime snapshots
+12. Time-budgeted (anytime) ensemble fits
+13. Registry-built members with cost tracking and negligible-member skipping
+14. Offline successive-halving tuning and the model_params table
+15. Walk-forward backtesting and the backtest_results table
+16. Core budget split across concurrent forecasts and library threads
+17. Importance-driven feature pruning and the feature_selection table
+"""
+
+import sys
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+import pandas as pd
+import numpy as np
+
+# Ensure workspace root is in path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.forecast_engine.ensemble import (
+    RACEForecaster, ForecastResult, _TrainingMatrix, _RecursionJob,
+    _XGBModel, _LGBModel, _CatModel,
+)
+from agents.forecast_engine.model_store import ModelStore
+from agents.forecast_engine.model_zoo import MEMBER_REGISTRY, create_member
+from agents.forecast_engine.compiled_trees import compile_member
+from agents.forecast_engine.feature_factory import FeatureFactory, TailFeatures, _STL_CACHE
+from agents.forecast_engine.feature_store import FeatureStore
+from agents.forecast_engine import indicators, resources
+from agents.forecast_engine.tuning import SuccessiveHalvingTuner
+from agents.forecast_engine.backtest import WalkForwardBacktester
+from agents.forecast_engine.feature_selection import FeatureSelector
+from agents.forecast_engine.regime_detector import (
+    RegimeDetector, RegimeState, _emission_logprob, _forward_pass,
+)
+import database.db_manager as dbm
+
+
+def _make_history(days=120, seed=42):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "date": pd.date_range("2025-01-01", periods=days),
+        "price": 2000 + np.cumsum(rng.normal(0, 30, days)),
+        "arrival": rng.integers(100, 500, days),
+        "commodity": "Onion",
+        "mandi": "Agra",
+    })
+
+
+class TestCompetitiveCV(unittest.TestCase):
+
+    def _members(self, forecaster):
+        return [cls(early_stopping_rounds=forecaster.early_stopping_rounds,
+                    n_threads=1)
+                for cls in (_XGBModel, _LGBModel, _CatModel)]
+
+    def test_parallel_cv_matches_sequential(self):
+        """Concurrent fold fits score identically to sequential ones."""
+        rng = np.random.default_rng(0)
+        X = rng.normal(size=(120, 6))
+        y = 2000 + X @ rng.normal(size=6) * 50
+        matrix = _TrainingMatrix(X, y)
+
+        seq = RACEForecaster(n_jobs=1)
+        seq.models = self._members(seq)
+        par = RACEForecaster(n_jobs=3)
+        par.models = self._members(par)
+
+        seq_scores, _ = seq._competitive_cv(matrix, n_splits=3)
+        par_scores, _ = par._competitive_cv(matrix, n_splits=3)
+        for name, score in seq_scores.items():
+            self.assertAlmostEqual(score, par_scores[name], places=6)
+
+    def test_early_stopping_forecast(self):
+        """Early stopping records best iterations and caps final trees."""
+        forecaster = RACEForecaster(n_jobs=2, early_stopping_rounds=5)
+        result = forecaster.forecast(_make_history(), "Onion", "Agra", horizon=7)
+
+        self.assertIsInstance(result, ForecastResult)
+        self.assertEqual(len(result.forecast_df), 7)
+        self.assertAlmostEqual(sum(result.model_weights.values()), 1.0, places=2)
+        for m in forecaster.models:
+            self.assertLessEqual(m.n_estimators, 120)
+
+
+class TestWarmStart(unittest.TestCase):
+
+    def test_incremental_continues_stored_boosters(self):
+        """A new day warm-starts the stored boosters; the schedule forces a retrain."""
+        history = _make_history(days=100)
+        with tempfile.TemporaryDirectory() as root:
+            store = ModelStore(root)
+            forecaster = RACEForecaster(n_jobs=1, model_store=store,
+                                        warm_start_rounds=5, full_retrain_days=2,
+                                        drift_tolerance=1e6)
+
+            first = forecaster.forecast(history.iloc[:98], "Onion", "Agra",
+                                        horizon=5, incremental=True)
+            self.assertEqual(first.metadata["training_mode"], "full")
+            self.assertIsNotNone(store.load("Onion", "Agra"))
+
+            second = forecaster.forecast(history.iloc[:99], "Onion", "Agra",
+                                         horizon=5, incremental=True)
+            self.assertEqual(second.metadata["training_mode"], "warm_start")
+            self.assertEqual([m.n_estimators for m in forecaster.models], [125] * 3)
+
+            third = forecaster.forecast(history, "Onion", "Agra",
+                                        horizon=5, incremental=True)
+            self.assertEqual(third.metadata["retrain_reason"], "scheduled")
+
+
+class TestRealtimeFastPath(unittest.TestCase):
+
+    def _history(self):
+        history = _make_history(days=100)
+        history["date"] = pd.date_range(
+            end=pd.Timestamp.now().normalize() - pd.Timedelta(days=1), periods=100)
+        return history
+
+    def _ticks(self):
+        return pd.DataFrame({
+            "timestamp": [pd.Timestamp.now()] * 3,
+            "price": [2100.0, 2110.0, 2090.0],
+            "quantity": [1.0, 2.0, 3.0],
+            "trade_type": ["TRADE", "TRADE", "BID"],
+        })
+
+    def test_reuses_fitted_state(self):
+        """After one full forecast, intraday refreshes predict without refitting."""
+        history = self._history()
+        forecaster = RACEForecaster(n_jobs=1)
+        forecaster.forecast(history, "Onion", "Agra", horizon=5)
+        fitted = forecaster.models
+
+        result = forecaster.forecast_realtime(history, "Onion", "Agra",
+                                              self._ticks(), horizon=5)
+        self.assertTrue(result.metadata["fast_path"])
+        self.assertIs(forecaster.models, fitted)
+        self.assertEqual(len(result.forecast_df), 5)
+        self.assertEqual(result.metadata["training_samples"], 101)
+
+    def test_matches_full_recursion(self):
+        """The fast path reproduces the full-history recursion of the fitted state."""
+        history = self._history()
+        forecaster = RACEForecaster(n_jobs=1)
+        full = forecaster.forecast(history, "Onion", "Agra", horizon=7)
+
+        # No ticks: identical to the full forecast
+        result = forecaster.forecast_realtime(history, "Onion", "Agra", None, horizon=7)
+        self.assertTrue(result.metadata["fast_path"])
+        pd.testing.assert_frame_equal(result.forecast_df, full.forecast_df)
+
+        # With ticks: the full-rebuild recursion over history + today's row
+        # with the stored state and windowed STL
+        result = forecaster.forecast_realtime(history, "Onion", "Agra",
+                                              self._ticks(), horizon=7)
+        state = forecaster._states[("Onion", "Agra")]
+        live = pd.concat([forecaster._sorted(history),
+                          forecaster._intraday_row(self._ticks(), "Onion", "Agra")],
+                         ignore_index=True)
+        expected = forecaster._recursive_forecast(
+            live, None, state.feature_cols, state.weights, 7, models=state.models,
+            feature_factory=FeatureFactory(commodity="Onion", stl_mode="windowed"))
+        np.testing.assert_array_equal(result.forecast_df["forecast_price"].values,
+                                      expected["forecast_price"].values)
+
+    def test_refresh_latency(self):
+        """A 30-day refresh only featurises the new rows, with or without ticks."""
+        history = _make_history(days=250)
+        history["date"] = pd.date_range(
+            end=pd.Timestamp.now().normalize() - pd.Timedelta(days=1), periods=250)
+        forecaster = RACEForecaster(n_jobs=1)
+        forecaster.forecast(history, "Onion", "Agra", horizon=30)
+        forecaster.forecast_realtime(history, "Onion", "Agra", None, horizon=30)  # compiles
+
+        for ticks in (None, self._ticks()):
+            start = time.perf_counter()
+            result = forecaster.forecast_realtime(history, "Onion", "Agra", ticks, horizon=30)
+            self.assertTrue(result.metadata["fast_path"])
+            self.assertLess(time.perf_counter() - start, 0.5)
+
+    def test_mismatched_state_refits_on_daily_rows(self):
+        """A refit forced by the fast path never stores the partial tick day."""
+        history = self._history()
+        forecaster = RACEForecaster(n_jobs=1)
+        # State trained with spread features the live history lacks
+        forecaster.forecast(history.assign(price_min=history["price"] - 50,
+                                           price_max=history["price"] + 50),
+                            "Onion", "Agra", horizon=5)
+
+        result = forecaster.forecast_realtime(history, "Onion", "Agra",
+                                              self._ticks(), horizon=5)
+        state = forecaster._states[("Onion", "Agra")]
+        self.assertEqual(state.trained_until, history["date"].max())
+        self.assertTrue(result.metadata["fast_path"])
+        self.assertEqual(result.metadata["training_samples"], 101)
+
+    def test_loads_state_from_store(self):
+        """A fresh forecaster picks up the persisted state for the fast path."""
+        history = self._history()
+        with tempfile.TemporaryDirectory() as root:
+            store = ModelStore(root)
+            RACEForecaster(n_jobs=1, model_store=store).forecast(
+                history, "Onion", "Agra", horizon=5, incremental=True)
+
+            forecaster = RACEForecaster(n_jobs=1, model_store=store)
+            result = forecaster.forecast_realtime(history, "Onion", "Agra",
+                                                  self._ticks(), horizon=5)
+            self.assertTrue(result.metadata["fast_path"])
+            self.assertEqual(forecaster.models, [])
+
+
+class TestBatchedRecursion(unittest.TestCase):
+
+    def test_forecast_many_matches_forecast(self):
+        """Lockstep forecasts equal the per-pair ones."""
+        pairs = [(_make_history(days=90, seed=s), "Onion", f"M{s}") for s in (1, 2)]
+        batched = RACEForecaster(n_jobs=1).forecast_many(pairs, horizon=5)
+
+        for data, commodity, mandi in pairs:
+            single = RACEForecaster(n_jobs=1).forecast(data, commodity, mandi, horizon=5)
+            pd.testing.assert_frame_equal(batched[(commodity, mandi)].forecast_df,
+                                          single.forecast_df)
+
+    def test_one_predict_per_member_per_step(self):
+        """Series sharing members are scored with one stacked call per step."""
+        forecaster = RACEForecaster(n_jobs=1)
+        history = _make_history(days=90)
+        forecaster.forecast(history, "Onion", "Agra", horizon=1)
+
+        calls = []
+        for m in forecaster.models:
+            predict = m.predict
+            m.predict = lambda X, predict=predict: calls.append(len(X)) or predict(X)
+
+        job = _RecursionJob(history, forecaster.feature_factory,
+                            forecaster._cached_feature_cols,
+                            forecaster._cached_weights, forecaster.models)
+        out = forecaster._recursive_forecast_batch([job, job._replace(data=history.iloc[:-3])], 4)
+
+        self.assertEqual(len(calls), 4 * len(forecaster.models))
+        self.assertTrue(all(n == 2 for n in calls))
+        self.assertEqual([len(df) for df in out], [4, 4])
+
+
+class TestCompiledTrees(unittest.TestCase):
+
+    def test_matches_native_predictions(self):
+        """Exported trees score like the native libraries, NaNs included."""
+        rng = np.random.default_rng(1)
+        X = rng.normal(size=(200, 8))
+        X[rng.random(X.shape) < 0.05] = np.nan
+        y = 2000 + np.nan_to_num(X) @ rng.normal(size=8) * 50
+        matrix = _TrainingMatrix(X, y)
+        X_test = rng.normal(size=(500, 8))
+        X_test[rng.random(X_test.shape) < 0.05] = np.nan
+
+        train, valid = np.arange(150), np.arange(150, 200)
+        for cls in (_XGBModel, _LGBModel, _CatModel):
+            member = cls(n_estimators=60, early_stopping_rounds=3)
+            member.fit(matrix.container(member.library, train),
+                       matrix.container(member.library, valid))
+            native = member._predict_native(X_test)
+            compiled = compile_member(member).predict(X_test)
+            np.testing.assert_allclose(compiled, native, rtol=1e-5, atol=1e-2,
+                                       err_msg=member.name)
+
+    def test_bit_for_bit_with_native(self):
+        """Leaves are summed in the library's order and precision."""
+        rng = np.random.default_rng(2)
+        X = rng.normal(size=(300, 8)) * 1000
+        y = 2000 + X @ rng.normal(size=8)
+        matrix = _TrainingMatrix(X, y)
+        X_test = rng.normal(size=(1000, 8)) * 1000
+        X_test[rng.random(X_test.shape) < 0.05] = np.nan
+
+        for cls in (_XGBModel, _LGBModel, _CatModel):
+            member = cls(n_estimators=150)
+            member.fit(matrix.container(member.library))
+            native = member._predict_native(X_test)
+            compiled = compile_member(member).predict(X_test)
+            self.assertEqual(compiled.dtype, native.dtype, member.name)
+            np.testing.assert_array_equal(compiled, native, err_msg=member.name)
+
+    def test_realtime_path_uses_compiled_members(self):
+        """Cached members are compiled once and refits drop the export."""
+        history = _make_history(days=100)
+        history["date"] = pd.date_range(
+            end=pd.Timestamp.now().normalize() - pd.Timedelta(days=1), periods=100)
+        forecaster = RACEForecaster(n_jobs=1)
+        forecaster.forecast(history, "Onion", "Agra", horizon=3)
+        self.assertTrue(all(m.compiled is None for m in forecaster.models))
+
+        forecaster.forecast_realtime(history, "Onion", "Agra", horizon=3)
+        self.assertTrue(all(m.compiled is not None for m in forecaster.models))
+
+        member = forecaster.models[0]
+        member.update(_TrainingMatrix(np.zeros((20, len(forecaster._cached_feature_cols))),
+                                      np.zeros(20)).container(member.library), 1)
+        self.assertIsNone(member.compiled)
+
+
+class TestPanelFeatures(unittest.TestCase):
+
+    def test_panel_matches_per_series(self):
+        """Grouped panel features equal per-series builds, row for row."""
+        series = []
+        for i, (commodity, mandi, days) in enumerate(
+                [("Onion", "Agra", 90), ("Onion", "Pune", 40), ("Wheat", "Agra", 20)]):
+            history = _make_history(days=days, seed=i)
+            history["commodity"], history["mandi"] = commodity, mandi
+            history["price_min"] = history["price"] - 50
+            history["price_max"] = history["price"] + 50
+            series.append(history)
+        panel = pd.concat(series).sample(frac=1.0, random_state=0)
+        weather = pd.DataFrame({
+            "date": pd.date_range("2025-01-01", periods=60, freq="2D"),
+            "temperature": np.linspace(20, 35, 60),
+            "rainfall": np.linspace(0, 5, 60),
+        })
+
+        for weather_df in (None, weather):
+            out = FeatureFactory().build_features_panel(panel, weather_df=weather_df)
+            for history in series:
+                commodity, mandi = history["commodity"].iloc[0], history["mandi"].iloc[0]
+                expected = FeatureFactory(commodity=commodity).build_features(
+                    history, weather_df=weather_df)
+                got = out[(out["commodity"] == commodity) & (out["mandi"] == mandi)]
+                pd.testing.assert_frame_equal(got.reset_index(drop=True), expected)
+
+
+class TestTailFeatures(unittest.TestCase):
+
+    def test_rows_equal_full_rebuild(self):
+        """Appended rows get the values a full rebuild gives the last row."""
+        history = _make_history(days=90).assign(price_min=lambda d: d["price"] - 40,
+                                                 price_max=lambda d: d["price"] + 40)
+        factory = FeatureFactory(commodity="Onion", pruned=["rsi", "stl_residual"])
+        cols = factory.get_feature_columns(factory.build_features(history))
+        tail = TailFeatures(factory, history, capacity=3)
+        current = history
+        for price in (2100.0, 1950.0, 2300.0):
+            date = current["date"].iloc[-1] + pd.Timedelta(days=1)
+            tail.append(date, price, 250.0)
+            current = pd.concat([current, pd.DataFrame(
+                [{"date": date, "price": price, "arrival": 250.0}])], ignore_index=True)
+            expected = factory.build_features(current)[cols].values[-1]
+            np.testing.assert_array_equal(tail.row(cols), expected)
+
+
+class TestFeatureStore(unittest.TestCase):
+
+    def test_append_and_rebuild(self):
+        """New dates are appended from the trailing window; rewrites rebuild."""
+        history = _make_history(days=150)
+        expected = FeatureFactory(commodity="Onion").build_features(history)
+        with tempfile.TemporaryDirectory() as root:
+            store = FeatureStore(root, window=90)
+
+            first = store.features(history.iloc[:140], "Onion", "Agra")
+            self.assertEqual(len(first), 140)
+            self.assertIsInstance(store.load_matrix("Onion", "Agra")[1], np.memmap)
+
+            extended = store.features(history, "Onion", "Agra")
+            self.assertEqual(len(extended), 150)
+            pd.testing.assert_frame_equal(extended.iloc[:140], first)
+            # Window-local features of the appended rows match a full build
+            for col in ("lag_7", "roll_std_30", "rsi", "atr", "days_since_shock"):
+                np.testing.assert_allclose(extended[col].iloc[140:],
+                                           expected[col].iloc[140:], err_msg=col)
+
+            revised = history.copy()
+            revised.loc[10, "price"] += 100.0
+            rebuilt = store.features(revised, "Onion", "Agra")
+            np.testing.assert_allclose(rebuilt["lag_1"].iloc[11], revised["price"].iloc[10])
+
+    def test_training_reads_the_memory_map(self):
+        """Fits train on the stored matrix itself and match the rebuilt features."""
+        import agents.forecast_engine.ensemble as ensemble
+
+        history = _make_history(days=120)
+        plain = RACEForecaster(n_jobs=1).forecast(history, "Onion", "Agra", horizon=5)
+        with tempfile.TemporaryDirectory() as root:
+            store = FeatureStore(root)
+            matrices = []
+            real = ensemble._TrainingMatrix
+
+            def record(X, y):
+                matrices.append(real(X, y))
+                return matrices[-1]
+
+            with mock.patch.object(ensemble, "_TrainingMatrix", side_effect=record):
+                stored = RACEForecaster(n_jobs=1, feature_store=store).forecast(
+                    history, "Onion", "Agra", horizon=5)
+            X = store.load_matrix("Onion", "Agra")[1]
+            self.assertEqual(X.dtype, np.float32)
+            self.assertTrue(X.flags.c_contiguous)
+            # A view of the memory map, not a copy
+            mapped = matrices[0].X.base
+            self.assertIsInstance(mapped, np.memmap)
+            self.assertEqual(os.path.basename(mapped.filename), "matrix.npy")
+        pd.testing.assert_frame_equal(stored.forecast_df, plain.forecast_df)
+
+
+class TestSTLCache(unittest.TestCase):
+
+    def setUp(self):
+        _STL_CACHE.clear()
+
+    def test_cache_hit_is_identical(self):
+        history = _make_history(days=150)
+        factory = FeatureFactory(commodity="Onion")
+        first = factory.build_features(history)
+        second = factory.build_features(history)
+        pd.testing.assert_frame_equal(first, second)
+        self.assertEqual(len(_STL_CACHE._entries), 1)
+
+    def test_windowed_extension_refits_only_the_tail(self):
+        """An extended series keeps the cached prefix outside the window."""
+        history = _make_history(days=200)
+        factory = FeatureFactory(commodity="Onion", stl_mode="windowed", stl_window=90)
+        base = factory.build_features(history.iloc[:190])
+        extended = factory.build_features(history)
+
+        np.testing.assert_array_equal(extended["stl_trend"].iloc[:110],
+                                      base["stl_trend"].iloc[:110])
+        self.assertFalse(np.allclose(extended["stl_trend"].iloc[110:190],
+                                     base["stl_trend"].iloc[110:190]))
+
+    def test_unknown_mode_rejected(self):
+        with self.assertRaises(ValueError):
+            FeatureFactory(stl_mode="exact")
+
+
+class TestIndicators(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        price = 2000 + np.cumsum(rng.normal(0, 30, 200))
+        price[40:70] = 1900.0          # flat stretch: exact-zero std windows
+        price[:2] = np.nan             # leading gap
+        self.price = price
+        self.series = pd.Series(price)
+
+    def assert_matches(self, ours, theirs, rtol=1e-7):
+        np.testing.assert_allclose(ours, np.asarray(theirs, dtype=float),
+                                   rtol=rtol, atol=1e-9, equal_nan=True)
+
+    def test_rolling_matches_pandas(self):
+        """Cumulative-sum rolling stats agree with pandas, incl. NaN / flat windows."""
+        s = self.series
+        gappy = s.copy()
+        gappy[100] = np.nan
+        for window in (2, 7, 30):
+            self.assert_matches(indicators.rolling_mean(s, window), s.rolling(window).mean())
+            self.assert_matches(indicators.rolling_mean(gappy, window, min_periods=1),
+                                gappy.rolling(window, min_periods=1).mean())
+            self.assert_matches(indicators.rolling_std(s, window), s.rolling(window).std())
+            self.assert_matches(indicators.rolling_skew(s, window), s.rolling(window).skew(),
+                                rtol=1e-5)
+            self.assert_matches(indicators.rolling_max(s, window), s.rolling(window).max())
+            self.assert_matches(indicators.rolling_min(gappy, window, min_periods=1),
+                                gappy.rolling(window, min_periods=1).min())
+        # Flat windows are exact, as in pandas
+        self.assertEqual(indicators.rolling_std(s, 7)[60], 0.0)
+        self.assertEqual(indicators.rolling_mean(s, 7)[60], 1900.0)
+
+    def test_shifts_and_ewm_match_pandas(self):
+        s = self.series
+        self.assert_matches(indicators.lag(s, 7), s.shift(7))
+        self.assert_matches(indicators.diff(s), s.diff())
+        self.assert_matches(indicators.pct_change(s, 7), s.pct_change(7))
+        self.assert_matches(indicators.ewm_mean(s, span=12), s.ewm(span=12, adjust=False).mean())
+
+        gappy = s.copy()
+        gappy[[100, 101, 150]] = np.nan
+        self.assert_matches(indicators.ewm_mean(gappy, span=9),
+                            gappy.ewm(span=9, adjust=False).mean())
+
+    def test_columns_equal_single_series(self):
+        """A column of a 2-D call is bit-identical to the 1-D call on that series."""
+        short = np.r_[self.price[50:], np.full(50, np.nan)]
+        matrix = np.column_stack([self.price, short])
+        for kernel in (lambda x: indicators.rolling_skew(x, 14),
+                       lambda x: indicators.rsi(x),
+                       lambda x: indicators.macd(x)[1],
+                       lambda x: indicators.atr(x),
+                       lambda x: indicators.days_since_shock(x)):
+            both = kernel(matrix)
+            np.testing.assert_array_equal(both[:, 0], kernel(self.price))
+            np.testing.assert_array_equal(both[:150, 1], kernel(self.price[50:]))
+
+
+class TestIncrementalHMM(unittest.TestCase):
+
+    def setUp(self):
+        self.detector = RegimeDetector()
+        if not self.detector._hmm_available:
+            self.skipTest("hmmlearn not installed")
+        rng = np.random.default_rng(11)
+        self.prices = pd.Series(2000 + np.cumsum(rng.normal(0, 30, 400)))
+
+    def test_single_pass_matches_hmmlearn(self):
+        """Forward filter + Viterbi agree with hmmlearn's predict / predict_proba / score."""
+        from hmmlearn.hmm import GaussianHMM
+
+        returns = self.prices.pct_change().dropna().to_numpy().reshape(-1, 1)
+        hmm = GaussianHMM(n_components=3, covariance_type="full", random_state=42).fit(returns)
+        log_b = _emission_logprob(hmm.means_, hmm.covars_, returns)
+        alpha, loglik, path = _forward_pass(hmm.startprob_, hmm.transmat_, log_b, viterbi=True)
+
+        np.testing.assert_allclose(alpha, hmm.predict_proba(returns)[-1], atol=1e-8)
+        self.assertAlmostEqual(loglik.sum(), hmm.score(returns), places=6)
+        np.testing.assert_array_equal(path, hmm.predict(returns))
+
+    def test_new_day_is_filtered_not_refit(self):
+        first = self.detector.detect_regime(self.prices.iloc[:-1])
+        self.assertIsNotNone(first.hmm)
+
+        nxt = self.detector.detect_regime(self.prices, previous=first)
+        self.assertEqual(nxt.hmm.filtered_obs, 1)
+        self.assertIs(nxt.hmm.transmat, first.hmm.transmat)
+        self.assertEqual(nxt.hmm.n_obs, first.hmm.n_obs + 1)
+
+    def test_drift_or_revision_refits(self):
+        first = self.detector.detect_regime(self.prices.iloc[:-1])
+
+        shocked = self.prices.copy()
+        shocked.iloc[-1] *= 1.4
+        refit = self.detector.detect_regime(shocked, previous=first)
+        self.assertEqual(refit.hmm.filtered_obs, 0)
+
+        revised = self.prices.copy()
+        revised.iloc[10] += 50
+        refit = self.detector.detect_regime(revised, previous=first)
+        self.assertEqual(refit.hmm.filtered_obs, 0)
+        self.assertEqual(refit.hmm.n_obs, len(revised) - 1)
+
+
+def _loop_hurst(ts, max_lag=20):
+    """The chunk-loop R/S estimator the vectorised one replaced."""
+    if len(ts) < max_lag + 2:
+        return 0.5
+    lags = range(2, min(max_lag, len(ts) // 2))
+    tau = []
+    for lag in lags:
+        chunks = [ts[i: i + lag] for i in range(0, len(ts) - lag, lag)]
+        rs_values = []
+        for chunk in chunks:
+            deviations = np.cumsum(chunk - np.mean(chunk))
+            s = np.std(chunk, ddof=1)
+            rs_values.append((deviations.max() - deviations.min()) / (s if s > 0 else 1e-9))
+        tau.append(np.mean(rs_values) if rs_values else 1.0)
+    poly = np.polyfit(np.log(list(lags)), np.log(np.array(tau) + 1e-9), 1)
+    return float(np.clip(poly[0], 0.0, 1.0))
+
+
+class TestBatchRegimes(unittest.TestCase):
+
+    def setUp(self):
+        self.detector = RegimeDetector()
+        rng = np.random.default_rng(5)
+        self.series = {
+            ("Onion", "Lasalgaon"): pd.Series(2000 + np.cumsum(rng.normal(0, 30, 200))),
+            ("Onion", "Pune"): pd.Series(2100 + np.cumsum(rng.normal(0, 45, 150))),
+            ("Tomato", "Kolar"): pd.Series(1500 + np.cumsum(rng.normal(0, 20, 120))),
+            ("Tomato", "Pune"): pd.Series(1500 + np.cumsum(rng.normal(0, 20, 12))),
+        }
+
+    def test_batch_features_match_single_series(self):
+        batch = self.detector._engineer_features_batch(
+            [s.to_numpy() for s in self.series.values() if len(s) >= 20])
+        for features, prices in zip(batch, self.series.values()):
+            single = self.detector._engineer_features(prices)
+            for name, value in single.items():
+                self.assertAlmostEqual(features[name], value, places=9, msg=name)
+
+    def test_hurst_matches_loop_estimator(self):
+        rng = np.random.default_rng(3)
+        series = [rng.normal(0, 1, n) for n in (15, 22, 41, 97, 300)]
+        series += [2000 + np.cumsum(rng.normal(0, 30, 365)), np.full(60, 5.0)]
+        expected = [_loop_hurst(ts) for ts in series]
+
+        padded = np.full((365, len(series)), np.nan)
+        for j, ts in enumerate(series):
+            padded[:len(ts), j] = ts
+        batch = RegimeDetector._hurst_exponent_batch(padded, [len(ts) for ts in series])
+        np.testing.assert_allclose(batch, expected, rtol=0, atol=1e-12)
+        for ts, value in zip(series, expected):
+            self.assertAlmostEqual(RegimeDetector._hurst_exponent(ts), value, places=12)
+
+    def test_pairs_of_a_commodity_share_one_hmm(self):
+        if not self.detector._hmm_available:
+            self.skipTest("hmmlearn not installed")
+        states = self.detector.detect_regimes_batch(self.series)
+        self.assertEqual(list(states), list(self.series))
+        self.assertEqual(states[("Tomato", "Pune")].features["reason"], "insufficient_data")
+
+        lasalgaon, pune = states[("Onion", "Lasalgaon")], states[("Onion", "Pune")]
+        self.assertIs(lasalgaon.hmm.transmat, pune.hmm.transmat)
+        self.assertNotEqual(lasalgaon.hmm.fingerprint, pune.hmm.fingerprint)
+        self.assertIsNot(states[("Tomato", "Kolar")].hmm.transmat, lasalgaon.hmm.transmat)
+
+    def test_snapshot_roundtrip_through_db(self):
+        states = self.detector.detect_regimes_batch(self.series)
+        rows = [dict(state.to_snapshot(), commodity=c, mandi=m, as_of="2024-06-30")
+                for (c, m), state in states.items()]
+        with tempfile.TemporaryDirectory() as tmp:
+            db_name = dbm.DB_NAME
+            dbm.DB_NAME = os.path.join(tmp, "regimes.db")
+            try:
+                dbm.init_db()
+                dbm.save_regime_snapshots("2024-06-30", rows)
+                row = dbm.get_regime_snapshot("Onion", "Pune", as_of="2024-06-30")
+                self.assertIsNone(dbm.get_regime_snapshot("Onion", "Pune", as_of="2024-07-01"))
+            finally:
+                dbm.DB_NAME = db_name
+
+        restored = RegimeState.from_snapshot(row)
+        original = states[("Onion", "Pune")]
+        self.assertEqual(restored.regime, original.regime)
+        self.assertAlmostEqual(restored.confidence, original.confidence)
+        self.assertEqual(restored.transition_prob, original.transition_prob)
+        self.assertAlmostEqual(restored.features["hurst"], original.features["hurst"])
+
+
+class TestBudgetedForecast(unittest.TestCase):
+
+    def setUp(self):
+        self.data = _make_history(days=90)
+
+    def test_exhausted_budget_still_returns_linear_baseline(self):
+        result = RACEForecaster(n_jobs=2).forecast(
+            self.data, "Onion", "Agra", horizon=5, budget=0.0)
+        self.assertEqual(result.metadata["members"], ["LinearTrend"])
+        self.assertEqual(set(result.metadata["members_skipped"]),
+                         {"XGBoost", "LightGBM", "CatBoost"})
+        self.assertEqual(result.model_weights, {"LinearTrend": 1.0})
+        self.assertEqual(len(result.forecast_df), 5)
+        self.assertTrue(np.isfinite(result.forecast_df["forecast_price"]).all())
+
+    def test_ample_budget_fits_every_member(self):
+        result = RACEForecaster(n_jobs=2).forecast(
+            self.data, "Onion", "Agra", horizon=5, budget=600.0)
+        self.assertEqual(result.metadata["members_skipped"], [])
+        self.assertEqual(set(result.metadata["members"]),
+                         {"LinearTrend", "XGBoost", "LightGBM", "CatBoost"})
+        self.assertAlmostEqual(sum(result.model_weights.values()), 1.0, places=3)
+
+    def test_unbudgeted_forecast_is_unchanged(self):
+        result = RACEForecaster(n_jobs=2).forecast(self.data, "Onion", "Agra", horizon=5)
+        self.assertNotIn("members_skipped", result.metadata)
+        self.assertNotIn("LinearTrend", result.model_weights)
+
+
+class TestMemberSelection(unittest.TestCase):
+
+    def test_registry_builds_ensemble_members(self):
+        self.assertTrue({"XGBoost", "LightGBM", "CatBoost", "LinearTrend"} <= set(MEMBER_REGISTRY))
+        member = create_member("XGBoost", n_threads=1)
+        self.assertIsInstance(member, _XGBModel)
+        with self.assertRaises(ValueError):
+            create_member("Prophet")
+
+    def test_negligible_members_sit_out_then_probe(self):
+        forecaster = RACEForecaster(n_jobs=2, negligible_weight=0.05, negligible_runs=2)
+        history = {
+            "XGBoost": {"weights": [0.6, 0.7]},
+            "LightGBM": {"weights": [0.01, 0.02]},
+            "CatBoost": {"weights": [0.3, 0.01]},
+        }
+        members, dropped = forecaster._select_members(history)
+        self.assertEqual([m.name for m in members], ["XGBoost", "CatBoost"])
+        self.assertEqual(dropped, ["LightGBM"])
+
+        history["LightGBM"]["sat_out"] = 2
+        members, dropped = forecaster._select_members(history)
+        self.assertIn("LightGBM", [m.name for m in members])
+        self.assertEqual(dropped, [])
+
+    def test_costs_and_history_are_recorded(self):
+        forecaster = RACEForecaster(n_jobs=2)
+        result = forecaster.forecast(_make_history(days=90), "Onion", "Agra", horizon=3)
+        costs = result.metadata["member_costs"]
+        self.assertEqual(set(costs), set(result.metadata["members"]))
+        for cost in costs.values():
+            self.assertGreater(cost["fit_seconds"], 0)
+            self.assertGreater(cost["predict_ms"], 0)
+        history = forecaster._states[("Onion", "Agra")].member_history
+        for name, weight in result.model_weights.items():
+            self.assertEqual(history[name]["weights"], [weight])
+
+
+class TestTuning(unittest.TestCase):
+
+    def test_winner_never_worse_than_defaults(self):
+        tuner = SuccessiveHalvingTuner(n_configs=4, eta=2, min_rounds=10, max_rounds=40,
+                                       budget_seconds=300, n_jobs=2)
+        histories = [_make_history(days=80, seed=s) for s in (1, 2)]
+        results = tuner.tune(histories, commodity="Onion", members=["XGBoost"])
+
+        result = results["XGBoost"]
+        self.assertTrue(result.completed)
+        self.assertLessEqual(result.cv_mape, result.default_mape)
+        self.assertIn("n_estimators", result.params)
+
+    def test_stored_params_reach_members(self):
+        params = {"XGBoost": {"max_depth": 3, "learning_rate": 0.2, "n_estimators": 40}}
+        with tempfile.TemporaryDirectory() as tmp:
+            db_name = dbm.DB_NAME
+            dbm.DB_NAME = os.path.join(tmp, "params.db")
+            try:
+                dbm.init_db()
+                dbm.save_model_params("Onion", "XGBoost", params["XGBoost"], 4.2, 4.5, 27)
+                self.assertEqual(dbm.get_model_params("Onion"), params)
+                self.assertEqual(dbm.get_model_params("Tomato"), {})
+            finally:
+                dbm.DB_NAME = db_name
+
+        forecaster = RACEForecaster(n_jobs=2, member_params={"Onion": params}.get)
+        forecaster.forecast(_make_history(days=60), "Onion", "Agra", horizon=2)
+        xgb_member = next(m for m in forecaster.models if m.name == "XGBoost")
+        self.assertEqual(xgb_member.n_estimators, 40)
+        self.assertEqual(xgb_member._params()["max_depth"], 3)
+        self.assertEqual(xgb_member.model.num_boosted_rounds(), 40)
+
+
+class TestBacktest(unittest.TestCase):
+
+    def test_step_features_match_recursive_rebuild(self):
+        data = _make_history(days=240)
+        backtester = WalkForwardBacktester(min_train=200, window=200)
+        series = backtester._build_series(("Onion", "Agra"), data)
+        cutoff = 209
+        x = backtester._step_features(series, np.array([cutoff]), np.zeros((1, 0)))[0]
+
+        # What the recursive forecast builds for its first step
+        history = data.iloc[:cutoff + 1]
+        placeholder = history.iloc[[-1]].assign(date=history["date"].iloc[-1] + pd.Timedelta(days=1))
+        expected = FeatureFactory(commodity="Onion").build_features(
+            pd.concat([history, placeholder], ignore_index=True))
+        expected = expected[series.feature_cols].values[-1]
+        for col, got, want in zip(series.feature_cols, x, expected):
+            if col.startswith("stl_"):
+                continue
+            self.assertAlmostEqual(got, want, delta=1e-3 * max(1.0, abs(want)), msg=col)
+
+    def test_run_scores_cutoffs_and_stores_summary(self):
+        histories = {("Onion", mandi): _make_history(days=170, seed=seed)
+                     for seed, mandi in enumerate(["Agra", "Pune"])}
+        backtester = WalkForwardBacktester(horizons=(1, 7), retrain_every=20,
+                                           min_train=120, n_splits=0,
+                                           members=["LightGBM"], n_jobs=2)
+        report = backtester.run(histories)
+
+        # Cut-offs are rows 119..168: 50 per pair in 3 retrain blocks
+        self.assertEqual(report.retrains, 6)
+        by_horizon = report.mape("horizon").set_index("horizon")
+        self.assertEqual(by_horizon.loc[1, "n_forecasts"], 2 * 50)
+        self.assertEqual(by_horizon.loc[7, "n_forecasts"], 2 * 44)
+        self.assertTrue(np.isfinite(report.forecasts["ape"]).all())
+        self.assertTrue(set(report.forecasts["regime"]) <= {"STABLE", "VOLATILE", "CRISIS"})
+
+        with tempfile.TemporaryDirectory() as tmp:
+            db_name = dbm.DB_NAME
+            dbm.DB_NAME = os.path.join(tmp, "backtest.db")
+            try:
+                dbm.init_db()
+                dbm.save_backtest_results("bt-1", report.summary(), 20)
+                stored = dbm.get_backtest_results()
+            finally:
+                dbm.DB_NAME = db_name
+        self.assertEqual(set(stored["run_id"]), {"bt-1"})
+        self.assertEqual(stored["n_forecasts"].sum(), len(report.forecasts))
+
+
+class TestResources(unittest.TestCase):
+
+    def setUp(self):
+        self._saved = resources.get_config()
+
+    def tearDown(self):
+        resources.configure(cpus=self._saved.cpus, workers=self._saved.workers)
+
+    def test_budget_is_split_across_workers(self):
+        config = resources.configure(cpus=16, workers=1)
+        self.assertEqual(config.fit_jobs(), 4)
+        self.assertEqual(config.library_threads(config.fit_jobs()), 4)
+
+        config = resources.configure(cpus=8, workers=2)
+        self.assertEqual(config.cores_per_forecast, 4)
+        self.assertEqual(config.fit_jobs(), 4)
+        self.assertEqual(config.library_threads(4), 1)
+        # More workers than cores still leaves every forecast one thread
+        config = resources.configure(workers=32)
+        self.assertEqual((config.fit_jobs(), config.library_threads()), (1, 1))
+
+    def test_forecaster_and_members_follow_config(self):
+        resources.configure(cpus=8, workers=2)
+        forecaster = RACEForecaster()
+        self.assertEqual((forecaster.n_jobs, forecaster.n_threads), (4, 1))
+        forecaster = RACEForecaster(n_jobs=2)
+        self.assertEqual((forecaster.n_jobs, forecaster.n_threads), (2, 2))
+        self.assertEqual(forecaster._create_member("XGBoost").n_threads, 2)
+
+
+class TestFeatureSelection(unittest.TestCase):
+
+    def test_pruned_columns_are_skipped(self):
+        data = _make_history(days=150)
+        pruned = ["bb_lower", "roll_mean_7", "macd", "macd_signal", "macd_hist",
+                  "stl_trend", "stl_seasonal", "stl_residual", "month"]
+        full = FeatureFactory(commodity="Onion").build_features(data)
+        factory = FeatureFactory(commodity="Onion", pruned=pruned)
+        featured = factory.build_features(data)
+
+        cols = factory.get_feature_columns(featured)
+        self.assertFalse(set(pruned) & set(featured.columns))
+        self.assertEqual(cols, [c for c in FeatureFactory(commodity="Onion")
+                                .get_feature_columns(full) if c not in pruned])
+        np.testing.assert_allclose(featured[cols].values, full[cols].values)
+        # Harvest flag still derives from the month
+        np.testing.assert_array_equal(featured["is_harvest"], full["is_harvest"])
+
+        forecaster = RACEForecaster(n_jobs=2, pruned_features={"Onion": pruned}.get)
+        result = forecaster.forecast(data, "Onion", "Agra", horizon=3)
+        self.assertEqual(result.metadata["feature_count"], len(cols))
+        self.assertEqual(len(result.forecast_df), 3)
+
+    def test_selection_prunes_duplicates_and_roundtrips(self):
+        histories = [_make_history(days=150, seed=s) for s in (1, 2)]
+        selector = FeatureSelector(method="permutation", members=["XGBoost"],
+                                   tolerance=1.0, n_jobs=2)
+        result = selector.select(histories, commodity="Onion")
+
+        self.assertTrue(result.accepted)
+        self.assertEqual(set(result.kept) | set(result.pruned), set(result.importance))
+        self.assertFalse(set(result.kept) & set(result.pruned))
+        self.assertGreaterEqual(len(result.kept), selector.min_features)
+        # Price-level columns (lags, rolling means, bands) duplicate each other
+        kept = set(result.kept)
+        self.assertFalse({"lag_1", "roll_mean_7", "bb_upper", "bb_lower"} <= kept)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            db_name = dbm.DB_NAME
+            dbm.DB_NAME = os.path.join(tmp, "features.db")
+            try:
+                dbm.init_db()
+                dbm.save_pruned_features("Onion", result.pruned, result.importance,
+                                         result.cv_mape, result.full_mape)
+                self.assertEqual(dbm.get_pruned_features("Onion"), result.pruned)
+                self.assertEqual(dbm.get_pruned_features("Tomato"), [])
+            finally:
+                dbm.DB_NAME = db_name
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+"""
+Unit Test Suite for the Forecast Execution Agent
+================================================
+Verifies correct operations of:
+1. RACE result cache shared by generate_forecasts / get_race_metadata
+2. Vectorised legacy Trend + Residual fallback
+"""
+
+import sys
+import os
+import unittest
+from unittest import mock
+import pandas as pd
+import numpy as np
+
+# Ensure workspace root is in path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.forecast_execution import ForecastingAgent
+
+
+def _make_history(days=100, seed=7):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "date": pd.date_range("2025-01-01", periods=days),
+        "price": 2000 + np.cumsum(rng.normal(0, 30, days)),
+        "arrival": rng.integers(100, 500, days),
+    })
+
+
+class TestResultCache(unittest.TestCase):
+
+    def setUp(self):
+        self.agent = ForecastingAgent()
+        if not self.agent._race_available:
+            self.skipTest("RACE dependencies not installed")
+        self.calls = 0
+        forecast = self.agent._race_forecaster.forecast
+
+        def counting_forecast(*args, **kwargs):
+            self.calls += 1
+            return forecast(*args, **kwargs)
+
+        self.agent._race_forecaster.forecast = counting_forecast
+
+    def test_metadata_reuses_forecast(self):
+        """One training serves both the forecast and the model card."""
+        data = _make_history()
+        forecast_df = self.agent.generate_forecasts(data, "Onion", "Agra")
+        meta = self.agent.get_race_metadata(data, "Onion", "Agra")
+
+        self.assertEqual(self.calls, 1)
+        pd.testing.assert_frame_equal(forecast_df, meta["forecast_df"])
+        self.assertIs(self.agent.get_last_result().model_weights, meta["model_weights"])
+
+        # Callers mutating the returned frame must not corrupt the cache
+        forecast_df["forecast_price"] = 0.0
+        again = self.agent.generate_forecasts(data, "Onion", "Agra")
+        self.assertEqual(self.calls, 1)
+        self.assertTrue((again["forecast_price"] != 0.0).all())
+
+    def test_new_data_and_eviction(self):
+        """Changed data retrains; the cache stays within its size bound."""
+        self.agent.RESULT_CACHE_SIZE = 1
+        data = _make_history()
+        self.agent.generate_forecasts(data, "Onion", "Agra")
+
+        changed = data.copy()
+        changed.loc[changed.index[-1], "price"] += 1.0
+        self.agent.generate_forecasts(changed, "Onion", "Agra")
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(len(self.agent._result_cache), 1)
+
+        self.agent.generate_forecasts(data, "Onion", "Agra")
+        self.assertEqual(self.calls, 3)
+
+
+class TestLegacyForecast(unittest.TestCase):
+
+    def test_step_features_match_prepare_features(self):
+        """The per-step feature row equals prepare_features' last row."""
+        agent = ForecastingAgent()
+        rng = np.random.default_rng(3)
+        frame = pd.DataFrame({
+            "date": pd.date_range("2025-01-01", periods=60),
+            "resid": np.append(rng.normal(0, 40, 59), np.nan),
+            "rainfall": rng.uniform(0, 10, 60),
+            "temperature": rng.uniform(20, 35, 60),
+        })
+        frame.loc[59, ["rainfall", "temperature"]] = frame.loc[58, ["rainfall", "temperature"]]
+        cols = list(agent.LEGACY_FEATURES) + ["rain_lag_1", "temp_lag_1"]
+        expected = agent.prepare_features(frame)[cols].iloc[-1].to_numpy(dtype=float)
+
+        row = agent._residual_step_features(
+            frame["resid"].to_numpy(), frame["date"].iloc[-1],
+            (frame["rainfall"].iloc[-1], frame["temperature"].iloc[-1]))
+        np.testing.assert_allclose(row, expected, rtol=1e-9, atol=1e-9)
+
+    def test_forecast_leaves_weather_untouched(self):
+        agent = ForecastingAgent()
+        data = _make_history(days=90)
+        weather = pd.DataFrame({
+            "date": data["date"].dt.strftime("%Y-%m-%d"),
+            "rainfall": 1.0,
+            "temperature": 28.0,
+        })
+        before = weather.copy()
+        forecast = agent._generate_legacy_forecast(data, "Onion", "Agra", weather)
+
+        pd.testing.assert_frame_equal(weather, before)
+        self.assertEqual(len(forecast), 30)
+        self.assertEqual(forecast["date"].iloc[0], data["date"].iloc[-1] + pd.Timedelta(days=1))
+        self.assertTrue(np.isfinite(forecast["forecast_price"]).all())
+        self.assertTrue((forecast["lower_bound"] <= forecast["upper_bound"]).all())
+
+    def test_forecasting_model_sees_the_latest_days(self):
+        """Only the light holdout model leaves out the validation days."""
+        agent = ForecastingAgent()
+        data = _make_history(days=90)
+        with mock.patch.object(agent, "_tune_model", wraps=agent._tune_model) as fit:
+            agent._generate_legacy_forecast(data, "Onion", "Agra")
+
+        (holdout_X, _), holdout_params = fit.call_args_list[0]
+        (full_X, _), full_params = fit.call_args_list[1]
+        self.assertEqual(len(holdout_X), 85)
+        self.assertEqual(holdout_params["n_estimators"], 30)
+        self.assertEqual(len(full_X), 90)
+        self.assertEqual(full_params, {})
+        self.assertEqual(agent.residual_model.n_estimators, 100)
+
+
+if __name__ == "__main__":
+    unittest.main()